@@ -85,6 +85,9 @@ const DEFAULT_SERVER_URL = 'http://localhost:3000';
 
 let intervalId = null;
 let attemptCount = 0;
+// 실행 중인 작업 id와 마지막으로 받은 로그 id (다음 조회는 그 이후만 받습니다)
+let currentJobId = null;
+let logCursor = 0;
 
 // 로그에 메시지를 추가하는 함수
 function appendLog(message, kind = 'info', time = new Date()) {
@@ -195,7 +198,7 @@ startBtn.addEventListener('click', async () => {
 
     // 백엔드 호출
     try {
-        const resp = await fetch(`${serverUrl.replace(/\/$/, '')}/start`, {
+        const resp = await fetch(`${serverUrl.replace(/\/$/, '')}/jobs`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({
@@ -218,6 +221,8 @@ startBtn.addEventListener('click', async () => {
             return;
         }
         appendLog('자동화를 시작했습니다. 상태를 모니터링합니다...','info');
+        currentJobId = data.jobId;
+        logCursor = 0;
         startStatusPolling(serverUrl);
     } catch (e) {
         appendLog('백엔드 연결 실패: ' + (e?.message || e),'error');
@@ -244,7 +249,8 @@ function stopMacro(reason) {
 async function stopFromServer() {
     const serverUrl = (document.getElementById('serverUrl').value || '').trim() || 'http://localhost:3000';
     try {
-        const resp = await fetch(`${serverUrl.replace(/\/$/, '')}/stop`, { method: 'POST' });
+        const path = currentJobId ? `/jobs/${encodeURIComponent(currentJobId)}/stop` : '/stop';
+        const resp = await fetch(`${serverUrl.replace(/\/$/, '')}${path}`, { method: 'POST' });
         const data = await resp.json().catch(() => ({}));
         if (!resp.ok || !data.ok) {
             appendLog('중지 요청 실패: ' + (data.message || resp.statusText),'error');
@@ -261,11 +267,17 @@ async function stopFromServer() {
 function startStatusPolling(serverUrl) {
     if (intervalId) clearInterval(intervalId);
     const base = serverUrl.replace(/\/$/, '');
+    const jobPath = `/jobs/${encodeURIComponent(currentJobId)}/logs`;
+    let inFlight = false;
     intervalId = setInterval(async () => {
+        // 응답이 늦을 때 같은 커서로 겹쳐 요청하면 로그가 두 번 붙습니다.
+        if (inFlight) return;
+        inFlight = true;
         try {
-            const resp = await fetch(`${base}/status`);
+            const resp = await fetch(`${base}${jobPath}?after=${logCursor}`);
             const data = await resp.json();
             if (Array.isArray(data.logs)) renderServerLogs(data.logs);
+            if (typeof data.cursor === 'number') logCursor = data.cursor;
             if (!data.running) {
                 clearInterval(intervalId);
                 intervalId = null;
@@ -283,23 +295,21 @@ function startStatusPolling(serverUrl) {
             }
         } catch (e) {
             appendLog('상태 조회 실패: ' + (e?.message || e),'error');
+        } finally {
+            inFlight = false;
         }
     }, 2000);
 }
 
 // 서버 로그를 사용자 친화적으로 변환하여 렌더링
-function renderServerLogs(lines) {
-    // 기존 로그 비우고 다시 렌더링(간단 명료)
-    logEl.innerHTML = '';
-    for (const line of lines) {
-        // 형식: [ISO] 메시지
-        const m = line.match(/^\[(.*?)\]\s*(.*)$/);
-        const when = m ? new Date(m[1]) : new Date();
-        let msg = m ? m[2] : line;
+function renderServerLogs(entries) {
+    // 새로 받은 로그만 뒤에 붙입니다. 형식: { id, t, kind, msg }
+    for (const entry of entries) {
         // 사용자에게 불필요한 결과 JSON은 제거
-        msg = msg.replace(/\s*\{[^}]*\}\s*$/, '');
+        const msg = String(entry.msg || '').replace(/\s*\{[^}]*\}\s*$/, '');
         const { text, kind } = humanizeMessage(msg);
-        appendLog(text, kind, when);
+        // 서버가 info보다 강한 종류를 붙였으면 그쪽을 따릅니다.
+        appendLog(text, entry.kind && entry.kind !== 'info' ? entry.kind : kind, entry.t ? new Date(entry.t) : new Date());
     }
 }
 
@@ -310,7 +320,8 @@ function humanizeMessage(msg) {
     if (msg.includes('열차 조회 페이지로 이동')) return { text: '열차 조회 페이지로 이동 중이에요.', kind: 'info' };
     if (msg.includes('조건 입력 완료')) return { text: '조회 조건을 입력했고 결과를 확인하고 있어요.', kind: 'info' };
     if (msg.match(/재조회\s+\d+회/)) return { text: msg.replace('재조회', '재조회 진행'), kind: 'info' };
-    if (msg.match(/행\s+\d+:\s*예약하기 시도/)) return { text: msg.replace('행', '').replace(': 예약하기 시도', '번째 열차 예약을 시도했어요.'), kind: 'info' };
+    const tryMatch = msg.match(/행\s+(\d+)(?:\s+(\S+))?:\s*예약하기 시도/);
+    if (tryMatch) return { text: `${tryMatch[1]}번째 열차${tryMatch[2] ? ` ${tryMatch[2]}` : ''} 예약을 시도했어요.`, kind: 'info' };
     if (msg.includes('예약 성공! 결제 화면으로 이동했습니다')) return { text: '예약에 성공했어요! 결제 화면으로 이동했습니다.', kind: 'success' };
     if (msg.includes('조회 결과가 없습니다')) return { text: '아직 조회 결과가 없어요. 잠시 후 다시 확인해요.', kind: 'warn' };
     if (msg.includes('자리 없음')) return { text: '해당 열차는 현재 자리가 없어요. 다시 시도 중...', kind: 'warn' };
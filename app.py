@@ -1,48 +1,34 @@
 import threading
 import time
-import random
+import uuid
+from collections import deque
 from datetime import datetime, date, time as dtime
 
 import streamlit as st
 from streamlit.components.v1 import html as st_html
-import json, urllib.request
+import json
 
-# Selenium imports
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait, Select
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException, UnexpectedAlertPresentException
-
-# Driver manager (auto download chromedriver)
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.chrome.options import Options as ChromeOptions
-try:
-    # webdriver_manager is convenient locally; on some hosted platforms it may be restricted
-    from webdriver_manager.chrome import ChromeDriverManager
-    _HAS_WDM = True
-except Exception:
-    _HAS_WDM = False
+from seatbuddy import orchestrator
+from seatbuddy.metrics import JobMetrics
+from seatbuddy.profiles import get_profile_manager
+from seatbuddy.reaper import get_registry
+from seatbuddy.schedule import parse_start_at
+from seatbuddy.store import get_store
+from seatbuddy.waits import CancelEvent
 
 
 st.set_page_config(page_title="SRT 자동 예매 매크로", layout="wide")
 
 
-URLS = {
-    "login": "https://etk.srail.co.kr/cmc/01/selectLoginForm.do",
-    "search": "https://etk.srail.kr/hpg/hra/01/selectScheduleList.do",
-}
-
-
 def _ts():
     return datetime.now().strftime("%H:%M:%S")
 
 
 class LogBuffer:
-    def __init__(self):
+    # Only the tail is kept in memory; the full log of a job lives in the store
+    def __init__(self, max_items: int = 1000):
         self._lock = threading.Lock()
-        self._items = []
+        self._items = deque(maxlen=max_items)
 
     def add(self, msg: str, kind: str = "info"):
         with self._lock:
@@ -50,7 +36,7 @@ class LogBuffer:
 
     def snapshot(self, max_items: int = 300):
         with self._lock:
-            return list(self._items[-max_items:])
+            return list(self._items)[-max_items:]
 
 
 def add_log(msg: str, kind: str = "info"):
@@ -61,6 +47,14 @@ def add_log(msg: str, kind: str = "info"):
     buf.add(msg, kind)
 
 
+def _valid_start_at(text: str) -> bool:
+    try:
+        parse_start_at(text.strip())
+    except ValueError:
+        return False
+    return True
+
+
 # --- Notification helpers (UI-side and backend sends) ---
 def _ui_beep():
     # Play a short beep using AudioContext to avoid hosting media files
@@ -108,17 +102,6 @@ def _ui_desktop_notify(title: str, body: str):
     )
 
 
-def _send_webhook(url: str, payload: dict, log=lambda *a, **k: None):
-    try:
-        data = json.dumps(payload).encode('utf-8')
-        req = urllib.request.Request(url, data=data, headers={'Content-Type':'application/json'}, method='POST')
-        with urllib.request.urlopen(req, timeout=5) as resp:
-            _ = resp.read()
-        log("웹훅 전송 완료", "success")
-    except Exception as e:
-        log(f"웹훅 전송 실패: {e}", "warn")
-
-
 # removed email sending to keep setup simple
 
 
@@ -127,675 +110,17 @@ def is_cancelled():
     return ev.is_set() if ev else False
 
 
-def setup_chrome(headless: bool, debug_port: int | None = None) -> webdriver.Chrome:
-    opts = ChromeOptions()
-    if headless:
-        # Prefer new headless; container fallbacks handled below
-        opts.add_argument("--headless=new")
-        # Needed to avoid DevToolsActivePort errors in containers; use unique port in parallel
-        if debug_port is None:
-            try:
-                # base 9222 + small random offset
-                debug_port = 9222 + random.randint(0, 399)
-            except Exception:
-                debug_port = 9222
-        opts.add_argument(f"--remote-debugging-port={int(debug_port)}")
-    opts.add_argument("--disable-gpu")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument("--disable-dev-shm-usage")
-    opts.add_argument("--window-size=1280,1000")
-    opts.add_argument("--disable-extensions")
-    opts.add_argument("--disable-software-rasterizer")
-    opts.add_argument("--no-first-run")
-    opts.add_argument("--no-default-browser-check")
-    opts.add_argument("--hide-scrollbars")
-    # Improve site compatibility in container/headless
-    try:
-        # Make language clearly Korean to avoid alternate layouts
-        opts.add_argument("--lang=ko-KR")
-        opts.add_experimental_option("prefs", {"intl.accept_languages": "ko-KR,ko"})
-        # Slightly reduce automation fingerprints
-        opts.add_experimental_option("excludeSwitches", ["enable-automation"])  # remove webdriver banner
-        opts.add_experimental_option("useAutomationExtension", False)
-    except Exception:
-        pass
-    # Some environments require explicit binary path via CHROME_BIN
-    import os, tempfile
-    chrome_bin = os.environ.get("CHROME_BIN")
-    if not chrome_bin:
-        for cand in ("/usr/bin/chromium", "/usr/bin/chromium-browser", "/usr/bin/google-chrome"):
-            if os.path.exists(cand):
-                chrome_bin = cand
-                break
-    if chrome_bin:
-        opts.binary_location = chrome_bin
-
-    # Use an isolated, writable user data dir in containers
-    user_data_dir = os.environ.get("CHROME_USER_DATA_DIR") or tempfile.mkdtemp(prefix="chrome-data-")
-    opts.add_argument(f"--user-data-dir={user_data_dir}")
-
-    # Prefer system-installed chromedriver if present (Streamlit Cloud via packages.txt)
-    system_driver = None
-    for cand in ("/usr/bin/chromedriver", "/usr/lib/chromium/chromedriver"):
-        if os.path.exists(cand):
-            system_driver = cand
-            break
-
-    def _build_with(service_path: str | None):
-        if service_path:
-            return webdriver.Chrome(service=ChromeService(service_path), options=opts)
-        return webdriver.Chrome(options=opts)
-
-    last_err = None
-    for service_path in [system_driver, None if not _HAS_WDM else ChromeDriverManager().install(), None]:
-        try:
-            driver = _build_with(service_path)
-            break
-        except WebDriverException as e:
-            last_err = e
-            # Retry once with legacy headless if new headless fails to start Chrome
-            msg = str(e)
-            if "DevToolsActivePort" in msg or "failed to start" in msg:
-                try:
-                    # Switch to legacy headless flag and retry
-                    try:
-                        opts.arguments.remove("--headless=new")
-                    except ValueError:
-                        pass
-                    opts.add_argument("--headless")
-                    driver = _build_with(service_path)
-                    break
-                except Exception as e2:
-                    last_err = e2
-                    continue
-            else:
-                continue
-    else:
-        # If loop didn't break with a driver
-        raise last_err if last_err else RuntimeError("Failed to start Chrome driver")
-
-    # Implicit wait helps with minor DOM delays
-    driver.implicitly_wait(8)
-    return driver
-
-
-def even_hour_bucket(hh: str, mm: str) -> str:
-    # Round UP to the next 2-hour boundary. Examples:
-    # 15:31 -> 16, 15:00 -> 16, 14:00 -> 14, 14:01 -> 16, 23:30 -> 24
-    try:
-        h = int(hh or 0)
-    except Exception:
-        h = 0
-    try:
-        m = int(mm or 0)
-    except Exception:
-        m = 0
-    total = max(0, min(24 * 60, h * 60 + m))
-    if total >= 24 * 60:
-        return "24"
-    # Ceil to 120-minute bucket
-    bucket_minutes = ((total + 119) // 120) * 120
-    if bucket_minutes >= 24 * 60:
-        return "24"
-    return f"{bucket_minutes // 60:02d}"
-
-
-def run_srt_automation(params: dict, log, cancelled):
-    user_id = params.get("userId")
-    password = params.get("password")
-    dep = params.get("departureStation")
-    arr = params.get("arrivalStation")
-    date_str = params.get("date")  # YYYY-MM-DD
-    time_str = params.get("time")  # HH:mm
-    num_to_check = int(params.get("numToCheck") or 3)
-    mode = params.get("mode") or "reserve"  # reserve | waitlist
-    headless = bool(params.get("headless"))
-    try:
-        speed_level = int(params.get("refreshSpeed") or 1)
-    except Exception:
-        speed_level = 1
-    speed_level = max(1, min(10, speed_level))
-    s = (speed_level - 1) / 9.0  # 0.0..1.0
-
-    def _lerp(a: float, b: float, t: float) -> float:
-        try:
-            return float(a) + (float(b) - float(a)) * float(t)
-        except Exception:
-            return b
-    seat_pref = params.get("seatPref") or "both"  # economy | first | both
-    seat_order = params.get("seatOrder") or "prefer_first"  # for both: prefer_first | prefer_economy
-
-    yyyymmdd = (date_str or "").replace("-", "")
-    hh, mm = (time_str or "").split(":") if time_str else ("", "00")
-
-    driver = None
-    try:
-        log("로그인 페이지로 이동...", "info")
-        worker_idx = int(params.get("workerIndex") or 0)
-        # Assign a unique remote debugging port per worker to avoid collisions
-        debug_port = 9222 + (worker_idx % 400)
-        driver = setup_chrome(headless=headless, debug_port=debug_port)
-        driver.get(URLS["login"]) 
-
-        # Login with one retry on spurious alert
-        for attempt in range(2):
-            # Fill and submit
-            try:
-                driver.find_element(By.ID, "srchDvNm01").clear()
-            except Exception:
-                pass
-            driver.find_element(By.ID, "srchDvNm01").send_keys(user_id)
-            driver.find_element(By.ID, "hmpgPwdCphd01").send_keys(password)
-            driver.find_element(By.CSS_SELECTOR, "input.loginSubmit").click()
-            # Immediately handle possible login alert (ex: 존재하지않는 회원입니다)
-            try:
-                WebDriverWait(driver, 2.5).until(EC.alert_is_present())
-                alert = driver.switch_to.alert
-                txt = alert.text
-                log(f"로그인 알림: {txt}", "warn")
-                alert.accept()
-                # If known spurious message, retry once
-                if attempt == 0 and ("존재하지않는 회원" in txt or "회원" in txt):
-                    time.sleep(0.4 + random.uniform(0,0.3))
-                    continue
-                raise RuntimeError(f"로그인 실패: {txt}")
-            except TimeoutException:
-                break
-            except UnexpectedAlertPresentException:
-                try:
-                    alert = driver.switch_to.alert
-                    txt = alert.text
-                    log(f"로그인 알림: {txt}", "warn")
-                    alert.accept()
-                    if attempt == 0 and ("존재하지않는 회원" in txt or "회원" in txt):
-                        time.sleep(0.4 + random.uniform(0,0.3))
-                        continue
-                    raise RuntimeError(f"로그인 실패: {txt}")
-                except Exception:
-                    raise RuntimeError("로그인 중 알림 처리 실패")
-        time.sleep(0.6)
-
-        if cancelled():
-            raise RuntimeError("사용자 중지")
-
-        log("열차 조회 페이지로 이동...", "info")
-        try:
-            driver.get(URLS["search"]) 
-        except UnexpectedAlertPresentException:
-            try:
-                alert = driver.switch_to.alert
-                txt = alert.text
-                log(f"페이지 이동 중 알림: {txt}", "warn")
-                alert.accept()
-                raise RuntimeError(f"로그인/접속 제한: {txt}")
-            except Exception:
-                raise
-
-        # Fill conditions
-        dep_el = driver.find_element(By.ID, "dptRsStnCdNm")
-        dep_el.clear(); dep_el.send_keys(dep)
-
-        arr_el = driver.find_element(By.ID, "arvRsStnCdNm")
-        arr_el.clear(); arr_el.send_keys(arr)
-
-        # Date select by value (YYYYMMDD)
-        try:
-            sel_date = Select(driver.find_element(By.ID, "dptDt"))
-            sel_date.select_by_value(yyyymmdd)
-        except Exception:
-            # Fallback: use JS to set value if Select fails
-            el = driver.find_element(By.ID, "dptDt")
-            driver.execute_script(
-                "const v=arguments[1]; const el=arguments[0]; const opt=[...el.options].find(o=>o.value===v); if(opt){el.value=opt.value; el.dispatchEvent(new Event('change',{bubbles:true}));}",
-                el, yyyymmdd,
-            )
-
-        # Time select: parse all options and choose the nearest at-or-after target
-        selected_text = None
-        try:
-            import re
-            def parse_minutes(text: str) -> int:
-                try:
-                    m = re.search(r"(\d{1,2}):(\d{2})", text or "")
-                    if m:
-                        H = int(m.group(1)); M = int(m.group(2))
-                        if H >= 24:
-                            return 24*60
-                        return max(0, min(24*60, H*60 + M))
-                except Exception:
-                    pass
-                return -1
-
-            def value_minutes(val: str) -> int:
-                s = (val or "").strip()
-                try:
-                    if len(s) >= 4 and s[:4].isdigit():
-                        H = int(s[:2]); M = int(s[2:4])
-                        if H >= 24:
-                            return 24*60
-                        return max(0, min(24*60, H*60 + M))
-                    if len(s) == 2 and s.isdigit():
-                        H = int(s)
-                        if H >= 24:
-                            return 24*60
-                        return H*60
-                except Exception:
-                    pass
-                return -1
-
-            def pick_option(select_el: Select, opts):
-                # target minutes from user input
-                try:
-                    th = int(hh or 0); tm = int(mm or 0)
-                except Exception:
-                    th, tm = 0, 0
-                target_min = max(0, min(24*60, th*60 + tm))
-                # Build candidates list
-                cands = []
-                for o in opts:
-                    tmin = parse_minutes((o.text or "").strip())
-                    if tmin < 0:
-                        tmin = value_minutes(o.get_attribute("value") or "")
-                    if tmin >= 0:
-                        cands.append((tmin, o))
-                if not cands:
-                    return None
-                cands.sort(key=lambda x: x[0])
-                # Prefer exact match
-                for tmin, o in cands:
-                    if tmin == target_min:
-                        try:
-                            select_el.select_by_visible_text(o.text)
-                        except Exception:
-                            select_el.select_by_value(o.get_attribute("value") or "")
-                        return (tmin, o)
-                # Else choose first option >= target
-                for tmin, o in cands:
-                    if tmin >= target_min:
-                        try:
-                            select_el.select_by_visible_text(o.text)
-                        except Exception:
-                            select_el.select_by_value(o.get_attribute("value") or "")
-                        return (tmin, o)
-                # Else choose the latest available
-                tmin, o = cands[-1]
-                try:
-                    select_el.select_by_visible_text(o.text)
-                except Exception:
-                    select_el.select_by_value(o.get_attribute("value") or "")
-                return (tmin, o)
-
-            sel_time = Select(driver.find_element(By.ID, "dptTm"))
-            picked = pick_option(sel_time, sel_time.options)
-            if picked:
-                tmin, o = picked
-                selected_text = (o.text or "").strip() or (o.get_attribute("value") or "")
-        except Exception as e:
-            log(f"시간 선택 오류: {e}", "warn")
-
-        if selected_text:
-            log(f"요청 시간 {hh}:{mm} → 적용 시간 {selected_text}")
-        else:
-            log(f"시간 옵션 선택 실패: {hh}:{mm}. 기본값으로 진행합니다.")
-
-        # Prefer SRT-only filter if available (user-reported layout)
-        srt_filter_selected = False
-        try:
-            applied = False
-            # 1) Try the provided absolute XPath first
-            try:
-                srt_radio = driver.find_element(By.XPATH, "/html/body/div[1]/div[4]/div/div[2]/form/fieldset/div[1]/div/ul/li[4]/div[2]/input[2]")
-                driver.execute_script("arguments[0].click();", srt_radio)
-                applied = True
-            except Exception:
-                pass
-            # 2) Fallback: pick the 2nd input under the same li area
-            if not applied:
-                try:
-                    radios = driver.find_elements(By.XPATH, "//form//fieldset//li[4]//div[2]//input[@type='radio' or @type='checkbox']")
-                    if len(radios) >= 2:
-                        driver.execute_script("arguments[0].click();", radios[1])
-                        applied = True
-                except Exception:
-                    pass
-            # 3) Fallback by attribute search
-            if not applied:
-                try:
-                    radios = driver.find_elements(By.CSS_SELECTOR, "input[type=radio], input[type=checkbox]")
-                    for r in radios:
-                        v = ((r.get_attribute("value") or "") + " " + (r.get_attribute("id") or "") + " " + (r.get_attribute("name") or "")).upper()
-                        if "SRT" in v:
-                            driver.execute_script("arguments[0].click();", r)
-                            applied = True
-                            break
-                except Exception:
-                    pass
-            if applied:
-                log("열차종별: SRT만 선택했습니다.")
-                srt_filter_selected = True
-        except Exception as e:
-            log(f"SRT 필터 선택 실패: {e}", "warn")
-
-        log("조건 입력 완료. 조회합니다...", "info")
-        try:
-            query_btn = driver.find_element(By.XPATH, "//input[@value='조회하기']")
-            driver.execute_script('arguments[0].click();', query_btn)
-        except Exception:
-            pass
-
-        # Main polling loop
-        refresh_count = 0
-        # Some site variants don't render clear 'SRT' text/logo in col1. If we already applied
-        # the SRT-only filter in the search form, skip row-level SRT detection to avoid confusion.
-        srt_filter_enabled = not srt_filter_selected
-
-        # For the polling loop, keep implicit wait low; interpolate with speed
-        loop_iw = _lerp(0.3, 0.1, s)
-        driver.implicitly_wait(loop_iw)
-
-        # Detect column indices once, then reuse to avoid per-iteration overhead
-        cols_resolved = False
-        gen_col_idx, fst_col_idx, wait_col_idx = 7, 6, 8
-        while True:
-            if cancelled():
-                raise RuntimeError("사용자 중지")
-
-            # Fetch result rows
-            table_sel = "#result-form > fieldset > div.tbl_wrap.th_thead > table"
-            rows = driver.find_elements(By.CSS_SELECTOR, f"{table_sel} > tbody > tr")
-            if len(rows) == 0:
-                log("조회 결과가 없습니다. 계속 재조회합니다.")
-
-            # Determine column indices dynamically from header, with fallbacks (once)
-            if not cols_resolved:
-                try:
-                    headers = driver.find_elements(By.CSS_SELECTOR, f"{table_sel} thead th")
-                    if headers:
-                        def find_idx(keywords: list[str], default: int) -> int:
-                            for idx, th in enumerate(headers, start=1):
-                                t = (th.text or "").strip()
-                                for kw in keywords:
-                                    if kw in t:
-                                        return idx
-                            return default
-                        gen_col_idx = find_idx(["일반석", "일반실", "일반"], gen_col_idx)
-                        fst_col_idx = find_idx(["특실", "특"], fst_col_idx)
-                        wait_col_idx = find_idx(["예약대기", "대기"], wait_col_idx)
-                        # Guard against ambiguous mapping (e.g., merged headers) or out-of-range
-                        num_cols = len(headers)
-                        if gen_col_idx == fst_col_idx or gen_col_idx < 1 or fst_col_idx < 1 or gen_col_idx > num_cols or fst_col_idx > num_cols:
-                            gen_col_idx, fst_col_idx = 7, 6
-                            log("열 헤더 모호/이상: 기본 매핑 사용(일반=7, 특실=6)")
-                        else:
-                            log(f"탐지된 열: 일반={gen_col_idx}, 특실={fst_col_idx}, 대기={wait_col_idx}")
-                    cols_resolved = True
-                except Exception:
-                    cols_resolved = True  # Avoid repeated attempts that can be costly
-
-            # Only consider SRT rows; skip Korail/KTX so the count is meaningful
-            checked = 0
-            row_idx = 1
-            max_rows = len(rows)
-            srt_rows_detected = 0
-            any_attempted = False
-            while checked < num_to_check and row_idx <= max_rows:
-                if cancelled():
-                    raise RuntimeError("사용자 중지")
-                wait_text = ""
-
-                # Filter: keep only SRT trains (fallback to all if detection unreliable)
-                is_srt = True
-                if srt_filter_enabled:
-                    try:
-                        row_el = rows[row_idx - 1]
-                        tds = row_el.find_elements(By.CSS_SELECTOR, "td")
-                        t1txt = (tds[0].text if len(tds) > 0 else "").strip().upper()
-                        if not t1txt:
-                            try:
-                                img = tds[0].find_element(By.CSS_SELECTOR, "img")
-                                t1txt = (img.get_attribute("alt") or "").strip().upper()
-                            except Exception:
-                                t1txt = ""
-                        # Some layouts may show 'SR' logo text instead of 'SRT'
-                        is_srt = ("SRT" in t1txt) or (t1txt == "SR")
-                    except Exception:
-                        is_srt = False
-
-                    if not is_srt:
-                        # Skip non-SRT rows (e.g., Korail/KTX)
-                        row_idx += 1
-                        continue
-                    else:
-                        srt_rows_detected += 1
-
-                # Read commonly used cells; actual seat type layout may vary across site versions
-                try:
-                    # Use detected wait column
-                    row_el = rows[row_idx - 1]
-                    tds = row_el.find_elements(By.CSS_SELECTOR, "td")
-                    if len(tds) >= wait_col_idx:
-                        wait_text = tds[wait_col_idx - 1].text
-                    else:
-                        raise Exception("열 개수 부족")
-                except Exception:
-                    row_idx += 1
-                    continue
-
-                if mode != "waitlist":
-                    # Try reservation based on seat preference. We attempt multiple columns conservatively.
-                    # Heuristic mapping: col7(일반) and possibly col6(특실) on some layouts. Retain col7 as default.
-                    candidates: list[tuple[int, str]] = []
-                    if seat_pref == "economy":
-                        # Strict: only 일반석 열 클릭
-                        candidates = [(gen_col_idx, "일반석")]
-                    elif seat_pref == "first":
-                        # Strict: only 특실 열 클릭
-                        candidates = [(fst_col_idx, "특실")]
-                    else:  # both
-                        # Order determined by seat_order
-                        candidates = []
-                        if seat_order == "prefer_first":
-                            candidates.append((fst_col_idx, "특실"))
-                            if fst_col_idx != gen_col_idx:
-                                candidates.append((gen_col_idx, "일반석"))
-                        else:  # prefer_economy
-                            candidates.append((gen_col_idx, "일반석"))
-                            if fst_col_idx != gen_col_idx:
-                                candidates.append((fst_col_idx, "특실"))
-
-                    for col_idx, label in candidates:
-                        try:
-                            row_el = rows[row_idx - 1]
-                            tds = row_el.find_elements(By.CSS_SELECTOR, "td")
-                            if len(tds) < col_idx:
-                                continue
-                            td = tds[col_idx - 1]
-                            txt = (td.text or "").strip()
-                            # Some variants render only icon buttons; detect via attributes as well
-                            has_reserve = False
-                            if "예약하기" in txt:
-                                has_reserve = True
-                            else:
-                                try:
-                                    a_try = td.find_element(By.CSS_SELECTOR, "a, button, input[type=button]")
-                                    a_title = (a_try.get_attribute("title") or "") + " " + (a_try.get_attribute("aria-label") or "")
-                                    if "예약" in a_title:
-                                        has_reserve = True
-                                except Exception:
-                                    try:
-                                        img_try = td.find_element(By.CSS_SELECTOR, "img")
-                                        alt = (img_try.get_attribute("alt") or "")
-                                        if "예약" in alt:
-                                            has_reserve = True
-                                    except Exception:
-                                        pass
-                            if has_reserve:
-                                log(f"행 {row_idx} {label}: 예약하기 시도")
-                                # Prefer a/button; fall back to ENTER. If not found, try user-reported absolute XPath pattern.
-                                a = None
-                                clicked = False
-                                try:
-                                    a = td.find_element(By.CSS_SELECTOR, "a, button, input[type=button]")
-                                except Exception:
-                                    a = None
-                                # Capture current windows to detect popup/new tab behavior
-                                try:
-                                    prev_handles = set(driver.window_handles)
-                                except Exception:
-                                    prev_handles = None
-                                try:
-                                    if a is not None:
-                                        a.click(); clicked = True
-                                    else:
-                                        td.send_keys(Keys.ENTER); clicked = True
-                                except Exception:
-                                    pass
-
-                                # Fallback with absolute XPath (user-reported structure)
-                                if not clicked:
-                                    try:
-                                        # Map our desired seat column to absolute td index (특실=6, 일반=7) if plausible
-                                        abs_td_idx = 6 if label.startswith("특실") else 7
-                                        abs_xpath = f"/html/body/div[1]/div[4]/div/div[3]/div[1]/form/fieldset/div[6]/table/tbody/tr[{row_idx}]/td[{abs_td_idx}]//a | /html/body/div[1]/div[4]/div/div[3]/div[1]/form/fieldset/div[6]/table/tbody/tr[{row_idx}]/td[{abs_td_idx}]//button | /html/body/div[1]/div[4]/div/div[3]/div[1]/form/fieldset/div[6]/table/tbody/tr[{row_idx}]/td[{abs_td_idx}]//input[@type='button']"
-                                        el = driver.find_element(By.XPATH, abs_xpath)
-                                        driver.execute_script("arguments[0].click();", el)
-                                        clicked = True
-                                        log(f"절대 XPath로 클릭 시도: td[{abs_td_idx}] (row {row_idx})")
-                                    except Exception:
-                                        pass
-
-                                any_attempted = any_attempted or clicked
-                                # Accept alert if exists
-                                try:
-                                    WebDriverWait(driver, 1.5).until(EC.alert_is_present())
-                                    alert = driver.switch_to.alert
-                                    log(f"알림창: {alert.text}")
-                                    alert.accept()
-                                except Exception:
-                                    pass
-
-                                # If a new window/tab opened, switch to it for result check
-                                switched = False
-                                try:
-                                    if prev_handles is not None:
-                                        WebDriverWait(driver, _lerp(3.0, 2.0, s)).until(
-                                            lambda d: len(d.window_handles) > len(prev_handles)
-                                        )
-                                        curr_handles = set(driver.window_handles)
-                                        new_handles = list(curr_handles - prev_handles)
-                                        if new_handles:
-                                            driver.switch_to.window(new_handles[0])
-                                            switched = True
-                                except Exception:
-                                    pass
-
-                                driver.implicitly_wait(loop_iw)
-                                ok = len(driver.find_elements(By.ID, "isFalseGotoMain")) > 0
-                                if ok:
-                                    log("예약 성공! 결제 화면으로 이동했습니다.", "success")
-                                    return {"ok": True, "type": "reserve", "seatPref": seat_pref}
-                                log("자리 없음/실패. 결과 페이지로 되돌아갑니다.")
-                                # Clean up: if we switched to a new window, close it and go back to the original
-                                try:
-                                    if switched:
-                                        driver.close()
-                                        # Switch back to the first handle available
-                                        for h in driver.window_handles:
-                                            driver.switch_to.window(h)
-                                            break
-                                    else:
-                                        driver.back()
-                                except Exception:
-                                    pass
-                                driver.implicitly_wait(loop_iw)
-                                # If tried one column and failed, try next candidate
-                        except Exception:
-                            continue
-
-                elif mode == "waitlist":
-                    has_apply = "신청하기" in (wait_text or "")
-                    if not has_apply:
-                        try:
-                            td8 = driver.find_element(By.CSS_SELECTOR, f"{table_sel} > tbody > tr:nth-child({row_idx}) > td:nth-child({wait_col_idx})")
-                            a8 = td8.find_element(By.CSS_SELECTOR, "a, button, input[type=button], img")
-                            label8 = ((a8.get_attribute("title") or "") + " " + (a8.get_attribute("aria-label") or "") + " " + (a8.get_attribute("alt") or "")).strip()
-                            if "신청" in label8:
-                                has_apply = True
-                        except Exception:
-                            pass
-                    if has_apply:
-                        log(f"행 {row_idx}: 예약대기 신청 시도")
-                        try:
-                            row_el = rows[row_idx - 1]
-                            tds = row_el.find_elements(By.CSS_SELECTOR, "td")
-                            tdw = tds[wait_col_idx - 1] if len(tds) >= wait_col_idx else row_el
-                            a = tdw.find_element(By.CSS_SELECTOR, "a, button, input[type=button], img")
-                            try:
-                                a.click()
-                            except Exception:
-                                a.send_keys(Keys.ENTER)
-                            any_attempted = True
-                            log("예약대기 신청 성공!", "success")
-                            return {"ok": True, "type": "waitlist"}
-                        except Exception as e:
-                            log(f"예약대기 시도 중 오류: {e}", "error")
-
-                # Count only SRT rows processed
-                checked += 1
-                row_idx += 1
-
-            # If we couldn't positively detect any SRT rows this page, disable the filter
-            if srt_filter_enabled and srt_rows_detected == 0 and max_rows > 0:
-                srt_filter_enabled = False
-                # If the SRT filter was selected earlier, this detection failure is expected.
-                # Use an info message instead of a warning only when no filter was applied.
-                if srt_filter_selected:
-                    log("행 레이블에 SRT 표기가 없어 전체 행을 검사합니다.")
-                else:
-                    log("SRT 구분 불가: 모든 열차 행을 검사로 전환합니다.", "warn")
-
-            # Refresh query
-            refresh_count += 1
-            log(f"재조회 {refresh_count}회")
-            try:
-                refresh_btn = driver.find_element(By.XPATH, "//input[@value='조회하기']")
-                driver.execute_script('arguments[0].click();', refresh_btn)
-            except Exception:
-                pass
-            # Sleep pacing: interpolate between conservative and aggressive by speed
-            if max_rows == 0:
-                base = _lerp(2.0, 0.08, s); jitter = _lerp(1.5, 0.07, s)
-            elif not any_attempted:
-                base = _lerp(2.0, 0.18, s); jitter = _lerp(1.5, 0.25, s)
-            else:
-                base = _lerp(2.0, 0.70, s); jitter = _lerp(1.5, 0.50, s)
-            time.sleep(base + random.uniform(0.0, jitter))
-
-    except RuntimeError as e:
-        log(f"오류 발생: {e}", "error")
-        return {"ok": False, "error": str(e)}
-    except WebDriverException as e:
-        log(f"웹드라이버 오류: {e}", "error")
-        return {"ok": False, "error": str(e)}
-    except Exception as e:
-        log(f"예상치 못한 오류: {e}", "error")
-        return {"ok": False, "error": str(e)}
-    finally:
-        try:
-            if driver is not None:
-                driver.quit()
-        except Exception:
-            pass
-    # If loop exits without explicit return
-    return {"ok": False, "error": "정상 종료되지 않았습니다."}
-
-
 def ensure_state():
+    # First call per process sweeps browsers and profiles left by a previous run
+    get_registry()
+    get_profile_manager()
     ss = st.session_state
     ss.setdefault("running", False)
     ss.setdefault("result", None)
-    ss.setdefault("thread", None)
-    ss.setdefault("cancel_event", threading.Event())
+    ss.setdefault("job_future", None)
+    ss.setdefault("job_id", None)
+    ss.setdefault("cancel_event", CancelEvent())
+    ss.setdefault("job_metrics", JobMetrics())
     ss.setdefault("log_buffer", LogBuffer())
     ss.setdefault("result_holder", {"value": None})
     ss.setdefault("notified", False)
@@ -803,8 +128,10 @@ def ensure_state():
         "sound": True,
         "desktop": False,
         "webhook_url": "",
+        "webhook_progress": False,
     })
-    ss.setdefault("route_templates", [])
+    if "route_templates" not in ss:
+        ss.route_templates = get_store().templates()
 
 
 def stop_job():
@@ -820,7 +147,8 @@ def start_job(params: dict):
     # Reset state
     st.session_state.log_buffer = LogBuffer()
     st.session_state.result = None
-    st.session_state.cancel_event = threading.Event()
+    st.session_state.cancel_event = CancelEvent()
+    st.session_state.job_metrics = JobMetrics()
     st.session_state.running = True
     # fresh result holder (shared plain dict)
     result_holder = {"value": None}
@@ -831,69 +159,15 @@ def start_job(params: dict):
     # Capture references in main thread to avoid touching st.* inside worker
     cancel_ev = st.session_state.cancel_event
     log_buf = st.session_state.log_buffer
+    metrics = st.session_state.job_metrics
 
-    def _worker():
-        nonlocal result_holder
-        # Handle parallel workers with staggered start to avoid simultaneous logins
-        count = int(params.get("parallelCount") or 1)
-        count = max(1, min(20, count))
-        stagger = float(params.get("parallelStaggerSec") or 0.5)
-        if not (stagger >= 0.0):
-            stagger = 0.0
-        stagger = min(5.0, max(0.0, stagger))
+    job_id = uuid.uuid4().hex[:12]
+    st.session_state.job_id = job_id
 
-        # Shared state for inner workers
-        best_result = {"value": None}
-
-        def make_logger(idx: int):
-            def _log(msg: str, kind: str = "info"):
-                prefix = f"[{idx}] " if idx is not None else ""
-                try:
-                    log_buf.add(f"[{idx}] {msg}", kind)
-                except Exception:
-                    log_buf.add(f"{prefix}{msg}", kind)
-            return _log
-
-        def one_worker(idx: int):
-            # Stagger login time: 2s per index + small jitter
-            try:
-                delay = idx * stagger + random.uniform(0.0, 0.2)
-                time.sleep(delay)
-            except Exception:
-                pass
-            # Wrap logger with worker id prefix
-            wlog = make_logger(idx)
-            # If cancelled already (another worker succeeded or user stopped), exit early
-            if cancel_ev.is_set():
-                return
-            # copy params and annotate worker index
-            p = dict(params)
-            p["workerIndex"] = idx
-            res = run_srt_automation(p, wlog, cancel_ev.is_set)
-            if res and res.get("ok") and not cancel_ev.is_set():
-                # Winner: set cancel to stop others
-                cancel_ev.set()
-                best_result["value"] = res
-
-        if count == 1:
-            # Single worker path (preserve previous behavior)
-            res = run_srt_automation(params, log_buf.add, cancel_ev.is_set)
-            best_result["value"] = res
-        else:
-            log_buf.add(f"병렬 매크로 {count}개를 시작합니다. (로그인 간격 {stagger:.2f}s)")
-            threads = []
-            for idx in range(count):
-                t = threading.Thread(target=one_worker, args=(idx,), daemon=True)
-                threads.append(t)
-                t.start()
-            # Wait until all done or cancelled
-            for t in threads:
-                try:
-                    t.join()
-                except Exception:
-                    pass
-
-        result = best_result["value"]
+    async def _job():
+        # Workers run as tasks on the shared orchestrator loop; browser commands use its
+        # bounded driver pool instead of one OS thread per worker.
+        result = await orchestrator.run_job(params, log_buf.add, cancel_ev, job_id, metrics, store=get_store())
         # Emit final message based on result
         if result and result.get("ok"):
             if result.get("type") == "waitlist":
@@ -906,9 +180,7 @@ def start_job(params: dict):
         # Save result for the UI to read (on main thread later)
         result_holder["value"] = result
 
-    th = threading.Thread(target=_worker, daemon=True)
-    st.session_state.thread = th
-    th.start()
+    st.session_state.job_future = orchestrator.submit(_job())
 
 
 def render_logs():
@@ -963,6 +235,32 @@ def render_logs():
     st.markdown(css + f"<div class='log-wrap'>{html}</div>", unsafe_allow_html=True)
 
 
+def render_history():
+    # Past jobs survive reloads and restarts; a job whose process died shows as "중단됨"
+    state_map = {"running": "실행 중", "succeeded": "성공", "failed": "실패", "cancelled": "중지", "abandoned": "중단됨"}
+    with st.expander("최근 작업 기록"):
+        jobs = get_store().recent_jobs(limit=20)
+        if not jobs:
+            st.caption("아직 기록이 없습니다.")
+            return
+        rows = []
+        for j in jobs:
+            p = j["params"]
+            rows.append({
+                "시작": datetime.fromtimestamp(j["created"]).strftime("%m-%d %H:%M"),
+                "노선": f"{p.get('departureStation', '?')} → {p.get('arrivalStation', '?')}",
+                "열차": f"{p.get('date', '')} {p.get('time', '')}",
+                "상태": state_map.get(j["state"], j["state"]),
+                "시도": j["attempts"],
+                "작업 ID": j["id"],
+            })
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        pick = st.selectbox("로그 보기", [j["id"] for j in jobs], key="history_job")
+        if pick:
+            lines = get_store().tail_logs(pick)
+            st.code("\n".join(f"{datetime.fromtimestamp(r['ts']).strftime('%H:%M:%S')} [{r['kind']}] {r['msg']}" for r in lines) or "(로그 없음)")
+
+
 def main():
     ensure_state()
 
@@ -1019,6 +317,7 @@ def main():
                             exists = True; break
                     if not exists:
                         st.session_state.route_templates.append(tpl)
+                        get_store().save_template(tpl["name"], dep, arr)
                         st.success("템플릿을 저장했어요.")
                     else:
                         st.info("이미 동일한 템플릿이 있어요.")
@@ -1039,7 +338,8 @@ def main():
                 st.divider()
         if to_delete is not None:
             try:
-                del st.session_state.route_templates[to_delete]
+                removed = st.session_state.route_templates.pop(to_delete)
+                get_store().delete_template(removed["name"])
                 st.success("템플릿을 삭제했습니다.")
             except Exception:
                 pass
@@ -1059,11 +359,25 @@ def main():
                     "병렬 로그인 간격(초)", min_value=0.0, max_value=5.0, value=0.5, step=0.1,
                     help="여러 매크로를 동시에 실행할 때 각 로그인 시작 간격"
                 )
+                execution_mode_label = st.selectbox(
+                    "실행 방식", options=["기본", "프로세스 격리"], index=0,
+                    help="프로세스 격리: 매크로마다 별도 프로세스에서 실행해 한 브라우저의 멈춤/충돌이 다른 매크로에 영향을 주지 않아요."
+                )
+                start_at_text = st.text_input(
+                    "예약 시작 시각(선택)", value="", placeholder="07:00:00",
+                    help="좌석이 풀리는 시각. 미리 로그인·조건 입력을 마쳐 두고 SRT 서버 시계 기준으로 이 시각에 첫 조회를 보내요(한국 시간, 비우면 바로 시작)."
+                )
+                standby_count = st.number_input(
+                    "대기 브라우저 수", min_value=0, max_value=5, value=0, step=1,
+                    help="미리 로그인해 둔 예비 브라우저. 매크로의 브라우저가 멈추거나 종료되면 바로 교체해 이어서 진행해요(기본 실행 방식에서만)."
+                )
             with st.expander("알림 설정"):
                 nc = st.session_state.get("notify_config", {})
                 sound_on = st.checkbox("성공 시 소리 재생", value=bool(nc.get("sound", True)))
                 desktop_on = st.checkbox("성공 시 데스크탑 알림(브라우저 권한 필요)", value=bool(nc.get("desktop", False)))
-                webhook_url = st.text_input("웹훅 URL(선택)", value=str(nc.get("webhook_url", "")))
+                webhook_url = st.text_input("웹훅 URL(선택)", value=str(nc.get("webhook_url", "")),
+                                            help="예약 성공 시 결과를 JSON으로 POST합니다. 실패하면 잠시 후 다시 보내요.")
+                webhook_progress = st.checkbox("진행 로그도 웹훅으로 보내기(10초마다 묶어서)", value=bool(nc.get("webhook_progress", False)))
 
             c3, c4 = st.columns(2)
             with c3:
@@ -1106,12 +420,15 @@ def main():
                     st.error("아이디와 비밀번호를 입력해 주세요.")
                 elif departure == arrival:
                     st.error("출발역과 도착역이 같을 수 없습니다.")
+                elif start_at_text.strip() and not _valid_start_at(start_at_text):
+                    st.error("예약 시작 시각은 07:00:00 또는 2026-10-22 07:00:00 형식으로 입력해 주세요.")
                 else:
                     # Save notify config for later use on success
                     st.session_state.notify_config = {
                         "sound": bool(sound_on),
                         "desktop": bool(desktop_on),
                         "webhook_url": webhook_url.strip(),
+                        "webhook_progress": bool(webhook_progress),
                     }
                     params = {
                         "userId": user_id.strip(),
@@ -1127,6 +444,12 @@ def main():
                         "parallelCount": int(parallel_count),
                         "parallelStaggerSec": float(parallel_stagger_sec),
                         "refreshSpeed": int(refresh_speed),
+                        "executionMode": "process" if execution_mode_label == "프로세스 격리" else "async",
+                        "standbyCount": int(standby_count),
+                        # Sent by the job itself (seatbuddy.notify), even if this page is closed
+                        "webhookUrl": webhook_url.strip(),
+                        "webhookProgress": bool(webhook_progress),
+                        "startAt": start_at_text.strip(),
                     }
                     if seat_type_label == "둘 다":
                         params["seatOrder"] = "prefer_first" if seat_order_label == "특실 우선" else "prefer_economy"
@@ -1140,6 +463,7 @@ def main():
 
         st.subheader("로그 (서버 상태)")
         render_logs()
+        render_history()
 
     with col_side:
         st.header("안심하고 사용하세요")
@@ -1161,9 +485,12 @@ def main():
             unsafe_allow_html=True,
         )
 
-    # Watch worker lifecycle: when thread stops, mark not running
-    th = st.session_state.get("thread")
-    if th and not th.is_alive() and st.session_state.running:
+    # Watch job lifecycle: when the job future completes, mark not running
+    fut = st.session_state.get("job_future")
+    if st.session_state.running:
+        # Heartbeat: a job whose page stops rerunning is reaped as abandoned
+        get_registry().touch(st.session_state.get("job_id"))
+    if fut and fut.done() and st.session_state.running:
         st.session_state.running = False
         # bring result from holder
         holder = st.session_state.get("result_holder")
@@ -1180,12 +507,6 @@ def main():
             _ui_beep()
         if cfg.get("desktop"):
             _ui_desktop_notify(title, body)
-        # Fire-and-forget webhook in background thread
-        def _bg_send():
-            if cfg.get("webhook_url"):
-                payload = {"title": title, "body": body, "params": params, "result": result}
-                _send_webhook(cfg.get("webhook_url"), payload, add_log)
-        threading.Thread(target=_bg_send, daemon=True).start()
         st.session_state.notified = True
     # Auto refresh logs while running (avoid tight loop)
     if st.session_state.running:
@@ -0,0 +1 @@
+"""Runtime helpers shared by the Streamlit app and background workers."""
@@ -0,0 +1,387 @@
+"""HTTP API with Server-Sent Events for job logs and state.
+
+    python -m seatbuddy serve --port 8765
+
+    POST /jobs                    start a job (same JSON as the Streamlit form) -> {"jobId": ...}
+    GET  /jobs                    live and recent jobs
+    GET  /jobs/<id>               state, result and metrics of one job
+    POST /jobs/<id>/stop          cancel a job
+    GET  /jobs/<id>/events        SSE stream of "log" and "state" events
+    GET  /history?dep=&arr=[&date=]  seat reappearance statistics (see seatbuddy.history)
+
+Every event carries an ``id``. A reconnecting client sends ``Last-Event-ID`` (or
+``?lastEventId=`` on the first connect) and receives only the events after it.
+The stream ends with an ``end`` event once the job is finished and drained.
+``/start``, ``/stop``, ``/status`` and ``/events`` act on the most recent job, for
+clients written against the Node backend.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+MAX_JOBS = int(os.environ.get("SEATBUDDY_API_MAX_JOBS") or 4)
+# Events kept per job for reconnecting clients; older ones are still in the store
+MAX_EVENTS = 5000
+KEEP_FINISHED = 50
+KEEPALIVE_SEC = 15.0
+_FINISHED = ("finished", "error", "cancelled")
+
+
+class JobChannel:
+    """One job's ordered event log, shared by every stream that watches it."""
+
+    def __init__(self, job_id: str, params: dict):
+        from seatbuddy.metrics import JobMetrics
+        from seatbuddy.store import _SECRET_KEYS
+        from seatbuddy.waits import CancelEvent
+
+        self.job_id = job_id
+        self.params = {k: v for k, v in params.items() if k not in _SECRET_KEYS}
+        self.cancel = CancelEvent()
+        self.metrics = JobMetrics()
+        self.created = time.time()
+        self.state = "starting"
+        self.result = None
+        self.future = None
+        self._events: deque = deque(maxlen=MAX_EVENTS)
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in _FINISHED
+
+    @property
+    def last_id(self) -> int:
+        return self._seq
+
+    def publish(self, event: str, data: dict):
+        with self._cond:
+            self._seq += 1
+            self._events.append((self._seq, event, data))
+            self._cond.notify_all()
+
+    def log(self, msg: str, kind: str = "info"):
+        self.publish("log", {"t": datetime.now().isoformat(timespec="milliseconds"), "msg": msg, "kind": kind})
+
+    def set_state(self, state: str, result: dict | None = None):
+        self.state = state
+        self.result = result
+        self.publish("state", {"state": state, "running": not self.finished, "result": result})
+
+    def wait_events(self, after: int, timeout: float) -> list[tuple[int, str, dict]]:
+        """Events with id > ``after``; blocks up to ``timeout`` when there are none yet."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > after or self.finished, timeout)
+            return [e for e in self._events if e[0] > after]
+
+    def logs_after(self, after: int, limit: int = 500) -> list[dict]:
+        """Log events with id > ``after``, each with its id as the next cursor."""
+        with self._cond:
+            logs = [dict(d, id=seq) for seq, ev, d in self._events if seq > after and ev == "log"]
+        return logs[:limit]
+
+    def tail(self, n: int = 200) -> list[dict]:
+        with self._cond:
+            return [d for _seq, ev, d in list(self._events)[-n:] if ev == "log"]
+
+    def status(self) -> dict:
+        return {
+            "jobId": self.job_id,
+            "state": self.state,
+            "running": not self.finished,
+            "result": self.result,
+            "lastEventId": self.last_id,
+            "params": self.params,
+            "metrics": self.metrics.snapshot(),
+        }
+
+
+class JobHub:
+    def __init__(self, max_jobs: int = MAX_JOBS):
+        self.max_jobs = max_jobs
+        self._jobs: dict[str, JobChannel] = {}
+        self._lock = threading.Lock()
+
+    def get(self, job_id: str) -> JobChannel | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def latest(self) -> JobChannel | None:
+        with self._lock:
+            return max(self._jobs.values(), key=lambda c: c.created, default=None)
+
+    def list(self) -> list[dict]:
+        with self._lock:
+            chans = sorted(self._jobs.values(), key=lambda c: c.created, reverse=True)
+        return [{"jobId": c.job_id, "state": c.state, "running": not c.finished, "lastEventId": c.last_id} for c in chans]
+
+    def start(self, params: dict) -> JobChannel:
+        from seatbuddy import orchestrator
+        from seatbuddy.store import get_store
+
+        job_id = str(params.get("jobId") or uuid.uuid4().hex[:12])
+        with self._lock:
+            if sum(1 for c in self._jobs.values() if not c.finished) >= self.max_jobs:
+                raise OverflowError(f"동시에 실행할 수 있는 작업은 {self.max_jobs}개입니다.")
+            if job_id in self._jobs:
+                raise ValueError(f"job {job_id} already exists")
+            chan = self._jobs[job_id] = JobChannel(job_id, params)
+            self._evict_locked()
+
+        async def _job():
+            chan.set_state("running")
+            chan.log("자동화를 시작합니다.")
+            try:
+                # The server owns the job; it runs until it finishes or is stopped
+                result = await orchestrator.run_job(params, chan.log, chan.cancel, job_id, chan.metrics,
+                                                    heartbeat_timeout=None, store=get_store(), source="api")
+            except Exception as e:
+                chan.log(f"오류 발생: {e}", "error")
+                chan.set_state("error", {"ok": False, "error": str(e)})
+                return
+            chan.log("자동화가 완료되었습니다." if result and result.get("ok") else "자동화가 종료되었습니다.",
+                     "success" if result and result.get("ok") else "info")
+            stopped = chan.cancel.is_set() and not (result and result.get("ok"))
+            chan.set_state("cancelled" if stopped else "finished", result)
+
+        chan.future = orchestrator.submit(_job())
+        return chan
+
+    def stop(self, job_id: str) -> bool:
+        chan = self.get(job_id)
+        if chan is None or chan.finished:
+            return False
+        if not chan.cancel.is_set():
+            chan.cancel.set()
+            chan.log("중지 요청을 보냈습니다. 정리 중...", "warn")
+        return True
+
+    def _evict_locked(self):
+        done = sorted((c for c in self._jobs.values() if c.finished), key=lambda c: c.created)
+        for chan in done[:max(0, len(done) - KEEP_FINISHED)]:
+            self._jobs.pop(chan.job_id, None)
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    hub: JobHub = None  # set by make_server
+    protocol_version = "HTTP/1.1"
+    server_version = "seatbuddy"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    # --- helpers ---
+    def _send_json(self, code: int, body):
+        data = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(code)
+        self._cors()
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _cors(self):
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type, Last-Event-ID")
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+
+    def _read_json(self) -> dict | None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > 200_000:
+            return None
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return None
+        return body if isinstance(body, dict) else None
+
+    def _route(self) -> tuple[list[str], dict]:
+        url = urlparse(self.path)
+        return [p for p in url.path.split("/") if p], parse_qs(url.query)
+
+    def _latest_id(self) -> str | None:
+        chan = self.hub.latest()
+        return chan.job_id if chan else None
+
+    # --- verbs ---
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self._cors()
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        parts, _query = self._route()
+        if parts in (["jobs"], ["start"]):
+            return self._start()
+        if parts == ["stop"]:
+            parts = ["jobs", self._latest_id() or "", "stop"]
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "stop":
+            if self.hub.stop(parts[1]):
+                return self._send_json(200, {"ok": True})
+            return self._send_json(409, {"ok": False, "message": "실행 중이 아닙니다."})
+        self._send_json(404, {"ok": False, "message": "not found"})
+
+    def do_GET(self):
+        parts, query = self._route()
+        if parts == ["jobs"]:
+            return self._send_json(200, {"jobs": self.hub.list()})
+        if parts == ["status"]:
+            chan = self.hub.latest()
+            if chan is None:
+                return self._send_json(200, {"running": False, "state": "idle", "logs": [], "result": None})
+            return self._send_json(200, dict(chan.status(), logs=[f"[{d['t']}] {d['msg']}" for d in chan.tail()]))
+        if parts == ["history"]:
+            return self._history(query)
+        if parts == ["events"]:
+            parts = ["jobs", self._latest_id() or "", "events"]
+        if len(parts) == 2 and parts[0] == "jobs":
+            chan = self.hub.get(parts[1])
+            if chan is None:
+                return self._stored_status(parts[1])
+            return self._send_json(200, chan.status())
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "logs":
+            return self._logs(parts[1], query)
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events":
+            cursor = self.headers.get("Last-Event-ID") or (query.get("lastEventId") or ["0"])[0]
+            try:
+                after = max(0, int(cursor))
+            except ValueError:
+                after = 0
+            return self._stream(parts[1], after)
+        self._send_json(404, {"ok": False, "message": "not found"})
+
+    def _history(self, query: dict):
+        from seatbuddy.history import get_history
+
+        dep, arr = (query.get("dep") or [""])[0], (query.get("arr") or [""])[0]
+        if not dep or not arr:
+            return self._send_json(400, {"ok": False, "message": "dep, arr 파라미터가 필요합니다."})
+        history = get_history()
+        if history is None:
+            return self._send_json(404, {"ok": False, "message": "좌석 이력 저장이 꺼져 있습니다."})
+        self._send_json(200, history.route_stats(dep, arr, (query.get("date") or [None])[0]))
+
+    def _start(self):
+        from seatbuddy.cli import JobFileError, normalize_job
+
+        body = self._read_json()
+        if body is None:
+            return self._send_json(400, {"ok": False, "message": "JSON 본문이 필요합니다."})
+        try:
+            params = normalize_job(body)
+        except JobFileError as e:
+            return self._send_json(400, {"ok": False, "message": str(e)})
+        try:
+            chan = self.hub.start(params)
+        except OverflowError as e:
+            return self._send_json(429, {"ok": False, "message": str(e)})
+        except ValueError as e:
+            return self._send_json(409, {"ok": False, "message": str(e)})
+        self._send_json(200, {"ok": True, "jobId": chan.job_id, "message": "백그라운드에서 시작했습니다."})
+
+    def _logs(self, job_id: str, query: dict):
+        # Polling alternative to the SSE stream: only what came after the client's cursor
+        try:
+            after = max(0, int((query.get("after") or ["0"])[0]))
+        except ValueError:
+            after = 0
+        chan = self.hub.get(job_id)
+        if chan is None:
+            return self._send_json(404, {"ok": False, "message": "unknown job"})
+        logs = chan.logs_after(after)
+        cursor = logs[-1]["id"] if logs else max(after, chan.last_id)
+        self._send_json(200, dict(chan.status(), logs=logs, cursor=cursor))
+
+    def _stored_status(self, job_id: str):
+        # Jobs from before a restart are only in the store
+        from seatbuddy.store import get_store
+
+        job = get_store().get_job(job_id)
+        if job is None:
+            return self._send_json(404, {"ok": False, "message": "unknown job"})
+        self._send_json(200, {"jobId": job_id, "state": job["state"], "running": False})
+
+    # --- SSE ---
+    def _open_stream(self):
+        self.send_response(200)
+        self._cors()
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("X-Accel-Buffering", "no")
+        # No Content-Length: the body ends when we close the connection
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        self.wfile.write(b"retry: 2000\n\n")
+
+    def _write_event(self, seq: int | None, event: str, data: dict):
+        frame = ""
+        if seq is not None:
+            frame += f"id: {seq}\n"
+        frame += f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+        self.wfile.write(frame.encode("utf-8"))
+
+    def _stream(self, job_id: str, after: int):
+        chan = self.hub.get(job_id)
+        if chan is None:
+            return self._stream_stored(job_id, after)
+        self._open_stream()
+        try:
+            while True:
+                events = chan.wait_events(after, KEEPALIVE_SEC)
+                if events and events[0][0] > after + 1:
+                    # The client fell further behind than the in-memory window
+                    self._write_event(None, "gap", {"missed": events[0][0] - after - 1})
+                for seq, event, data in events:
+                    self._write_event(seq, event, data)
+                    after = seq
+                # Also reached with no new events when a client reconnects after the end
+                if chan.finished and after >= chan.last_id:
+                    self._write_event(None, "end", {"state": chan.state})
+                    self.wfile.flush()
+                    return
+                if not events:
+                    self.wfile.write(b": keepalive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def _stream_stored(self, job_id: str, after: int):
+        from seatbuddy.store import get_store
+
+        store = get_store()
+        job = store.get_job(job_id)
+        if job is None:
+            return self._send_json(404, {"ok": False, "message": "unknown job"})
+        # Replays the persisted log; ids here are store row ids
+        self._open_stream()
+        try:
+            while True:
+                rows = store.job_logs(job_id, after_id=after)
+                for r in rows:
+                    data = {"t": datetime.fromtimestamp(r["ts"]).isoformat(timespec="milliseconds"),
+                            "msg": r["msg"], "kind": r["kind"]}
+                    self._write_event(r["id"], "log", data)
+                    after = r["id"]
+                if len(rows) < 500:
+                    break
+            self._write_event(None, "state", {"state": job["state"], "running": False})
+            self._write_event(None, "end", {"state": job["state"]})
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8765, hub: JobHub | None = None) -> ThreadingHTTPServer:
+    handler = type("Handler", (ApiHandler,), {"hub": hub or JobHub()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
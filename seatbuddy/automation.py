@@ -0,0 +1,1097 @@
+"""Selenium automation for the SRT site.
+
+``SrtWorker`` drives one browser through launch → login → search form → polling.
+Each phase is a separate method so callers can run them synchronously
+(``run_srt_automation``) or schedule them individually (see ``orchestrator``).
+"""
+import os
+import random
+import time
+
+# Selenium imports
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import Select
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException, UnexpectedAlertPresentException
+
+# Driver manager (auto download chromedriver)
+from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+try:
+    # webdriver_manager is convenient locally; on some hosted platforms it may be restricted
+    from webdriver_manager.chrome import ChromeDriverManager
+    _HAS_WDM = True
+except Exception:
+    _HAS_WDM = False
+
+from seatbuddy import ranking, waits
+from seatbuddy.budget import LOGIN_COST, get_budget
+from seatbuddy.flightrec import FlightRecorder
+from seatbuddy.history import get_history
+from seatbuddy.pacing import PollPacer, departure_ts, lerp
+from seatbuddy.ports import get_port_allocator
+from seatbuddy.schedule import format_ts
+from seatbuddy.targets import TargetScheduler, parse_targets
+from seatbuddy.profiles import get_profile_manager
+from seatbuddy.reaper import get_registry
+from seatbuddy.waits import Cancelled
+
+
+# Points both pages at another host, e.g. the local mock site (seatbuddy.mocksite)
+SITE_URL = (os.environ.get("SEATBUDDY_SITE_URL") or "").rstrip("/")
+URLS = {
+    "login": (SITE_URL or "https://etk.srail.co.kr") + "/cmc/01/selectLoginForm.do",
+    "search": (SITE_URL or "https://etk.srail.kr") + "/hpg/hra/01/selectScheduleList.do",
+}
+RESULT_TABLE = "#result-form > fieldset > div.tbl_wrap.th_thead > table"
+# How long a scheduled start waits for the first result table before polling as usual
+FIRST_RESULT_TIMEOUT_SEC = 10.0
+# Per-command deadline for WebDriver HTTP calls: a hung renderer or driver makes the
+# command fail instead of blocking its thread for the default two minutes.
+COMMAND_TIMEOUT_SEC = float(os.environ.get("SEATBUDDY_COMMAND_TIMEOUT") or 30)
+PAGE_LOAD_TIMEOUT_SEC = 45.0
+# Browser replacements per worker before it gives up
+MAX_SWAPS = 5
+
+
+def setup_chrome(headless: bool, debug_port: int | None = None, job_id: str | None = None) -> webdriver.Chrome:
+    opts = ChromeOptions()
+    ports = get_port_allocator()
+    managed_port = None
+    if headless:
+        # Prefer new headless; container fallbacks handled below
+        opts.add_argument("--headless=new")
+        # Needed to avoid DevToolsActivePort errors in containers; every browser gets a
+        # port no other seatbuddy browser (in any process) is using
+        if debug_port is None:
+            managed_port = debug_port = ports.acquire()
+        opts.add_argument(f"--remote-debugging-port={int(debug_port)}")
+    opts.add_argument("--disable-gpu")
+    opts.add_argument("--no-sandbox")
+    opts.add_argument("--disable-dev-shm-usage")
+    opts.add_argument("--window-size=1280,1000")
+    opts.add_argument("--disable-extensions")
+    opts.add_argument("--disable-software-rasterizer")
+    opts.add_argument("--no-first-run")
+    opts.add_argument("--no-default-browser-check")
+    opts.add_argument("--hide-scrollbars")
+    # Improve site compatibility in container/headless
+    try:
+        # Make language clearly Korean to avoid alternate layouts
+        opts.add_argument("--lang=ko-KR")
+        opts.add_experimental_option("prefs", {"intl.accept_languages": "ko-KR,ko"})
+        # Slightly reduce automation fingerprints
+        opts.add_experimental_option("excludeSwitches", ["enable-automation"])  # remove webdriver banner
+        opts.add_experimental_option("useAutomationExtension", False)
+    except Exception:
+        pass
+    # Some environments require explicit binary path via CHROME_BIN
+    chrome_bin = os.environ.get("CHROME_BIN")
+    if not chrome_bin:
+        for cand in ("/usr/bin/chromium", "/usr/bin/chromium-browser", "/usr/bin/google-chrome"):
+            if os.path.exists(cand):
+                chrome_bin = cand
+                break
+    if chrome_bin:
+        opts.binary_location = chrome_bin
+
+    # Use an isolated, writable user data dir in containers. Managed profiles are
+    # cloned from a pre-seeded template and deleted again when the driver quits.
+    user_data_dir = os.environ.get("CHROME_USER_DATA_DIR")
+    managed_profile = None
+    if not user_data_dir:
+        profiles = get_profile_manager()
+        try:
+            managed_profile = user_data_dir = profiles.acquire()
+        except Exception:
+            ports.release(managed_port)
+            raise
+    opts.add_argument(f"--user-data-dir={user_data_dir}")
+
+    # Prefer system-installed chromedriver if present (Streamlit Cloud via packages.txt)
+    system_driver = None
+    for cand in ("/usr/bin/chromedriver", "/usr/lib/chromium/chromedriver"):
+        if os.path.exists(cand):
+            system_driver = cand
+            break
+
+    # Start chromedriver in its own session so it and its Chrome children form one
+    # process group the reaper can kill if quit() never runs.
+    service_kw = {"popen_kw": {"start_new_session": True}} if os.name == "posix" else {}
+
+    def _build_with(service_path: str | None):
+        if service_path:
+            return webdriver.Chrome(service=ChromeService(service_path, **service_kw), options=opts)
+        return webdriver.Chrome(service=ChromeService(**service_kw), options=opts)
+
+    try:
+        driver = _launch_chrome(opts, _build_with, system_driver)
+    except Exception:
+        if managed_profile:
+            profiles.release(managed_profile)
+        ports.release(managed_port)
+        raise
+
+    registry = get_registry()
+    browser_pid = registry.register(driver, job_id)
+    _quit = driver.quit
+
+    def _quit_and_release():
+        try:
+            _quit()
+        finally:
+            # Kill whatever survived quit() before removing the profile it uses
+            registry.release(browser_pid)
+            if managed_profile:
+                profiles.release(managed_profile)
+            ports.release(managed_port)
+    driver.quit = _quit_and_release
+
+    _set_command_timeout(driver, COMMAND_TIMEOUT_SEC)
+    try:
+        driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT_SEC)
+    except WebDriverException:
+        pass
+    # Implicit wait helps with minor DOM delays
+    driver.implicitly_wait(8)
+    return driver
+
+
+def _set_command_timeout(driver, seconds: float):
+    executor = driver.command_executor
+    # Per-connection since Selenium 4.2x; older releases only had a process-wide setting
+    config = getattr(executor, "client_config", None) or getattr(executor, "_client_config", None)
+    if config is not None:
+        try:
+            config.timeout = seconds
+        except Exception:
+            pass
+
+
+# Messages of WebDriverExceptions that mean the browser or its session is gone
+_DEAD_BROWSER_MARKERS = (
+    "invalid session id", "no such session", "session deleted", "chrome not reachable",
+    "tab crashed", "target crashed", "disconnected", "connection refused", "max retries exceeded",
+    "read timed out",
+)
+
+
+def is_browser_dead(e: BaseException) -> bool:
+    """True for failures that a fresh browser fixes: crashes, lost sessions, hung commands."""
+    if isinstance(e, PhaseTimeout):
+        return True
+    # urllib3 timeouts/connection errors from the WebDriver HTTP client (command deadline hit)
+    if type(e).__module__.startswith("urllib3") or isinstance(e, (ConnectionError, TimeoutError)):
+        return True
+    if isinstance(e, WebDriverException):
+        msg = str(e).lower()
+        return any(m in msg for m in _DEAD_BROWSER_MARKERS)
+    return False
+
+
+def _launch_chrome(opts: ChromeOptions, build_with, system_driver: str | None) -> webdriver.Chrome:
+    last_err = None
+    for service_path in [system_driver, None if not _HAS_WDM else ChromeDriverManager().install(), None]:
+        try:
+            driver = build_with(service_path)
+            break
+        except WebDriverException as e:
+            last_err = e
+            # Retry once with legacy headless if new headless fails to start Chrome
+            msg = str(e)
+            if "DevToolsActivePort" in msg or "failed to start" in msg:
+                try:
+                    # Switch to legacy headless flag and retry
+                    try:
+                        opts.arguments.remove("--headless=new")
+                    except ValueError:
+                        pass
+                    opts.add_argument("--headless")
+                    driver = build_with(service_path)
+                    break
+                except Exception as e2:
+                    last_err = e2
+                    continue
+            else:
+                continue
+    else:
+        # If loop didn't break with a driver
+        raise last_err if last_err else RuntimeError("Failed to start Chrome driver")
+    return driver
+
+
+def even_hour_bucket(hh: str, mm: str) -> str:
+    # Round UP to the next 2-hour boundary. Examples:
+    # 15:31 -> 16, 15:00 -> 16, 14:00 -> 14, 14:01 -> 16, 23:30 -> 24
+    try:
+        h = int(hh or 0)
+    except Exception:
+        h = 0
+    try:
+        m = int(mm or 0)
+    except Exception:
+        m = 0
+    total = max(0, min(24 * 60, h * 60 + m))
+    if total >= 24 * 60:
+        return "24"
+    # Ceil to 120-minute bucket
+    bucket_minutes = ((total + 119) // 120) * 120
+    if bucket_minutes >= 24 * 60:
+        return "24"
+    return f"{bucket_minutes // 60:02d}"
+
+
+class PhaseTimeout(RuntimeError):
+    pass
+
+
+class SessionExpired(RuntimeError):
+    """The site logged us out; recoverable with ``SrtWorker.relogin()`` in the same browser."""
+
+
+# Alert texts that mean the login session is gone (e.g. "로그인 후 사용하십시오")
+_SESSION_ALERT_MARKERS = ("로그인", "로그아웃", "세션")
+# Re-logins in a row without a successful poll in between before we give up
+MAX_RELOGIN_STREAK = 3
+
+
+def is_session_alert(text: str) -> bool:
+    return any(m in (text or "") for m in _SESSION_ALERT_MARKERS)
+
+
+class SrtWorker:
+    def __init__(self, params: dict, log, cancelled, on_event=None):
+        self.params = params
+        # Last steps of this worker, written out only on failure or success
+        self.flight = FlightRecorder()
+        self.log = self.flight.wrap_log(log)
+        self.cancelled = cancelled
+        # on_event(name, data): structured events (e.g. "attempt") for persistence
+        self.on_event = on_event
+        self.user_id = params.get("userId")
+        self.password = params.get("password")
+        self.num_to_check = int(params.get("numToCheck") or 3)
+        self.mode = params.get("mode") or "reserve"  # reserve | waitlist
+        self.headless = bool(params.get("headless"))
+        try:
+            speed_level = int(params.get("refreshSpeed") or 1)
+        except Exception:
+            speed_level = 1
+        speed_level = max(1, min(10, speed_level))
+        self.s = (speed_level - 1) / 9.0  # 0.0..1.0
+        self.seat_pref = params.get("seatPref") or "both"  # economy | first | both
+        self.seat_order = params.get("seatOrder") or "prefer_first"  # for both: prefer_first | prefer_economy
+
+        self.set_target(params)
+
+        self.driver = None
+        # Polling state, filled in by open_search() and carried across poll_once() calls
+        self.refresh_count = 0
+        self.srt_filter_selected = False
+        self.srt_filter_enabled = True
+        self.loop_iw = lerp(0.3, 0.1, self.s)
+        self.cols_resolved = False
+        self.cols = dict(ranking.DEFAULT_COLS)
+        self.last_row_count = 0
+        self.last_attempted = False
+        self.pacer = PollPacer(self.s)
+        self.history = get_history()
+        # Queries and logins of this account, shared with every other worker using it
+        self.budget = get_budget(self.user_id)
+        # Set by AsyncWorker, which waits for the budget on its loop and hands the
+        # queries it paid for to the next phase as ``prepaid``
+        self.loop_budget = False
+        self.prepaid = 0
+        # Set by recover() under loop_budget: a re-submit is due once it is paid for
+        self.recovery_due = None
+        # Set when an attempt fails; the next attempt reports the gap as "attempt_gap"
+        self.failed_at = None
+        self.relogin_count = 0
+        self.relogin_streak = 0
+        self.swaps = 0
+        self.last_candidates = 0
+        self.last_fingerprint = None
+        # Scheduled start (see seatbuddy.schedule): local epoch time of the first query
+        self.fire_at = params.get("fireAt")
+        self.fired = self.fire_at is None
+
+    def set_target(self, t: dict):
+        """Route, date and departure window to search; takes effect on open_search()."""
+        self.dep = t.get("departureStation")
+        self.arr = t.get("arrivalStation")
+        date_str = t.get("date")  # YYYY-MM-DD
+        time_str = t.get("time")  # HH:mm
+        self.yyyymmdd = (date_str or "").replace("-", "")
+        self.hh, self.mm = (time_str or "").split(":") if time_str else ("", "00")
+        # Candidates are ranked by distance from this departure time
+        self.target_min = ranking.parse_minutes(time_str or "")
+        # Optional end of the departure window ("timeTo"); later trains are ignored
+        end = ranking.parse_minutes(t.get("timeTo") or "")
+        self.window = (self.target_min, end) if end is not None and self.target_min is not None else None
+        # Set for multi-target jobs (see seatbuddy.targets)
+        self.target_spec = t
+        self.target_key = t.get("key")
+        self.target = f"{self.dep}→{self.arr} {date_str} {time_str}" + (f"~{t['timeTo']}" if t.get("timeTo") else "")
+
+    def emit(self, event: str, **data):
+        self.flight.record(event, **data)
+        if self.on_event is None:
+            return
+        try:
+            self.on_event(event, dict(data, worker=self.params.get("workerIndex")))
+        except Exception:
+            pass
+
+    def open_browser(self):
+        log = self.log
+        log("로그인 페이지로 이동...", "info")
+        driver = self.driver = setup_chrome(headless=self.headless, job_id=self.params.get("jobId"))
+        # Element lookups below use explicit, cancellable waits instead of a long implicit wait
+        driver.implicitly_wait(0)
+        driver.get(URLS["login"])
+
+    def login(self):
+        driver, log, cancelled = self.driver, self.log, self.cancelled
+        user_id, password = self.user_id, self.password
+        # Login with one retry on spurious alert
+        for attempt in range(2):
+            # Fill and submit
+            id_el = waits.find_element(driver, By.ID, "srchDvNm01", cancelled)
+            try:
+                id_el.clear()
+            except Exception:
+                pass
+            id_el.send_keys(user_id)
+            waits.find_element(driver, By.ID, "hmpgPwdCphd01", cancelled).send_keys(password)
+            self.pay(LOGIN_COST)
+            driver.find_element(By.CSS_SELECTOR, "input.loginSubmit").click()
+            # Immediately handle possible login alert (ex: 존재하지않는 회원입니다)
+            try:
+                waits.wait_until(driver, EC.alert_is_present(), 2.5, cancelled)
+                alert = driver.switch_to.alert
+                txt = alert.text
+                log(f"로그인 알림: {txt}", "warn")
+                alert.accept()
+                # If known spurious message, retry once
+                if attempt == 0 and ("존재하지않는 회원" in txt or "회원" in txt):
+                    waits.sleep(0.4 + random.uniform(0,0.3), cancelled)
+                    continue
+                raise RuntimeError(f"로그인 실패: {txt}")
+            except TimeoutException:
+                break
+            except UnexpectedAlertPresentException:
+                try:
+                    alert = driver.switch_to.alert
+                    txt = alert.text
+                    log(f"로그인 알림: {txt}", "warn")
+                    alert.accept()
+                    if attempt == 0 and ("존재하지않는 회원" in txt or "회원" in txt):
+                        waits.sleep(0.4 + random.uniform(0,0.3), cancelled)
+                        continue
+                    raise RuntimeError(f"로그인 실패: {txt}")
+                except Cancelled:
+                    raise
+                except Exception:
+                    raise RuntimeError("로그인 중 알림 처리 실패")
+        waits.sleep(0.6, cancelled)
+
+    def open_search(self):
+        driver, log, cancelled = self.driver, self.log, self.cancelled
+        dep, arr, yyyymmdd, hh, mm = self.dep, self.arr, self.yyyymmdd, self.hh, self.mm
+        s = self.s
+        log("열차 조회 페이지로 이동...", "info")
+        try:
+            driver.get(URLS["search"]) 
+        except UnexpectedAlertPresentException:
+            try:
+                alert = driver.switch_to.alert
+                txt = alert.text
+                log(f"페이지 이동 중 알림: {txt}", "warn")
+                alert.accept()
+                raise RuntimeError(f"로그인/접속 제한: {txt}")
+            except Exception:
+                raise
+
+        # Fill conditions
+        dep_el = waits.find_element(driver, By.ID, "dptRsStnCdNm", cancelled)
+        dep_el.clear(); dep_el.send_keys(dep)
+
+        arr_el = waits.find_element(driver, By.ID, "arvRsStnCdNm", cancelled)
+        arr_el.clear(); arr_el.send_keys(arr)
+
+        # Date select by value (YYYYMMDD)
+        try:
+            sel_date = Select(waits.find_element(driver, By.ID, "dptDt", cancelled))
+            sel_date.select_by_value(yyyymmdd)
+        except Exception:
+            # Fallback: use JS to set value if Select fails
+            el = driver.find_element(By.ID, "dptDt")
+            driver.execute_script(
+                "const v=arguments[1]; const el=arguments[0]; const opt=[...el.options].find(o=>o.value===v); if(opt){el.value=opt.value; el.dispatchEvent(new Event('change',{bubbles:true}));}",
+                el, yyyymmdd,
+            )
+
+        # Time select: parse all options and choose the nearest at-or-after target
+        selected_text = None
+        try:
+            import re
+            def parse_minutes(text: str) -> int:
+                try:
+                    m = re.search(r"(\d{1,2}):(\d{2})", text or "")
+                    if m:
+                        H = int(m.group(1)); M = int(m.group(2))
+                        if H >= 24:
+                            return 24*60
+                        return max(0, min(24*60, H*60 + M))
+                except Exception:
+                    pass
+                return -1
+
+            def value_minutes(val: str) -> int:
+                s = (val or "").strip()
+                try:
+                    if len(s) >= 4 and s[:4].isdigit():
+                        H = int(s[:2]); M = int(s[2:4])
+                        if H >= 24:
+                            return 24*60
+                        return max(0, min(24*60, H*60 + M))
+                    if len(s) == 2 and s.isdigit():
+                        H = int(s)
+                        if H >= 24:
+                            return 24*60
+                        return H*60
+                except Exception:
+                    pass
+                return -1
+
+            def pick_option(select_el: Select, opts):
+                # target minutes from user input
+                try:
+                    th = int(hh or 0); tm = int(mm or 0)
+                except Exception:
+                    th, tm = 0, 0
+                target_min = max(0, min(24*60, th*60 + tm))
+                # Build candidates list
+                cands = []
+                for o in opts:
+                    tmin = parse_minutes((o.text or "").strip())
+                    if tmin < 0:
+                        tmin = value_minutes(o.get_attribute("value") or "")
+                    if tmin >= 0:
+                        cands.append((tmin, o))
+                if not cands:
+                    return None
+                cands.sort(key=lambda x: x[0])
+                # Prefer exact match
+                for tmin, o in cands:
+                    if tmin == target_min:
+                        try:
+                            select_el.select_by_visible_text(o.text)
+                        except Exception:
+                            select_el.select_by_value(o.get_attribute("value") or "")
+                        return (tmin, o)
+                # Else choose first option >= target
+                for tmin, o in cands:
+                    if tmin >= target_min:
+                        try:
+                            select_el.select_by_visible_text(o.text)
+                        except Exception:
+                            select_el.select_by_value(o.get_attribute("value") or "")
+                        return (tmin, o)
+                # Else choose the latest available
+                tmin, o = cands[-1]
+                try:
+                    select_el.select_by_visible_text(o.text)
+                except Exception:
+                    select_el.select_by_value(o.get_attribute("value") or "")
+                return (tmin, o)
+
+            sel_time = Select(waits.find_element(driver, By.ID, "dptTm", cancelled))
+            picked = pick_option(sel_time, sel_time.options)
+            if picked:
+                tmin, o = picked
+                selected_text = (o.text or "").strip() or (o.get_attribute("value") or "")
+        except Exception as e:
+            log(f"시간 선택 오류: {e}", "warn")
+
+        if selected_text:
+            log(f"요청 시간 {hh}:{mm} → 적용 시간 {selected_text}")
+        else:
+            log(f"시간 옵션 선택 실패: {hh}:{mm}. 기본값으로 진행합니다.")
+
+        # Prefer SRT-only filter if available (user-reported layout)
+        srt_filter_selected = False
+        try:
+            applied = False
+            # 1) Try the provided absolute XPath first
+            try:
+                srt_radio = driver.find_element(By.XPATH, "/html/body/div[1]/div[4]/div/div[2]/form/fieldset/div[1]/div/ul/li[4]/div[2]/input[2]")
+                driver.execute_script("arguments[0].click();", srt_radio)
+                applied = True
+            except Exception:
+                pass
+            # 2) Fallback: pick the 2nd input under the same li area
+            if not applied:
+                try:
+                    radios = driver.find_elements(By.XPATH, "//form//fieldset//li[4]//div[2]//input[@type='radio' or @type='checkbox']")
+                    if len(radios) >= 2:
+                        driver.execute_script("arguments[0].click();", radios[1])
+                        applied = True
+                except Exception:
+                    pass
+            # 3) Fallback by attribute search
+            if not applied:
+                try:
+                    radios = driver.find_elements(By.CSS_SELECTOR, "input[type=radio], input[type=checkbox]")
+                    for r in radios:
+                        v = ((r.get_attribute("value") or "") + " " + (r.get_attribute("id") or "") + " " + (r.get_attribute("name") or "")).upper()
+                        if "SRT" in v:
+                            driver.execute_script("arguments[0].click();", r)
+                            applied = True
+                            break
+                except Exception:
+                    pass
+            if applied:
+                log("열차종별: SRT만 선택했습니다.")
+                srt_filter_selected = True
+        except Exception as e:
+            log(f"SRT 필터 선택 실패: {e}", "warn")
+
+        if self.fired:
+            log("조건 입력 완료. 조회합니다...", "info")
+            self.pay()
+            self._submit_query()
+        else:
+            log(f"조건 입력 완료. {format_ts(self.fire_at)}에 첫 조회를 보냅니다.", "info")
+
+        # Polling state. Some site variants don't render clear 'SRT' text/logo in col1. If we
+        # already applied the SRT-only filter in the search form, skip row-level SRT detection
+        # to avoid confusion. refresh_count keeps counting across re-opens of this page.
+        self.srt_filter_selected = srt_filter_selected
+        self.srt_filter_enabled = not srt_filter_selected
+
+        # For the polling loop, keep implicit wait low; interpolate with speed
+        self.loop_iw = lerp(0.3, 0.1, s)
+        driver.implicitly_wait(self.loop_iw)
+
+        # Column indices are detected once by poll_once(), then reused
+        self.cols_resolved = False
+        self.cols = dict(ranking.DEFAULT_COLS)
+
+    def snapshot(self) -> dict | None:
+        """Header and cell data of the whole result table in one script call."""
+        try:
+            return self.driver.execute_script(ranking.SNAPSHOT_JS, RESULT_TABLE)
+        except UnexpectedAlertPresentException:
+            raise
+        except WebDriverException:
+            return None
+
+    def poll_once(self) -> dict | None:
+        """Rank every visible candidate once and try them best-first; return a result dict on success.
+
+        Raises ``SessionExpired`` when the site has logged us out.
+        """
+        try:
+            res = self._poll()
+            if res and self.target_key is not None:
+                res["target"] = self.target
+            return res
+        except UnexpectedAlertPresentException as e:
+            txt = getattr(e, "alert_text", None) or ""
+            try:
+                alert = self.driver.switch_to.alert
+                txt = txt or alert.text
+                alert.accept()
+            except WebDriverException:
+                pass
+            if is_session_alert(txt):
+                raise SessionExpired(txt)
+            # Any other alert (e.g. 잔여석 없음) only interrupted this scan
+            self.log(f"알림창: {txt}", "warn")
+            self.pacer.error()
+            return None
+
+    def _poll(self) -> dict | None:
+        log, cancelled = self.log, self.cancelled
+        mode = self.mode
+
+        waits.check(cancelled)
+
+        snap = self.snapshot()
+        if snap is not None and "selectLoginForm" in (snap.get("url") or ""):
+            raise SessionExpired("로그인 페이지로 이동됨")
+        rows = (snap or {}).get("rows") or []
+        if rows:
+            self.relogin_streak = 0
+        if len(rows) == 0:
+            log("조회 결과가 없습니다. 계속 재조회합니다.")
+
+        # Determine column indices dynamically from header, with fallbacks (once)
+        if not self.cols_resolved and snap is not None:
+            heads = snap.get("heads") or []
+            if heads:
+                self.cols, ambiguous = ranking.resolve_columns(heads, self.cols)
+                if ambiguous:
+                    log("열 헤더 모호/이상: 기본 매핑 사용(일반=7, 특실=6)")
+                else:
+                    log(f"탐지된 열: 일반={self.cols['gen']}, 특실={self.cols['fst']}, 대기={self.cols['wait']}")
+            self.cols_resolved = True  # Avoid repeated attempts that can be costly
+
+        if self.history is not None and rows:
+            try:
+                self.history.observe(self.dep, self.arr, self.yyyymmdd, snap, self.cols, self.srt_filter_enabled)
+            except (OSError, ValueError):
+                pass
+
+        # Only consider SRT rows; skip Korail/KTX so the count is meaningful
+        candidates, srt_rows_detected = self._rank(snap)
+        self.last_candidates = len(candidates)
+        self.last_fingerprint = ranking.fingerprint(snap)
+        self.flight.record("poll", rows=len(rows), candidates=len(candidates), fingerprint=self.last_fingerprint)
+        if len(candidates) > 1:
+            log("후보 순위: " + ", ".join(f"행 {c['row']} {c['label']}" for c in candidates[:5]))
+
+        any_attempted = False
+        tried = set()
+        while candidates:
+            waits.check(cancelled)
+            cand = candidates.pop(0)
+            tried.add(ranking.candidate_key(cand))
+            try:
+                if mode == "waitlist":
+                    res = self._try_waitlist(cand)
+                else:
+                    res = self._try_reserve(cand)
+            except Cancelled:
+                raise
+            except Exception:
+                continue
+            any_attempted = any_attempted or res is not False
+            if res:
+                return res
+            if res is None:
+                # The page changed under us: restore the result table and re-rank what is
+                # left on it rather than clicking through stale rows.
+                if not self.recover() or not candidates:
+                    break
+                snap = self.snapshot()
+                fresh, _ = self._rank(snap)
+                candidates = [c for c in fresh if ranking.candidate_key(c) not in tried]
+
+        # If we couldn't positively detect any SRT rows this page, disable the filter
+        if self.srt_filter_enabled and srt_rows_detected == 0 and len(rows) > 0:
+            self.srt_filter_enabled = False
+            # If the SRT filter was selected earlier, this detection failure is expected.
+            # Use an info message instead of a warning only when no filter was applied.
+            if self.srt_filter_selected:
+                log("행 레이블에 SRT 표기가 없어 전체 행을 검사합니다.")
+            else:
+                log("SRT 구분 불가: 모든 열차 행을 검사로 전환합니다.", "warn")
+
+        self.last_row_count = len(rows)
+        self.last_attempted = any_attempted
+        return None
+
+    def _rank(self, snap: dict | None) -> tuple[list[dict], int]:
+        return ranking.rank(
+            snap, mode=self.mode, seat_pref=self.seat_pref, seat_order=self.seat_order,
+            num_to_check=self.num_to_check, target_min=self.target_min, cols=self.cols,
+            srt_only=self.srt_filter_enabled, window=self.window,
+        )
+
+    def _cell(self, row_idx: int, col_idx: int):
+        # Looked up fresh per attempt; element references do not survive a page reload
+        return self.driver.find_element(
+            By.CSS_SELECTOR, f"{RESULT_TABLE} > tbody > tr:nth-child({row_idx}) > td:nth-child({col_idx})")
+
+    def _try_reserve(self, cand: dict):
+        """Click one ranked seat; returns a result dict, None (tried, failed) or False (not clicked)."""
+        driver, log, cancelled = self.driver, self.log, self.cancelled
+        s, loop_iw = self.s, self.loop_iw
+        row_idx, col_idx, label = cand["row"], cand["col"], cand["label"]
+
+        log(f"행 {row_idx} {label}: 예약하기 시도")
+        self.flight.record("click", selector=f"{RESULT_TABLE} > tbody > tr:nth-child({row_idx}) > td:nth-child({col_idx})")
+        td = self._cell(row_idx, col_idx)
+        if self.failed_at is not None:
+            self.emit("timing", name="attempt_gap", seconds=time.monotonic() - self.failed_at)
+            self.failed_at = None
+        # Prefer a/button; fall back to ENTER. If not found, try user-reported absolute XPath pattern.
+        a = None
+        clicked = False
+        try:
+            a = td.find_element(By.CSS_SELECTOR, "a, button, input[type=button]")
+        except Exception:
+            a = None
+        # Capture current windows to detect popup/new tab behavior
+        try:
+            prev_handles = set(driver.window_handles)
+        except Exception:
+            prev_handles = None
+        try:
+            if a is not None:
+                a.click(); clicked = True
+            else:
+                td.send_keys(Keys.ENTER); clicked = True
+        except Exception:
+            pass
+
+        # Fallback with absolute XPath (user-reported structure)
+        if not clicked:
+            try:
+                # Map our desired seat column to absolute td index (특실=6, 일반=7) if plausible
+                abs_td_idx = 6 if label.startswith("특실") else 7
+                abs_xpath = f"/html/body/div[1]/div[4]/div/div[3]/div[1]/form/fieldset/div[6]/table/tbody/tr[{row_idx}]/td[{abs_td_idx}]//a | /html/body/div[1]/div[4]/div/div[3]/div[1]/form/fieldset/div[6]/table/tbody/tr[{row_idx}]/td[{abs_td_idx}]//button | /html/body/div[1]/div[4]/div/div[3]/div[1]/form/fieldset/div[6]/table/tbody/tr[{row_idx}]/td[{abs_td_idx}]//input[@type='button']"
+                el = driver.find_element(By.XPATH, abs_xpath)
+                driver.execute_script("arguments[0].click();", el)
+                clicked = True
+                log(f"절대 XPath로 클릭 시도: td[{abs_td_idx}] (row {row_idx})")
+            except Exception:
+                pass
+        if not clicked:
+            return False
+
+        # Accept alert if exists
+        try:
+            waits.wait_until(driver, EC.alert_is_present(), 1.5, cancelled)
+            alert = driver.switch_to.alert
+            log(f"알림창: {alert.text}")
+            alert.accept()
+        except Cancelled:
+            raise
+        except Exception:
+            pass
+
+        # If a new window/tab opened, switch to it for result check
+        switched = False
+        try:
+            if prev_handles is not None:
+                waits.wait_until(
+                    driver,
+                    lambda d: len(d.window_handles) > len(prev_handles),
+                    lerp(3.0, 2.0, s),
+                    cancelled,
+                )
+                curr_handles = set(driver.window_handles)
+                new_handles = list(curr_handles - prev_handles)
+                if new_handles:
+                    driver.switch_to.window(new_handles[0])
+                    switched = True
+        except Cancelled:
+            raise
+        except Exception:
+            pass
+
+        driver.implicitly_wait(loop_iw)
+        ok = len(driver.find_elements(By.ID, "isFalseGotoMain")) > 0
+        self.emit("attempt", row=row_idx, label=label, ok=ok)
+        if ok:
+            log("예약 성공! 결제 화면으로 이동했습니다.", "success")
+            return {"ok": True, "type": "reserve", "seatPref": self.seat_pref}
+        self.failed_at = time.monotonic()
+        log("자리 없음/실패. 결과 페이지로 되돌아갑니다.")
+        # A popup leaves the result page untouched: close it and carry on there.
+        # Same-window navigation is undone by recover().
+        if switched:
+            try:
+                driver.close()
+                # Switch back to the first handle available
+                for h in driver.window_handles:
+                    driver.switch_to.window(h)
+                    break
+            except Exception:
+                pass
+        driver.implicitly_wait(loop_iw)
+        return None
+
+    def _table_ready(self) -> bool:
+        try:
+            return bool(self.driver.execute_script(
+                "return !!document.querySelector(arguments[0] + ' > tbody > tr');", RESULT_TABLE))
+        except UnexpectedAlertPresentException:
+            raise
+        except WebDriverException:
+            return False
+
+    def recover(self) -> bool:
+        """Bring the result table back after a failed attempt, cheapest way first.
+
+        Still on the table (popup closed, alert only): nothing to do. Otherwise try
+        history back, then re-submitting the search form that is still filled in, and
+        only then reopen the search page from the cached conditions.
+        """
+        driver, cancelled = self.driver, self.cancelled
+        started = time.monotonic()
+        method = None
+        if self._table_ready():
+            method = "in_place"
+        if method is None:
+            try:
+                driver.back()
+                waits.wait_until(driver, lambda d: self._table_ready(), lerp(2.0, 1.0, self.s), cancelled)
+                method = "back"
+            except Cancelled:
+                raise
+            except Exception:
+                pass
+        if method is not None:
+            self.emit("recovery", method=method, seconds=time.monotonic() - started)
+            return True
+        if self.loop_budget and self.prepaid < 1:
+            # The next step sends a query: leave it to the orchestrator, which pays on its
+            # loop and then calls finish_recovery()
+            self.recovery_due = started
+            return False
+        return self._resubmit_or_reload(started)
+
+    def finish_recovery(self) -> bool:
+        started, self.recovery_due = self.recovery_due, None
+        return self._resubmit_or_reload(started)
+
+    def _resubmit_or_reload(self, started: float) -> bool:
+        driver, cancelled = self.driver, self.cancelled
+        method = None
+        try:
+            btn = driver.find_element(By.XPATH, "//input[@value='조회하기']")
+            self.pay()
+            driver.execute_script('arguments[0].click();', btn)
+            waits.wait_until(driver, lambda d: self._table_ready(), lerp(3.0, 1.5, self.s), cancelled)
+            method = "resubmit"
+        except Cancelled:
+            raise
+        except Exception:
+            pass
+        if method is None:
+            self.log("결과 화면을 복구하지 못해 조회 페이지를 다시 엽니다.", "warn")
+            try:
+                self.open_search()
+            except Cancelled:
+                raise
+            except Exception:
+                return False
+            method = "reload"
+        self.emit("recovery", method=method, seconds=time.monotonic() - started)
+        return True
+
+    def _try_waitlist(self, cand: dict):
+        log = self.log
+        row_idx = cand["row"]
+        log(f"행 {row_idx}: 예약대기 신청 시도")
+        try:
+            a = self._cell(row_idx, cand["col"]).find_element(By.CSS_SELECTOR, "a, button, input[type=button], img")
+            try:
+                a.click()
+            except Exception:
+                a.send_keys(Keys.ENTER)
+            self.emit("attempt", row=row_idx, label="예약대기", ok=True)
+            log("예약대기 신청 성공!", "success")
+            return {"ok": True, "type": "waitlist"}
+        except Exception as e:
+            self.emit("attempt", row=row_idx, label="예약대기", ok=False)
+            log(f"예약대기 시도 중 오류: {e}", "error")
+            return False
+
+    def relogin(self):
+        """Log in again in the same browser and reopen the search with the same conditions."""
+        driver, log = self.driver, self.log
+        self.relogin_streak += 1
+        if self.relogin_streak > MAX_RELOGIN_STREAK:
+            raise RuntimeError(f"세션이 계속 만료됩니다 (연속 {MAX_RELOGIN_STREAK}회 재로그인 실패)")
+        self.relogin_count += 1
+        log(f"세션이 만료되어 같은 브라우저에서 다시 로그인합니다 ({self.relogin_count}회).", "warn")
+        started = time.monotonic()
+        try:
+            driver.switch_to.alert.accept()
+        except WebDriverException:
+            pass
+        driver.implicitly_wait(0)
+        driver.get(URLS["login"])
+        self.login()
+        self.open_search()
+        self.emit("relogin", seconds=time.monotonic() - started)
+
+    def take_budget(self, cost: int = 1) -> float:
+        """Reserve ``cost`` queries of the account budget; returns how long to wait before sending."""
+        if self.budget is None:
+            return 0.0
+        wait = self.budget.reserve(cost)
+        self.emit("timing", name="budget_wait", seconds=wait)
+        return wait
+
+    def pay(self, cost: int = 1):
+        """Cover ``cost`` queries this phase is about to send: from what AsyncWorker
+        prepaid on its loop, otherwise by waiting here (sync runner, login retries)."""
+        if self.prepaid >= cost:
+            self.prepaid -= cost
+            return
+        waits.sleep(self.take_budget(cost), self.cancelled)
+
+    def _submit_query(self):
+        try:
+            query_btn = self.driver.find_element(By.XPATH, "//input[@value='조회하기']")
+            self.driver.execute_script('arguments[0].click();', query_btn)
+        except Exception:
+            pass
+
+    def fire(self):
+        """Scheduled start: send the prepared query at ``fire_at`` and wait for the first result."""
+        log, cancelled = self.log, self.cancelled
+        late = time.time() - self.fire_at
+        if late > 0:
+            log(f"준비가 목표 시각보다 {late:.1f}s 늦었습니다. 바로 조회합니다.", "warn")
+        waits.sleep_until(self.fire_at, cancelled)
+        self.pay()
+        self.fired = True
+        self._submit_query()
+        try:
+            waits.wait_until(self.driver, lambda d: self._table_ready(), FIRST_RESULT_TIMEOUT_SEC, cancelled, poll=0.02)
+        except TimeoutException:
+            log(f"목표 시각 후 {FIRST_RESULT_TIMEOUT_SEC:.0f}s 안에 조회 결과가 없습니다. 계속 재조회합니다.", "warn")
+            return
+        except UnexpectedAlertPresentException:
+            # poll_once() sees what the alert left behind (e.g. the login page)
+            return
+        seconds = time.time() - self.fire_at
+        self.emit("timing", name="target_to_first_result", seconds=seconds)
+        log(f"목표 시각 후 첫 조회 결과까지 {seconds:.2f}s", "success")
+
+    def refresh(self) -> float:
+        """Re-submit the query; return how long to wait before the next poll."""
+        log = self.log
+
+        self.refresh_count += 1
+        log(f"재조회 {self.refresh_count}회")
+        self.pay()
+        self._submit_query()
+        # Fast while the table churns, slower while it is static or the server struggles
+        self.pacer.observe(self.target_key, self.last_fingerprint, self.last_row_count, self.last_candidates)
+        delay = self.pacer.next_delay(departure_ts(self.yyyymmdd, self.target_min))
+        self.emit("timing", name="poll_interval", seconds=delay)
+        return delay
+
+    def fail(self, e: Exception) -> dict:
+        if isinstance(e, RuntimeError):
+            self.log(f"오류 발생: {e}", "error")
+        elif isinstance(e, WebDriverException):
+            self.log(f"웹드라이버 오류: {e}", "error")
+        else:
+            self.log(f"예상치 못한 오류: {e}", "error")
+        return {"ok": False, "error": str(e)}
+
+    def dump_flight(self, reason: str, err: Exception | None = None) -> str | None:
+        """Write the flight recorder out; adds a screenshot and DOM while the browser responds."""
+        driver = self.driver
+        if driver is not None and ((err is not None and is_browser_dead(err)) or not self.is_alive()):
+            driver = None
+        meta = {"job": self.params.get("jobId"), "worker": self.params.get("workerIndex"), "target": self.target,
+                "refreshes": self.refresh_count, "error": repr(err) if err is not None else None}
+        path = self.flight.dump(reason, driver, meta)
+        if path:
+            self.log(f"진단 기록 저장: {path}", "warn" if err is not None else "info")
+        return path
+
+    def close(self):
+        try:
+            if self.driver is not None:
+                self.driver.quit()
+        except Exception:
+            pass
+
+    def discard(self):
+        """Drop a broken browser without waiting on it: kill its tree, then clean up."""
+        driver = self.driver
+        if driver is None:
+            return
+        try:
+            get_registry().release(int(driver.service.process.pid))
+        except Exception:
+            pass
+        # quit() now fails fast and still releases the profile
+        self.close()
+
+    def is_alive(self) -> bool:
+        try:
+            return self.driver is not None and self.driver.service.process.poll() is None
+        except Exception:
+            return False
+
+    def adopt(self, old: "SrtWorker"):
+        """Take over identity and polling progress of a worker whose browser died."""
+        self.params, self.log, self.cancelled, self.on_event = old.params, old.log, old.cancelled, old.on_event
+        # old.log already records into old.flight; keep one ring across the swap
+        self.flight = old.flight
+        self.refresh_count, self.relogin_count, self.swaps = old.refresh_count, old.relogin_count, old.swaps
+        self.cols, self.cols_resolved = old.cols, old.cols_resolved
+        self.pacer = old.pacer
+        self.fire_at, self.fired = old.fire_at, old.fired
+        self.set_target(old.target_spec)
+
+    def follow(self, scheduler: TargetScheduler) -> bool:
+        """Switch to the scheduler's pick; True when the search must be reopened for it."""
+        t = scheduler.pick(self.target_key)
+        if t["key"] == self.target_key:
+            return False
+        self.set_target(t)
+        self.log(f"조회 대상 전환: {self.target}")
+        return True
+
+    def restart(self):
+        """Cold replacement in the same worker: new browser, login, search."""
+        self.discard()
+        self.driver = None
+        self.open_browser()
+        self.login()
+        self.open_search()
+
+    def run(self) -> dict:
+        # Multi-target jobs rotate this worker over its targets (process mode shards them)
+        targets = parse_targets(self.params) if self.params.get("targets") else []
+        scheduler = TargetScheduler(targets) if len(targets) > 1 else None
+        if targets:
+            self.set_target(targets[0])
+        try:
+            self.open_browser()
+            self.login()
+            self.open_search()
+            while True:
+                try:
+                    if scheduler is not None and self.follow(scheduler):
+                        self.open_search()
+                    if not self.fired:
+                        self.fire()
+                    try:
+                        res = self.poll_once()
+                    except SessionExpired:
+                        self.relogin()
+                        continue
+                    if res:
+                        # Let the job stop the other workers before the diagnostics dump
+                        self.emit("won")
+                        self.dump_flight("success")
+                        return res
+                    if scheduler is not None:
+                        scheduler.report(self.target_key, self.last_candidates, self.last_fingerprint)
+                    delay = self.refresh()
+                except Exception as e:
+                    if not is_browser_dead(e) or self.swaps >= MAX_SWAPS:
+                        raise
+                    self.swaps += 1
+                    self.log(f"브라우저 이상 감지({type(e).__name__}): 새 브라우저로 다시 시작합니다.", "warn")
+                    started = time.monotonic()
+                    self.restart()
+                    self.emit("swap", seconds=time.monotonic() - started, warm=False)
+                    continue
+                waits.sleep(delay, self.cancelled)
+        except Exception as e:
+            if not isinstance(e, Cancelled):
+                self.dump_flight("error", e)
+            return self.fail(e)
+        finally:
+            self.close()
+
+
+def run_srt_automation(params: dict, log, cancelled, on_event=None):
+    return SrtWorker(params, log, cancelled, on_event).run()
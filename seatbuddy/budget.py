@@ -0,0 +1,119 @@
+"""Per-account query budget shared by every worker, job and process on the machine.
+
+Parallel workers and concurrent jobs of one SRT account each pace themselves, but
+the site only sees their sum; past some rate it answers with login alerts and
+lockouts. Every query (search submit, refresh, re-submit) and every login of an
+account therefore reserves a slot from one token bucket first:
+``SEATBUDDY_ACCOUNT_QPS`` queries per second (default 2, ``off`` disables) with
+bursts of up to ``SEATBUDDY_ACCOUNT_BURST`` (default 4). A login costs
+``LOGIN_COST`` queries.
+
+The bucket is kept as a GCRA "theoretical arrival time" in a small file per
+account under the run directory, updated under ``flock``, so workers in the
+process pool and other seatbuddy processes draw from the same budget. The time is
+wall-clock: a monotonic value would outlive the reboot that restarts its clock. Slots are
+handed out in reservation order; since a worker reserves its next query only
+after the previous one, a saturated budget is shared round-robin across workers.
+"""
+import contextlib
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: the budget is only shared within this process
+    fcntl = None
+
+QPS_ENV = "SEATBUDDY_ACCOUNT_QPS"
+BURST_ENV = "SEATBUDDY_ACCOUNT_BURST"
+DEFAULT_QPS = 2.0
+DEFAULT_BURST = 4
+LOGIN_COST = 3
+_STATE = struct.Struct("<dQ")  # theoretical arrival time (time.time), queries granted
+# A stored arrival time this far ahead can only come from a clock stepped back
+_STALE_AHEAD_SEC = 3600.0
+
+
+class AccountBudget:
+    def __init__(self, account: str, rate: float, burst: int = DEFAULT_BURST, root: str | None = None):
+        self.rate = rate
+        self.interval = 1.0 / rate
+        # How far the arrival time may run ahead of now before a request has to wait
+        self.tolerance = (max(1, burst) - 1) * self.interval
+        root = root or os.path.join(tempfile.gettempdir(), "seatbuddy-run")
+        os.makedirs(root, exist_ok=True)
+        # File names carry a digest, never the account id itself
+        digest = hashlib.sha256(account.encode("utf-8")).hexdigest()[:16]
+        self._fd = os.open(os.path.join(root, f"budget-{digest}.bin"), os.O_RDWR | os.O_CREAT, 0o600)
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def _locked(self):
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _read(self) -> tuple[float, int]:
+        data = os.pread(self._fd, _STATE.size, 0)
+        return _STATE.unpack(data) if len(data) == _STATE.size else (0.0, 0)
+
+    def reserve(self, cost: int = 1) -> float:
+        """Take ``cost`` queries from the budget; returns how long to wait before sending them."""
+        with self._locked():
+            tat, granted = self._read()
+            now = time.time()
+            if tat - now > _STALE_AHEAD_SEC:
+                tat = now
+            at = max(now, tat - self.tolerance)
+            tat = max(tat, at) + cost * self.interval
+            os.pwrite(self._fd, _STATE.pack(tat, granted + cost), 0)
+        return at - now
+
+    def granted(self) -> int:
+        """Queries granted so far, by every user of this account's budget."""
+        with self._locked():
+            return self._read()[1]
+
+
+_budgets: dict[str, AccountBudget] = {}
+_budgets_lock = threading.Lock()
+
+
+def budget_rate() -> float | None:
+    value = (os.environ.get(QPS_ENV) or "").strip().lower()
+    if value in ("off", "0", "false", "no"):
+        return None
+    try:
+        rate = float(value or DEFAULT_QPS)
+    except ValueError:
+        rate = DEFAULT_QPS
+    return rate if rate > 0 else None
+
+
+def get_budget(account: str | None) -> AccountBudget | None:
+    """The process-wide budget of ``account``, or None when budgets are off."""
+    account = (account or "").strip().lower()
+    rate = budget_rate()
+    if not account or rate is None:
+        return None
+    with _budgets_lock:
+        budget = _budgets.get(account)
+        if budget is None:
+            try:
+                burst = int(os.environ.get(BURST_ENV) or DEFAULT_BURST)
+            except ValueError:
+                burst = DEFAULT_BURST
+            try:
+                budget = _budgets[account] = AccountBudget(account, rate, burst)
+            except OSError:
+                return None
+        return budget
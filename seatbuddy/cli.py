@@ -0,0 +1,459 @@
+"""Command-line runner and spool-directory daemon (no Streamlit).
+
+    python -m seatbuddy run job.yaml        # run one job, exit with its status
+    python -m seatbuddy daemon --spool DIR  # run every job file dropped into DIR
+    python -m seatbuddy serve --port 8765   # HTTP API with SSE log streams (see seatbuddy.api)
+    python -m seatbuddy history 수서 부산    # when seats reappeared on a route (see seatbuddy.history)
+    python -m seatbuddy mocksite            # local stand-in for the SRT pages (see seatbuddy.mocksite)
+    python -m seatbuddy soak --baseline b.json  # scale/leak runs against the mock site (see seatbuddy.soak)
+
+Job files hold the same keys the Streamlit form sends (``userId``,
+``departureStation``, ``date``, ``time``, ...) as JSON or YAML. The password may
+be left out and read from ``$SRT_PASSWORD`` (or the variable named by
+``passwordEnv``). Logs go to stdout as one JSON object per line and, like the
+results, are also recorded in the SQLite store (``$SEATBUDDY_DB``).
+
+Heavy imports (Selenium, the orchestrator) are deferred until a job actually
+starts so the process comes up in a few tens of milliseconds.
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+EXIT_OK = 0
+EXIT_NOT_BOOKED = 1
+EXIT_BAD_JOB = 2
+EXIT_INTERRUPTED = 130
+EXIT_REGRESSION = 1
+
+_REQUIRED = ("userId", "password", "departureStation", "arrivalStation", "date", "time")
+_JOB_SUFFIXES = (".json", ".yaml", ".yml")
+
+
+class JobFileError(ValueError):
+    pass
+
+
+def load_job(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+    except OSError as e:
+        raise JobFileError(f"cannot read {path}: {e}")
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise JobFileError("YAML job files need PyYAML (pip install pyyaml); use JSON instead")
+        try:
+            job = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise JobFileError(f"invalid YAML in {path}: {e}")
+    else:
+        try:
+            job = json.loads(text)
+        except ValueError as e:
+            raise JobFileError(f"invalid JSON in {path}: {e}")
+    if not isinstance(job, dict):
+        raise JobFileError(f"{path}: job must be a mapping")
+    return normalize_job(job)
+
+
+def _normalize_when(spec: dict):
+    # YAML turns unquoted dates/times into objects; the automation expects strings
+    if hasattr(spec.get("date"), "strftime"):
+        spec["date"] = spec["date"].strftime("%Y-%m-%d")
+    for key in ("time", "timeTo"):
+        if isinstance(spec.get(key), int):
+            # YAML 1.1 reads 14:30 as a base-60 integer (870)
+            spec[key] = f"{spec[key] // 60:02d}:{spec[key] % 60:02d}"
+
+
+def normalize_job(job: dict) -> dict:
+    job = dict(job)
+    if not job.get("password"):
+        job["password"] = os.environ.get(job.pop("passwordEnv", None) or "SRT_PASSWORD", "")
+    _normalize_when(job)
+    if job.get("targets"):
+        if not isinstance(job["targets"], list) or not all(isinstance(t, dict) for t in job["targets"]):
+            raise JobFileError("targets must be a list of mappings")
+        job["targets"] = [dict(t) for t in job["targets"]]
+        for t in job["targets"]:
+            _normalize_when(t)
+        # Top-level fields are the defaults for every target; the first target fills any gap
+        for k in ("departureStation", "arrivalStation", "date", "time"):
+            job.setdefault(k, job["targets"][0].get(k))
+            if not job.get(k):
+                job[k] = job["targets"][0].get(k)
+    start_at = job.get("startAt")
+    if hasattr(start_at, "isoformat"):
+        job["startAt"] = start_at.isoformat()
+    elif isinstance(start_at, int) and start_at < 10 ** 9:
+        # YAML 1.1 reads 07:00 (minutes) and 07:00:00 (seconds) as base-60 integers
+        if start_at >= 24 * 60:
+            raise JobFileError('startAt: quote times with seconds, e.g. "07:00:00"')
+        job["startAt"] = f"{start_at // 60:02d}:{start_at % 60:02d}"
+    if job.get("startAt"):
+        from seatbuddy.schedule import parse_start_at
+        try:
+            parse_start_at(job["startAt"])
+        except ValueError as e:
+            raise JobFileError(f"startAt: {e}")
+    missing = [k for k in _REQUIRED if not job.get(k)]
+    if missing:
+        raise JobFileError(f"missing required field(s): {', '.join(missing)}")
+    for i, t in enumerate(job.get("targets") or [job]):
+        dep = t.get("departureStation") or job["departureStation"]
+        arr = t.get("arrivalStation") or job["arrivalStation"]
+        where = f"targets[{i}]: " if job.get("targets") else ""
+        if dep == arr:
+            raise JobFileError(f"{where}departureStation and arrivalStation must differ")
+    job.setdefault("headless", True)
+    return job
+
+
+class JsonLogger:
+    """Writes one JSON object per line; safe to call from any thread."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def emit(self, **fields):
+        fields.setdefault("ts", datetime.now().isoformat(timespec="milliseconds"))
+        line = json.dumps(fields, ensure_ascii=False, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def for_job(self, job_id: str):
+        def _log(msg: str, kind: str = "info"):
+            self.emit(event="log", job=job_id, kind=kind, msg=msg)
+        return _log
+
+
+def _exit_code(result: dict | None, interrupted: bool) -> int:
+    if result and result.get("ok"):
+        return EXIT_OK
+    return EXIT_INTERRUPTED if interrupted else EXIT_NOT_BOOKED
+
+
+async def _run_one(job: dict, out: JsonLogger, cancel_event, job_id: str) -> dict | None:
+    from seatbuddy.metrics import JobMetrics
+    from seatbuddy.orchestrator import run_job
+    from seatbuddy.store import get_store
+
+    metrics = JobMetrics()
+    started = time.monotonic()
+    out.emit(event="start", job=job_id, route=f"{job['departureStation']}->{job['arrivalStation']}",
+             date=job["date"], time=job["time"], workers=int(job.get("parallelCount") or 1))
+    # No UI heartbeat here: the job lives as long as this process wants it to
+    result = await run_job(job, out.for_job(job_id), cancel_event, job_id, metrics, heartbeat_timeout=None,
+                           store=get_store(), source="cli")
+    out.emit(event="result", job=job_id, ok=bool(result and result.get("ok")), result=result,
+             elapsed=round(time.monotonic() - started, 3), metrics=metrics.snapshot())
+    return result
+
+
+def _install_stop_handlers(on_stop):
+    """First SIGINT/SIGTERM cancels gracefully; a second one falls through."""
+    from seatbuddy.reaper import get_registry
+
+    # Registry first, so its reap-and-exit handler is the one a second signal reaches
+    get_registry()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(sig)
+
+        def _handler(signum, frame, _previous=previous, _sig=sig):
+            signal.signal(_sig, _previous)
+            on_stop()
+        signal.signal(sig, _handler)
+
+
+def cmd_run(args) -> int:
+    out = JsonLogger()
+    try:
+        job = load_job(args.job)
+    except JobFileError as e:
+        out.emit(event="error", msg=str(e))
+        return EXIT_BAD_JOB
+    if args.workers:
+        job["parallelCount"] = args.workers
+    if args.process:
+        job["executionMode"] = "process"
+
+    import asyncio
+    from seatbuddy.waits import CancelEvent
+
+    cancel_event = CancelEvent()
+    interrupted = threading.Event()
+
+    def _stop():
+        interrupted.set()
+        cancel_event.set()
+    _install_stop_handlers(_stop)
+    job_id = str(job.get("jobId") or uuid.uuid4().hex[:12])
+    result = asyncio.run(_run_one(job, out, cancel_event, job_id))
+    return _exit_code(result, interrupted.is_set())
+
+
+def _claim(spool: str, name: str) -> str | None:
+    src = os.path.join(spool, name)
+    dst = os.path.join(spool, "running", name)
+    try:
+        # rename is atomic, so two daemons sharing a spool never run the same file
+        os.rename(src, dst)
+    except OSError:
+        return None
+    return dst
+
+
+def _requeue_abandoned(spool: str, out: JsonLogger):
+    """Move files whose daemon died mid-run back into the spool so they run again."""
+    from seatbuddy.store import get_store
+
+    store = get_store()
+    running = os.path.join(spool, "running")
+    for name in sorted(os.listdir(running)):
+        job_id = os.path.splitext(name)[0]
+        job = store.get_job(job_id)
+        # "running" jobs belong to a live daemon. Unknown ones were claimed but never
+        # started; give a live daemon that just claimed one time to record it.
+        if job is not None and job["state"] != "abandoned":
+            continue
+        try:
+            if job is None and time.time() - os.stat(os.path.join(running, name)).st_ctime < 30:
+                continue
+        except OSError:
+            continue
+        try:
+            os.rename(os.path.join(running, name), os.path.join(spool, name))
+        except OSError:
+            continue
+        out.emit(event="requeue", job=job_id, previous=job and job["state"])
+
+
+def cmd_daemon(args) -> int:
+    import asyncio
+    from seatbuddy.waits import CancelEvent
+
+    out = JsonLogger()
+    spool = os.path.abspath(args.spool)
+    for sub in ("running", "done", "failed"):
+        os.makedirs(os.path.join(spool, sub), exist_ok=True)
+    _requeue_abandoned(spool, out)
+    stopping = threading.Event()
+    cancels: dict[str, CancelEvent] = {}
+
+    def _stop():
+        stopping.set()
+        for ev in list(cancels.values()):
+            ev.set()
+    _install_stop_handlers(_stop)
+
+    async def _job(path: str):
+        name = os.path.basename(path)
+        job_id = os.path.splitext(name)[0]
+        try:
+            job = load_job(path)
+        except JobFileError as e:
+            out.emit(event="error", job=job_id, msg=str(e))
+            os.replace(path, os.path.join(spool, "failed", name))
+            return
+        cancel_event = cancels[job_id] = CancelEvent()
+        try:
+            result = await _run_one(job, out, cancel_event, job_id)
+        except Exception as e:
+            # Record the failure here; an exception left on the task is only seen at shutdown
+            out.emit(event="error", job=job_id, msg=str(e) or type(e).__name__)
+            result = {"ok": False, "error": str(e) or type(e).__name__}
+        finally:
+            cancels.pop(job_id, None)
+        dest = "done" if result and result.get("ok") else "failed"
+        with open(os.path.join(spool, dest, f"{job_id}.result.json"), "w", encoding="utf-8") as f:
+            json.dump({"job": job_id, "result": result}, f, ensure_ascii=False)
+        os.replace(path, os.path.join(spool, dest, name))
+
+    async def _main():
+        tasks: set = set()
+        out.emit(event="daemon", msg="watching", spool=spool, maxJobs=args.max_jobs)
+        while not stopping.is_set():
+            if len(tasks) < args.max_jobs:
+                for name in sorted(os.listdir(spool)):
+                    if len(tasks) >= args.max_jobs:
+                        break
+                    if not name.endswith(_JOB_SUFFIXES) or name.startswith("."):
+                        continue
+                    path = _claim(spool, name)
+                    if path:
+                        task = asyncio.create_task(_job(path))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+            await asyncio.sleep(args.poll)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        out.emit(event="daemon", msg="stopped")
+
+    asyncio.run(_main())
+    return EXIT_OK
+
+
+def cmd_serve(args) -> int:
+    from seatbuddy.api import JobHub, make_server
+
+    out = JsonLogger()
+    hub = JobHub(max_jobs=args.max_jobs)
+    server = make_server(args.host, args.port, hub)
+
+    def _stop():
+        for job in hub.list():
+            hub.stop(job["jobId"])
+        # shutdown() waits for serve_forever, which runs on this (the main) thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+    _install_stop_handlers(_stop)
+    out.emit(event="serve", msg="listening", host=args.host, port=server.server_address[1])
+    try:
+        server.serve_forever(poll_interval=0.2)
+    finally:
+        server.server_close()
+    for job in hub.list():
+        chan = hub.get(job["jobId"])
+        if chan is not None and chan.future is not None:
+            try:
+                chan.future.result(timeout=10)
+            except Exception:
+                pass
+    out.emit(event="serve", msg="stopped")
+    return EXIT_OK
+
+
+def cmd_history(args) -> int:
+    from seatbuddy.history import get_history
+
+    history = get_history()
+    if history is None:
+        print("좌석 이력 저장이 꺼져 있습니다 ($SEATBUDDY_HISTORY).", file=sys.stderr)
+        return EXIT_BAD_JOB
+    stats = history.route_stats(args.dep, args.arr, args.date)
+    print(json.dumps(stats, ensure_ascii=False))
+    return EXIT_OK
+
+
+def cmd_mocksite(args) -> int:
+    from seatbuddy.mocksite import MockState, make_server
+
+    out = JsonLogger()
+    server = make_server(args.host, args.port, MockState(args.seat_rate, args.book_rate, args.session_ttl))
+    _install_stop_handlers(lambda: threading.Thread(target=server.shutdown, daemon=True).start())
+    out.emit(event="mocksite", msg="listening", host=args.host, port=server.server_address[1])
+    try:
+        server.serve_forever(poll_interval=0.2)
+    finally:
+        server.server_close()
+    return EXIT_OK
+
+
+def cmd_soak(args) -> int:
+    out = JsonLogger(sys.stderr)
+    # Soak jobs must not fill the real availability history
+    os.environ.setdefault("SEATBUDDY_HISTORY", "off")
+    # All soak jobs use one fake account; an account budget would cap the throughput being measured
+    os.environ.setdefault("SEATBUDDY_ACCOUNT_QPS", "off")
+    server = None
+    if args.site:
+        os.environ["SEATBUDDY_SITE_URL"] = args.site
+    else:
+        from seatbuddy.mocksite import MockState, make_server
+
+        server = make_server("127.0.0.1", 0, MockState(args.seat_rate, 0.0))
+        threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.2}, daemon=True).start()
+        # Read when seatbuddy.automation is first imported, which happens below
+        os.environ["SEATBUDDY_SITE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    from seatbuddy import soak
+
+    try:
+        scenarios = [] if args.bench_only else soak.parse_scenarios(args.scenarios)
+    except ValueError:
+        print(f"잘못된 시나리오: {args.scenarios} (예: 1x1,1x5,3x5)", file=sys.stderr)
+        return EXIT_BAD_JOB
+    bench = soak.bench_recorder()
+    out.emit(event="soak", msg="bench", **bench)
+    results = []
+    for jobs, workers in scenarios:
+        out.emit(event="soak", msg="scenario", jobs=jobs, workers=workers)
+        results.append(soak.run_scenario(jobs, workers, args.duration, args.interval, args.speed,
+                                         lambda msg: out.emit(event="soak", msg=msg)))
+        out.emit(event="soak", msg="result", **results[-1])
+    if server is not None:
+        server.shutdown()
+    if results:
+        print(soak.format_table(results))
+    print("  ".join(f"{k}={v}" for k, v in bench.items()))
+    if args.report:
+        soak.save_report(args.report, results, bench)
+    if not args.baseline:
+        return EXIT_OK
+    if args.save_baseline or not os.path.exists(args.baseline):
+        soak.save_report(args.baseline, results, bench)
+        print(f"기준값 저장: {args.baseline}")
+        return EXIT_OK
+    regressions = soak.compare(results, soak.load_report(args.baseline), bench)
+    for line in regressions:
+        print(f"회귀: {line}")
+    return EXIT_REGRESSION if regressions else EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="python -m seatbuddy", description="SRT 자동 예매 작업 실행기 (헤드리스)")
+    sub = p.add_subparsers(dest="command", required=True)
+    r = sub.add_parser("run", help="run one job file and exit with its status")
+    r.add_argument("job", help="job file (.json, .yaml)")
+    r.add_argument("--workers", type=int, help="override parallelCount")
+    r.add_argument("--process", action="store_true", help="run workers in the process pool")
+    r.set_defaults(func=cmd_run)
+    d = sub.add_parser("daemon", help="run job files dropped into a spool directory")
+    d.add_argument("--spool", required=True, help="directory to watch; uses running/, done/, failed/ inside it")
+    d.add_argument("--max-jobs", type=int, default=4, help="concurrent jobs (default 4)")
+    d.add_argument("--poll", type=float, default=1.0, help="seconds between spool scans")
+    d.set_defaults(func=cmd_daemon)
+    s = sub.add_parser("serve", help="HTTP API: start/stop jobs, stream logs as Server-Sent Events")
+    s.add_argument("--host", default="127.0.0.1", help="bind address (default 127.0.0.1)")
+    s.add_argument("--port", type=int, default=8765, help="port (default 8765)")
+    s.add_argument("--max-jobs", type=int, default=4, help="concurrent jobs (default 4)")
+    s.set_defaults(func=cmd_serve)
+    h = sub.add_parser("history", help="when seats reappeared on a route and how long they stayed open")
+    h.add_argument("dep", help="departure station")
+    h.add_argument("arr", help="arrival station")
+    h.add_argument("--date", help="only this travel date (YYYY-MM-DD)")
+    h.set_defaults(func=cmd_history)
+    m = sub.add_parser("mocksite", help="serve a local stand-in for the SRT pages (point SEATBUDDY_SITE_URL at it)")
+    m.add_argument("--host", default="127.0.0.1", help="bind address (default 127.0.0.1)")
+    m.add_argument("--port", type=int, default=8800, help="port (default 8800)")
+    m.add_argument("--seat-rate", type=float, default=0.05, help="chance a seat is bookable on each query")
+    m.add_argument("--book-rate", type=float, default=0.0, help="chance a click on a bookable seat succeeds")
+    m.add_argument("--session-ttl", type=float, help="seconds until a login expires (default never)")
+    m.set_defaults(func=cmd_mocksite)
+    k = sub.add_parser("soak", help="scale/soak runs against the mock site with resource and leak report")
+    k.add_argument("--scenarios", default="1x1,1x5,1x10,1x20,3x5", help="JOBSxWORKERS list (default 1x1,1x5,1x10,1x20,3x5)")
+    k.add_argument("--duration", type=float, default=120.0, help="seconds per scenario (default 120)")
+    k.add_argument("--interval", type=float, default=2.0, help="seconds between resource samples")
+    k.add_argument("--speed", type=int, default=5, help="refreshSpeed of the jobs (1-10)")
+    k.add_argument("--seat-rate", type=float, default=0.05, help="mock site: chance a seat is bookable")
+    k.add_argument("--site", help="run against this site instead of a built-in mock site")
+    k.add_argument("--baseline", help="baseline report to compare with (created if missing)")
+    k.add_argument("--save-baseline", action="store_true", help="overwrite the baseline with this run")
+    k.add_argument("--report", help="also write this run's report here")
+    k.add_argument("--bench-only", action="store_true", help="only the micro-benchmarks (no browsers)")
+    k.set_defaults(func=cmd_soak)
+    return p
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
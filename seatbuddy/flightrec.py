@@ -0,0 +1,90 @@
+"""Per-worker flight recorder: the last steps before a failure (or a booking).
+
+Every log line, structured event (attempt, timing, recovery, swap, ...), phase
+and poll summary of a worker goes into a fixed-size in-memory ring; recording is
+one ``deque.append``. Only when the worker fails or books is the ring written to
+disk, together with one screenshot and the page DOM:
+
+    ~/.seatbuddy/flight/<time>-<job>-w<worker>-<reason>/steps.json, screenshot.png, dom.html
+
+``SEATBUDDY_FLIGHT_DIR`` moves the dumps (``off`` disables them) and only the
+newest ``MAX_DUMPS`` are kept. ``SEATBUDDY_FLIGHT_STEPS`` sets the ring size.
+"""
+import json
+import os
+import shutil
+import time
+from collections import deque
+
+FLIGHT_DIR_ENV = "SEATBUDDY_FLIGHT_DIR"
+DEFAULT_STEPS = int(os.environ.get("SEATBUDDY_FLIGHT_STEPS") or 200)
+MAX_DUMPS = 50
+
+
+def flight_root() -> str | None:
+    root = os.environ.get(FLIGHT_DIR_ENV) or os.path.join(os.path.expanduser("~"), ".seatbuddy", "flight")
+    return None if root.lower() in ("off", "0", "false", "no") else root
+
+
+class FlightRecorder:
+    def __init__(self, size: int = DEFAULT_STEPS):
+        self._steps: deque = deque(maxlen=max(1, size))
+
+    def record(self, action: str, **fields):
+        self._steps.append((time.time(), action, fields))
+
+    def wrap_log(self, log):
+        """A ``log(msg, kind)`` that also records each line."""
+        steps = self._steps
+
+        def _log(msg: str, kind: str = "info"):
+            steps.append((time.time(), "log", {"kind": kind, "msg": msg}))
+            log(msg, kind)
+        return _log
+
+    def steps(self) -> list[dict]:
+        out, prev = [], None
+        for ts, action, fields in list(self._steps):
+            out.append(dict(fields, ts=round(ts, 3), dt=round(ts - prev, 3) if prev else 0.0, action=action))
+            prev = ts
+        return out
+
+    def dump(self, reason: str, driver=None, meta: dict | None = None) -> str | None:
+        """Write the ring (and, with ``driver``, a screenshot and the DOM); returns the directory."""
+        root = flight_root()
+        if root is None:
+            return None
+        meta = meta or {}
+        now = time.time()
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now * 1000) % 1000:03d}"
+        name = f"{stamp}-{meta.get('job') or 'job'}-w{meta.get('worker') or 0}-{reason}"
+        path = os.path.join(root, name)
+        try:
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, "steps.json"), "w", encoding="utf-8") as f:
+                json.dump({"reason": reason, "meta": meta, "steps": self.steps()}, f, ensure_ascii=False,
+                          indent=1, default=str)
+        except OSError:
+            return None
+        if driver is not None:
+            try:
+                driver.get_screenshot_as_file(os.path.join(path, "screenshot.png"))
+            except Exception:
+                pass
+            try:
+                with open(os.path.join(path, "dom.html"), "w", encoding="utf-8") as f:
+                    f.write(driver.page_source)
+            except Exception:
+                pass
+        _prune(root)
+        return path
+
+
+def _prune(root: str):
+    try:
+        names = sorted(n for n in os.listdir(root) if os.path.isdir(os.path.join(root, n)))
+    except OSError:
+        return
+    # Names start with a timestamp, so sorted order is oldest first
+    for name in names[:max(0, len(names) - MAX_DUMPS)]:
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
@@ -0,0 +1,240 @@
+"""Append-only history of seat availability changes, for polling and capacity planning.
+
+Every poll sees the state of each (train, seat class) on the result table; only
+the changes are kept. A series is one (route, date, train, class); its keys live
+in ``series.jsonl`` (line number = series id). The changes go to ``avail.bin``, a
+memory-mapped array of fixed 9-byte records (series id, tenths of a second since
+the previous record, bookable) behind a 32-byte header. Appends take an
+``flock`` on the file, so workers in other processes share it.
+
+    from seatbuddy.history import get_history
+    get_history().route_stats("수서", "부산")  # when seats reappear, how long they stay
+
+Disable with ``SEATBUDDY_HISTORY=off``; any other value is the directory to use.
+"""
+import contextlib
+import datetime
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process locking only
+    fcntl = None
+
+from seatbuddy import ranking
+from seatbuddy.pacing import SITE_TZ, departure_ts
+
+HISTORY_ENV = "SEATBUDDY_HISTORY"
+_HEADER = struct.Struct("<4sHHdQQ")  # magic, version, reserved, base epoch, record count, last tick
+_RECORD = struct.Struct("<IIB")  # series id, ticks since previous record, bookable
+_MAGIC = b"SBAH"
+_VERSION = 1
+_TICK_SEC = 0.1
+_GROW_BYTES = 256 * 1024
+_MAX_DELTA = 2 ** 32 - 1
+# Buckets of "how long before departure did seats reappear", in hours
+_LEAD_BUCKETS = ((1, "<1h"), (3, "1-3h"), (12, "3-12h"), (24, "12-24h"), (None, ">24h"))
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else 0.0
+
+
+class AvailabilityHistory:
+    def __init__(self, root: str):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self._lock = threading.Lock()
+        self._keys_path = os.path.join(root, "series.jsonl")
+        self._keys: list[tuple] = []
+        self._ids: dict[tuple, int] = {}
+        self._keys_offset = 0
+        self._fd = os.open(os.path.join(root, "avail.bin"), os.O_RDWR | os.O_CREAT, 0o644)
+        self._map = None
+        self._seen = 0  # records folded into _state
+        self._state: dict[int, bool] = {}
+        with self._locked():
+            if os.fstat(self._fd).st_size < _HEADER.size:
+                os.ftruncate(self._fd, _GROW_BYTES)
+                self._remap()
+                _HEADER.pack_into(self._map, 0, _MAGIC, _VERSION, 0, time.time(), 0, 0)
+            else:
+                self._remap()
+            # Checked before any record is read; a foreign file's "count" is garbage
+            foreign = self._header()[0] != _MAGIC
+            if not foreign:
+                self._catch_up()
+        if foreign:
+            self.close()
+            raise OSError(f"not an availability history file: {self.root}")
+
+    # --- file plumbing ---
+    @contextlib.contextmanager
+    def _locked(self):
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _remap(self):
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._fd, os.fstat(self._fd).st_size)
+
+    def _header(self) -> tuple:
+        return _HEADER.unpack_from(self._map, 0)
+
+    def _catch_up(self):
+        # Another process may have grown the file, added series or appended records
+        if self._map is None or len(self._map) != os.fstat(self._fd).st_size:
+            self._remap()
+        if os.path.exists(self._keys_path) and os.path.getsize(self._keys_path) > self._keys_offset:
+            with open(self._keys_path, "rb") as f:
+                f.seek(self._keys_offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    self._keys_offset += len(line)
+                    key = tuple(json.loads(line))
+                    self._ids[key] = len(self._keys)
+                    self._keys.append(key)
+        count = self._header()[4]
+        for sid, _delta, bookable in self._records(self._seen, count):
+            self._state[sid] = bool(bookable)
+        self._seen = count
+
+    def _records(self, start: int, end: int):
+        lo = _HEADER.size + start * _RECORD.size
+        return _RECORD.iter_unpack(self._map[lo:_HEADER.size + end * _RECORD.size])
+
+    def _series_id(self, key: tuple) -> int:
+        sid = self._ids.get(key)
+        if sid is None:
+            with open(self._keys_path, "ab") as f:
+                line = (json.dumps(list(key), ensure_ascii=False) + "\n").encode("utf-8")
+                f.write(line)
+            self._keys_offset += len(line)
+            sid = self._ids[key] = len(self._keys)
+            self._keys.append(key)
+        return sid
+
+    def _append(self, changes: list[tuple[int, bool]]):
+        magic, version, _r, base, count, last_tick = self._header()
+        need = _HEADER.size + (count + len(changes)) * _RECORD.size
+        if need > len(self._map):
+            os.ftruncate(self._fd, need + _GROW_BYTES)
+            self._remap()
+        # Clock steps backwards record as "no time passed"
+        delta = min(_MAX_DELTA, max(0, int((time.time() - base) / _TICK_SEC) - last_tick))
+        last_tick += delta
+        off = _HEADER.size + count * _RECORD.size
+        for sid, bookable in changes:
+            _RECORD.pack_into(self._map, off, sid, delta, int(bookable))
+            off += _RECORD.size
+            self._state[sid] = bookable
+            delta = 0
+        count += len(changes)
+        _HEADER.pack_into(self._map, 0, magic, version, 0, base, count, last_tick)
+        self._seen = count
+
+    # --- write path ---
+    def observe(self, dep: str, arr: str, yyyymmdd: str, snapshot: dict | None, cols: dict, srt_only: bool = True) -> int:
+        """Record what changed on one result table; returns the number of changes."""
+        seats = ranking.availability(snapshot, cols, srt_only)
+        if not seats:
+            return 0
+        with self._locked():
+            self._catch_up()
+            changes = []
+            for train, dep_min, label, bookable in seats:
+                sid = self._series_id((dep, arr, yyyymmdd, train, label, dep_min))
+                if self._state.get(sid) != bookable:
+                    changes.append((sid, bookable))
+            if changes:
+                self._append(changes)
+        return len(changes)
+
+    # --- queries ---
+    def events(self, dep: str | None = None, arr: str | None = None, date: str | None = None):
+        """Yield ``(epoch seconds, series key, bookable)`` for every recorded change, oldest first."""
+        yyyymmdd = (date or "").replace("-", "")
+        with self._locked():
+            self._catch_up()
+            base, count = self._header()[3], self._header()[4]
+            keys = list(self._keys)
+            raw = list(self._records(0, count))
+        tick = 0
+        for sid, delta, bookable in raw:
+            tick += delta
+            key = keys[sid] if sid < len(keys) else None
+            if key is None or (dep and key[0] != dep) or (arr and key[1] != arr) or (yyyymmdd and key[2] != yyyymmdd):
+                continue
+            yield base + tick * _TICK_SEC, key, bool(bookable)
+
+    def route_stats(self, dep: str, arr: str, date: str | None = None) -> dict:
+        """When seats reappear on a route (hour of day, time before departure) and how long they stay."""
+        by_hour = [0] * 24
+        lead = {name: 0 for _h, name in _LEAD_BUCKETS}
+        opened: dict[tuple, float] = {}
+        known: set[tuple] = set()
+        durations: list[float] = []
+        changes = 0
+        for ts, key, bookable in self.events(dep, arr, date):
+            changes += 1
+            first = key not in known
+            known.add(key)
+            if bookable:
+                # Seats already open when first seen did not reappear; their start is unknown
+                if not first:
+                    opened[key] = ts
+                    by_hour[datetime.datetime.fromtimestamp(ts, SITE_TZ).hour] += 1
+                    departs = departure_ts(key[2], key[5])
+                    if departs is not None:
+                        hours = (departs - ts) / 3600
+                        lead[next(name for h, name in _LEAD_BUCKETS if h is None or hours < h)] += 1
+            elif key in opened:
+                durations.append(ts - opened.pop(key))
+        durations.sort()
+        return {
+            "route": f"{dep}→{arr}", "date": date, "series": len(known), "changes": changes,
+            "reappeared": sum(by_hour), "reappeared_by_hour": by_hour, "reappeared_before_departure": lead,
+            "open_seconds": {"count": len(durations), "p50": _percentile(durations, 0.5),
+                             "p90": _percentile(durations, 0.9), "max": durations[-1] if durations else 0.0},
+        }
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            os.close(self._fd)
+
+
+_default: AvailabilityHistory | None = None
+_default_lock = threading.Lock()
+_disabled = False
+
+
+def get_history() -> AvailabilityHistory | None:
+    """Process-wide history, or None when disabled or the directory is unusable."""
+    global _default, _disabled
+    with _default_lock:
+        if _default is None and not _disabled:
+            root = os.environ.get(HISTORY_ENV) or os.path.join(os.path.expanduser("~"), ".seatbuddy", "history")
+            if root.lower() in ("off", "0", "false", "no"):
+                _disabled = True
+                return None
+            try:
+                _default = AvailabilityHistory(root)
+            except OSError:
+                _disabled = True
+        return _default
@@ -0,0 +1,49 @@
+"""Small thread-safe counters, gauges and timing summaries for a job."""
+import threading
+from collections import deque
+
+_MAX_SAMPLES = 512
+
+
+class JobMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, int] = {}
+        self._timings: dict[str, deque] = {}
+        self._totals: dict[str, list] = {}
+        self._gauges: dict[str, float] = {}
+
+    def incr(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def gauge(self, name: str, value: float):
+        with self._lock:
+            self._gauges[name] = float(value)
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            self._timings.setdefault(name, deque(maxlen=_MAX_SAMPLES)).append(float(seconds))
+            total = self._totals.setdefault(name, [0, 0.0])
+            total[0] += 1
+            total[1] += float(seconds)
+
+    def samples(self, name: str) -> list[float]:
+        """The most recent observations of ``name``, oldest first."""
+        with self._lock:
+            return list(self._timings.get(name, ()))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            out: dict = {"counters": dict(self._counters), "gauges": dict(self._gauges), "timings": {}}
+            for name, samples in self._timings.items():
+                ordered = sorted(samples)
+                count, total = self._totals[name]
+                out["timings"][name] = {
+                    "count": count,
+                    "mean": total / count if count else 0.0,
+                    "p50": ordered[len(ordered) // 2] if ordered else 0.0,
+                    "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0,
+                    "max": ordered[-1] if ordered else 0.0,
+                }
+            return out
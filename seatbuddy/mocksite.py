@@ -0,0 +1,183 @@
+"""Local stand-in for the SRT login, search and reservation pages, for load tests.
+
+    python -m seatbuddy mocksite --port 8800
+    SEATBUDDY_SITE_URL=http://127.0.0.1:8800 python -m seatbuddy run job.yaml
+
+Serves the element ids, result-table layout and alerts ``SrtWorker`` relies on.
+Each query re-rolls every seat: bookable with probability ``seat_rate``. A click
+on a bookable seat reaches the payment page with probability ``book_rate`` and
+otherwise gets the "no seats left" alert, so with the default ``book_rate`` of 0
+jobs poll (and recover from failed attempts) until they are stopped.
+"""
+import datetime
+import html
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+LOGIN_PATH = "/cmc/01/selectLoginForm.do"
+SEARCH_PATH = "/hpg/hra/01/selectScheduleList.do"
+RESERVE_PATH = "/hpg/hra/02/requestReservationInfo.do"
+ROWS = 10
+_HEADS = ("구분", "열차종류", "열차번호", "출발역", "도착역", "특실", "일반실", "예약대기")
+
+_PAGE = """<!doctype html>
+<html lang="ko"><head><meta charset="utf-8"><title>SRT (mock)</title></head>
+<body>{body}</body></html>"""
+
+_LOGIN = """
+<form method="post" action="{path}">
+  <input type="text" id="srchDvNm01" name="srchDvNm01">
+  <input type="password" id="hmpgPwdCphd01" name="hmpgPwdCphd01">
+  <input type="submit" class="loginSubmit" value="확인">
+</form>"""
+
+_SEARCH = """
+<form id="search-form" method="get" action="{path}">
+  <fieldset><div><div><ul>
+    <li><input type="text" id="dptRsStnCdNm" name="dptRsStnCdNm" value="{dep}"></li>
+    <li><input type="text" id="arvRsStnCdNm" name="arvRsStnCdNm" value="{arr}"></li>
+    <li><select id="dptDt" name="dptDt">{dates}</select><select id="dptTm" name="dptTm">{times}</select></li>
+    <li><div>열차종류</div><div>
+      <input type="radio" name="trnGpCd" value="109" checked>
+      <input type="radio" name="trnGpCd" id="trnGpCdSRT" value="SRT">
+    </div></li>
+  </ul></div></div></fieldset>
+  <input type="button" value="조회하기" onclick="this.form.submit()">
+</form>
+{results}"""
+
+
+class MockState:
+    def __init__(self, seat_rate: float = 0.05, book_rate: float = 0.0, session_ttl: float | None = None):
+        self.seat_rate = seat_rate
+        self.book_rate = book_rate
+        self.session_ttl = session_ttl
+        self.lock = threading.Lock()
+        self.sessions: dict[str, float] = {}
+        self.counts = {"logins": 0, "queries": 0, "reserve_clicks": 0, "bookings": 0}
+
+    def count(self, name: str):
+        with self.lock:
+            self.counts[name] += 1
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    state: MockState = None  # set by make_server
+    protocol_version = "HTTP/1.1"
+    server_version = "seatbuddy-mock"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send_html(self, body: str, code: int = 200, headers: dict | None = None):
+        data = _PAGE.format(body=body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _redirect(self, location: str, headers: dict | None = None):
+        self.send_response(302)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+
+    def _session_ok(self) -> bool:
+        sid = ""
+        for part in (self.headers.get("Cookie") or "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == "mock_session":
+                sid = value
+        with self.state.lock:
+            started = self.state.sessions.get(sid)
+        if started is None:
+            return False
+        return self.state.session_ttl is None or time.time() - started < self.state.session_ttl
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if url.path != LOGIN_PATH:
+            return self._send_html("not found", 404)
+        sid = f"{random.getrandbits(64):016x}"
+        with self.state.lock:
+            self.state.sessions[sid] = time.time()
+        self.state.count("logins")
+        self._redirect("/", {"Set-Cookie": f"mock_session={sid}; Path=/"})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == LOGIN_PATH:
+            return self._send_html(_LOGIN.format(path=LOGIN_PATH))
+        if url.path == "/":
+            return self._send_html("<h1>SRT (mock)</h1>")
+        if url.path == SEARCH_PATH:
+            if not self._session_ok():
+                return self._redirect(LOGIN_PATH)
+            return self._send_html(self._search_page(query))
+        if url.path == RESERVE_PATH:
+            if not self._session_ok():
+                return self._send_html("<script>alert('로그인 후 사용하십시오.');</script>")
+            self.state.count("reserve_clicks")
+            if random.random() < self.state.book_rate:
+                self.state.count("bookings")
+                return self._send_html('<div id="isFalseGotoMain">결제하기</div>')
+            return self._send_html("<script>alert('잔여석이 없습니다.'); history.back();</script>")
+        self._send_html("not found", 404)
+
+    def _search_page(self, query: dict) -> str:
+        dep = html.escape(query.get("dptRsStnCdNm", ""))
+        arr = html.escape(query.get("arvRsStnCdNm", ""))
+        today = datetime.date.today()
+        days = [(today + datetime.timedelta(days=i)).strftime("%Y%m%d") for i in range(31)]
+        picked_day = query.get("dptDt") or days[0]
+        dates = "".join(f'<option value="{d}"{" selected" if d == picked_day else ""}>{d}</option>' for d in days)
+        picked_tm = query.get("dptTm") or "000000"
+        times = "".join(
+            f'<option value="{h:02d}0000"{" selected" if f"{h:02d}0000" == picked_tm else ""}>{h:02d}</option>'
+            for h in range(0, 24, 2))
+        results = self._results(dep, arr, picked_day, picked_tm) if "dptRsStnCdNm" in query else ""
+        return _SEARCH.format(path=SEARCH_PATH, dep=dep, arr=arr, dates=dates, times=times, results=results)
+
+    def _results(self, dep: str, arr: str, day: str, tm: str) -> str:
+        self.state.count("queries")
+        start = int(tm[:2] or 0) * 60
+        heads = "".join(f"<th>{h}</th>" for h in _HEADS)
+        rows = []
+        for i in range(ROWS):
+            minutes = start + 20 * i
+            if minutes >= 24 * 60:
+                break
+            train = 300 + i * 2
+            dep_time = f"{minutes // 60:02d}:{minutes % 60:02d}"
+            arr_minutes = minutes + 150
+            arr_time = f"{arr_minutes // 60 % 24:02d}:{arr_minutes % 60:02d}"
+            cells = ["SRT", "SRT", str(train), f"{dep}<br>{dep_time}", f"{arr}<br>{arr_time}"]
+            for label in ("특실", "일반실"):
+                if random.random() < self.state.seat_rate:
+                    link = RESERVE_PATH + "?" + urlencode({"trn": train, "dt": day, "cls": label})
+                    cells.append(f'<a href="{link}" class="btn_small"><span>예약하기</span></a>')
+                else:
+                    cells.append("<span>매진</span>")
+            cells.append("<span>-</span>")
+            rows.append("<tr>" + "".join(f"<td>{c}</td>" for c in cells) + "</tr>")
+        return (
+            '<form id="result-form"><fieldset><div class="tbl_wrap th_thead"><table>'
+            f"<thead><tr>{heads}</tr></thead><tbody>{''.join(rows)}</tbody></table></div></fieldset></form>"
+        )
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8800, state: MockState | None = None) -> ThreadingHTTPServer:
+    handler = type("Handler", (MockHandler,), {"state": state or MockState()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,256 @@
+"""Webhook notifications, delivered by one background dispatcher per process.
+
+``send()`` only enqueues (bounded queue), so a slow or dead endpoint never holds up
+a job. The dispatcher keeps one keep-alive connection per host, retries
+connection errors, 429 and 5xx with exponential backoff, and posts
+``progress()`` events in batches instead of one request per log line. Delivery
+counts and latencies are in ``Notifier.metrics``.
+
+Payloads are JSON objects with a ``type``: ``success`` (title, body, params,
+result) or ``progress`` (``events``: list of {jobId, ts, kind, msg}).
+"""
+import atexit
+import heapq
+import http.client
+import itertools
+import json
+import queue
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from seatbuddy.metrics import JobMetrics
+
+QUEUE_SIZE = 1000
+TIMEOUT_SEC = 5.0
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SEC = 1.0
+BACKOFF_MAX_SEC = 30.0
+PROGRESS_FLUSH_SEC = 10.0
+PROGRESS_BATCH_MAX = 50
+# Pooled connections unused for this long are closed
+IDLE_CLOSE_SEC = 60.0
+# Fields never sent to a webhook
+_SECRET_KEYS = ("password", "webhookUrl")
+
+
+def success_payload(params: dict, result: dict) -> dict:
+    body = f"{params.get('departureStation', '?')}→{params.get('arrivalStation', '?')} {params.get('date', '')} {params.get('time', '')}"
+    if result.get("target"):
+        body = result["target"]
+    return {
+        "type": "success", "title": "SRT 예약 성공", "body": body,
+        "params": {k: v for k, v in params.items() if k not in _SECRET_KEYS}, "result": result,
+    }
+
+
+def _call_log(log, msg: str, kind: str):
+    # The callback belongs to a job that may already be gone; its errors are not ours
+    if log is None:
+        return
+    try:
+        log(msg, kind)
+    except Exception:
+        pass
+
+
+class Notifier:
+    def __init__(self, queue_size: int = QUEUE_SIZE, timeout: float = TIMEOUT_SEC,
+                 progress_flush_sec: float = PROGRESS_FLUSH_SEC, backoff_base_sec: float = BACKOFF_BASE_SEC):
+        self.timeout = timeout
+        self.progress_flush_sec = progress_flush_sec
+        self.backoff_base_sec = backoff_base_sec
+        self.metrics = JobMetrics()
+        self._q: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._retries: list = []  # heap of (due, seq, item); dispatcher thread only
+        self._seq = itertools.count()
+        self._conns: dict[tuple, list] = {}  # (scheme, host:port) -> [connection, last used]
+        self._progress: dict[str, list] = {}
+        self._progress_lock = threading.Lock()
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._thread = threading.Thread(target=self._loop, name="notify-dispatcher", daemon=True)
+        self._thread.start()
+
+    # --- producers (any thread) ---
+    def send(self, url: str, payload: dict, log=None) -> bool:
+        """Queue one notification; False when the queue is full and it was dropped."""
+        return self._enqueue({"url": url, "payload": payload, "log": log, "attempt": 0,
+                              "queued": time.monotonic()})
+
+    def progress(self, url: str, job_id: str, msg: str, kind: str = "info"):
+        """Buffer one progress event; batches go out every ``progress_flush_sec``."""
+        event = {"jobId": job_id, "ts": time.time(), "kind": kind, "msg": msg}
+        with self._progress_lock:
+            batch = self._progress.setdefault(url, [])
+            batch.append(event)
+            full = len(batch) >= PROGRESS_BATCH_MAX
+        if full:
+            self._flush_progress(url)
+
+    def tee(self, url: str, job_id: str, log):
+        """Wrap a ``log(msg, kind)`` callable so every record is also sent as progress."""
+        def _log(msg: str, kind: str = "info"):
+            log(msg, kind)
+            self.progress(url, job_id, msg, kind)
+        return _log
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Send buffered progress and wait until nothing is queued or awaiting a retry."""
+        self._flush_progress()
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self._pending:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                self._idle.wait(left)
+        return True
+
+    def _enqueue(self, item: dict) -> bool:
+        with self._idle:
+            self._pending += 1
+        try:
+            self._q.put_nowait(item)
+        except queue.Full:
+            self.metrics.incr("dropped")
+            self._done()
+            return False
+        return True
+
+    def _flush_progress(self, url: str | None = None):
+        with self._progress_lock:
+            urls = [url] if url is not None else list(self._progress)
+            batches = [(u, self._progress.pop(u)) for u in urls if self._progress.get(u)]
+        for u, events in batches:
+            self._enqueue({"url": u, "payload": {"type": "progress", "events": events}, "log": None,
+                           "attempt": 0, "queued": time.monotonic()})
+
+    def _done(self):
+        with self._idle:
+            self._pending -= 1
+            if not self._pending:
+                self._idle.notify_all()
+
+    # --- dispatcher thread ---
+    def _loop(self):
+        next_progress = time.monotonic() + self.progress_flush_sec
+        while True:
+            now = time.monotonic()
+            wait = next_progress - now
+            if self._retries:
+                wait = min(wait, self._retries[0][0] - now)
+            try:
+                item = self._q.get(timeout=max(0.0, wait))
+            except queue.Empty:
+                pass
+            else:
+                self._attempt(item)
+            now = time.monotonic()
+            while self._retries and self._retries[0][0] <= now:
+                self._attempt(heapq.heappop(self._retries)[2])
+            if now >= next_progress:
+                next_progress = now + self.progress_flush_sec
+                self._flush_progress()
+                self._close_idle(now)
+
+    def _attempt(self, item: dict):
+        # One bad delivery must not end the thread; everything queued after it would wait forever
+        try:
+            self._deliver(item)
+        except Exception as e:
+            self.metrics.incr("failed")
+            print(f"웹훅 전송 오류: {e!r}", file=sys.stderr)
+            self._done()
+
+    def _deliver(self, item: dict):
+        item["attempt"] += 1
+        started = time.monotonic()
+        status, error, retryable = None, "", True
+        try:
+            status = self._post(item["url"], json.dumps(item["payload"], ensure_ascii=False, default=str).encode("utf-8"))
+            error = f"HTTP {status}"
+            retryable = status == 429 or status >= 500
+        except ValueError as e:
+            error, retryable = str(e), False
+        except (OSError, http.client.HTTPException) as e:
+            error = str(e) or type(e).__name__
+        except Exception as e:
+            error, retryable = f"{type(e).__name__}: {e}", False
+        self.metrics.observe("request", time.monotonic() - started)
+        log = item["log"]
+        if status is not None and 200 <= status < 300:
+            self.metrics.incr("sent")
+            self.metrics.observe("delivery", time.monotonic() - item["queued"])
+            _call_log(log, "웹훅 전송 완료", "success")
+            return self._done()
+        if retryable and item["attempt"] < MAX_ATTEMPTS:
+            self.metrics.incr("retries")
+            delay = min(BACKOFF_MAX_SEC, self.backoff_base_sec * 2 ** (item["attempt"] - 1))
+            heapq.heappush(self._retries, (time.monotonic() + delay * random.uniform(0.8, 1.2), next(self._seq), item))
+            return
+        self.metrics.incr("failed")
+        _call_log(log, f"웹훅 전송 실패({item['attempt']}회 시도): {error}", "warn")
+        self._done()
+
+    def _post(self, url: str, body: bytes) -> int:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"지원하지 않는 웹훅 URL: {url}")
+        key = (parts.scheme, parts.netloc)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        # A pooled connection the server has since closed fails on first use; retry that
+        # once on a fresh connection without counting it as an attempt.
+        for reused in (key in self._conns, False):
+            conn = self._connection(key)
+            try:
+                conn.request("POST", path, body=body, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+            except (OSError, http.client.HTTPException):
+                self._drop(key)
+                if reused:
+                    continue
+                raise
+            if resp.will_close:
+                self._drop(key)
+            else:
+                self._conns[key][1] = time.monotonic()
+            return resp.status
+        raise http.client.HTTPException("unreachable")
+
+    def _connection(self, key: tuple):
+        entry = self._conns.get(key)
+        if entry is None:
+            scheme, netloc = key
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            entry = self._conns[key] = [cls(netloc, timeout=self.timeout), time.monotonic()]
+            self.metrics.incr("connections")
+        return entry[0]
+
+    def _drop(self, key: tuple):
+        entry = self._conns.pop(key, None)
+        if entry is not None:
+            entry[0].close()
+
+    def _close_idle(self, now: float):
+        for key, (_conn, used) in list(self._conns.items()):
+            if now - used > IDLE_CLOSE_SEC:
+                self._drop(key)
+
+
+_default: Notifier | None = None
+_default_lock = threading.Lock()
+
+
+def get_notifier() -> Notifier:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Notifier()
+            # The dispatcher is a daemon thread; give queued notifications a chance on exit
+            atexit.register(_default.flush, 5.0)
+        return _default
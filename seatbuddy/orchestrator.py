@@ -0,0 +1,465 @@
+"""Asyncio orchestration of ``SrtWorker`` phases.
+
+Every job in the process runs on one shared event loop (a background thread).
+Workers are tasks; the blocking Selenium work of each phase runs on a bounded
+thread pool, so a thread is only held while a browser command is in flight and
+never while a worker waits between refreshes.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from seatbuddy.automation import MAX_SWAPS, URLS, PhaseTimeout, SessionExpired, SrtWorker, is_browser_dead
+from seatbuddy.budget import LOGIN_COST, get_budget
+from seatbuddy.notify import get_notifier, success_payload
+from seatbuddy.reaper import ABANDON_AFTER_SEC, get_registry
+from seatbuddy.schedule import ServerClock, format_ts, parse_start_at, warmup_sec
+from seatbuddy.standby import StandbyPool, standby_size
+from seatbuddy.targets import TargetScheduler, parse_targets
+from seatbuddy.waits import Cancelled
+
+# After a cancel (user stop or another worker won), workers get this long to quit
+# their browsers on their own before the job's browser trees are killed.
+CANCEL_DEADLINE_SEC = 3.0
+DRIVER_THREADS = int(os.environ.get("SEATBUDDY_DRIVER_THREADS") or min(32, (os.cpu_count() or 1) * 4))
+# A phase running longer than this is treated as a hung browser
+PHASE_TIMEOUTS = {"launch": 90.0, "login": 60.0, "search": 60.0, "poll": 60.0, "refresh": 20.0, "relogin": 120.0,
+                  "fire": 30.0}
+# A scheduled first query waits on the loop until this long before the target, then on a driver thread
+FIRE_LEAD_SEC = 0.5
+# Scheduled starts further out than this measure the server clock again before warming up
+CLOCK_RECHECK_SEC = 300.0
+_SUPERVISE_TICK_SEC = 0.05
+# How often a job updates its account budget utilization gauge
+BUDGET_REPORT_SEC = 5.0
+# How long a worker whose browser died waits for a standby still being launched
+STANDBY_WAIT_SEC = 20.0
+
+_loop: asyncio.AbstractEventLoop | None = None
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="seatbuddy-loop", daemon=True).start()
+        return _loop
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DRIVER_THREADS, thread_name_prefix="driver")
+        return _executor
+
+
+def submit(coro) -> Future:
+    """Schedule ``coro`` on the shared loop from any thread."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+class AsyncWorker:
+    """Async facade over ``SrtWorker``: each phase runs on the shared driver executor.
+
+    Doubles as the worker's watchdog: a crashed, lost or hung browser (see
+    ``is_browser_dead``) is swapped for a standby from ``standby`` or, failing that,
+    a freshly launched one, so the job keeps its parallelism.
+    """
+
+    def __init__(self, worker: SrtWorker, executor: ThreadPoolExecutor | None = None, standby=None,
+                 targets: TargetScheduler | None = None):
+        self.worker = worker
+        self.executor = executor or get_executor()
+        self.standby = standby
+        self.targets = targets
+
+    async def _phase(self, name: str, fn):
+        timeout = PHASE_TIMEOUTS[name]
+        flight = self.worker.flight
+        loop = asyncio.get_running_loop()
+        queued = time.monotonic()
+        started = [queued]
+        began = asyncio.Event()
+
+        def call():
+            started[0] = time.monotonic()
+            loop.call_soon_threadsafe(began.set)
+            return fn()
+
+        fut = loop.run_in_executor(self.executor, call)
+        # The timeout starts when a driver thread picks the call up; time queued behind
+        # other workers' phases says nothing about this browser
+        try:
+            await began.wait()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        wait = started[0] - queued
+        try:
+            res = await asyncio.wait_for(fut, max(0.0, timeout - (time.monotonic() - started[0])))
+        except asyncio.TimeoutError:
+            flight.record("phase", name=name, seconds=time.monotonic() - started[0], queued=wait, timeout=True)
+            raise PhaseTimeout(f"{name} 단계 시간 초과 ({timeout:.0f}s)")
+        flight.record("phase", name=name, seconds=time.monotonic() - started[0], queued=wait)
+        return res
+
+    async def _paid_phase(self, name: str, fn, cost: int):
+        """A phase that sends ``cost`` queries. The account budget is waited for here, on
+        the loop, not on a driver thread; the worker spends it via ``SrtWorker.pay``."""
+        w = self.worker
+        w.loop_budget = True
+        if cost:
+            await asyncio.sleep(w.take_budget(cost))
+            w.prepaid += cost
+        return await self._phase(name, fn)
+
+    async def _dump(self, reason: str, err: Exception | None = None):
+        # Screenshot and DOM are browser commands: keep them off the loop
+        dump = asyncio.get_running_loop().run_in_executor(self.executor, self.worker.dump_flight, reason, err)
+        try:
+            await asyncio.wait_for(dump, PHASE_TIMEOUTS["poll"])
+        except Exception:
+            pass
+
+    async def _replace(self, err: Exception):
+        old = self.worker
+        old.swaps += 1
+        started = time.monotonic()
+        old.log(f"브라우저 이상 감지({type(err).__name__}): 새 브라우저로 교체합니다.", "warn")
+        # Not awaited: a hung browser must not hold up its replacement
+        asyncio.get_running_loop().run_in_executor(self.executor, old.discard)
+        new = await self.standby.take(STANDBY_WAIT_SEC) if self.standby is not None else None
+        warm = new is not None
+        if new is None:
+            new = SrtWorker(old.params, old.log, old.cancelled, old.on_event)
+        new.adopt(old)
+        self.worker = new
+        if not warm:
+            await self._phase("launch", new.open_browser)
+            await self._paid_phase("login", new.login, LOGIN_COST)
+        await self._paid_phase("search", new.open_search, int(new.fired))
+        elapsed = time.monotonic() - started
+        new.emit("swap", seconds=elapsed, warm=warm)
+        new.log(f"브라우저 교체 완료 ({'대기 브라우저' if warm else '새로 실행'}, {elapsed:.1f}s)")
+
+    async def run(self) -> dict:
+        try:
+            await self._phase("launch", self.worker.open_browser)
+            await self._paid_phase("login", self.worker.login, LOGIN_COST)
+            await self._paid_phase("search", self.worker.open_search, int(self.worker.fired))
+            while True:
+                w = self.worker
+                try:
+                    if self.targets is not None and w.follow(self.targets):
+                        await self._paid_phase("search", w.open_search, int(w.fired))
+                    if not w.fired:
+                        await asyncio.sleep(max(0.0, w.fire_at - time.time() - FIRE_LEAD_SEC))
+                        await self._paid_phase("fire", w.fire, 1)
+                    try:
+                        res = await self._phase("poll", w.poll_once)
+                    except SessionExpired:
+                        # Same browser, fresh session: no relaunch
+                        await self._paid_phase("relogin", w.relogin, LOGIN_COST + int(w.fired))
+                        continue
+                    if res:
+                        # Let the job stop the other workers before the diagnostics dump
+                        w.emit("won")
+                        await self._dump("success")
+                        return res
+                    if w.recovery_due is not None:
+                        # A failed attempt left the table gone; re-submit, then poll again
+                        await self._paid_phase("search", w.finish_recovery, 1)
+                        continue
+                    if self.targets is not None:
+                        self.targets.report(w.target_key, w.last_candidates, w.last_fingerprint)
+                    delay = await self._paid_phase("refresh", w.refresh, 1)
+                except Exception as e:
+                    if not is_browser_dead(e) or w.swaps >= MAX_SWAPS:
+                        raise
+                    await self._replace(e)
+                    continue
+                await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.worker.fail(Cancelled())
+            raise
+        except Exception as e:
+            if not isinstance(e, Cancelled):
+                await self._dump("error", e)
+            return self.worker.fail(e)
+        finally:
+            # quit() may run while a cancelled phase is still inside the driver; that
+            # call then fails fast instead of waiting for its own timeout.
+            close = asyncio.get_running_loop().run_in_executor(self.executor, self.worker.close)
+            try:
+                await asyncio.shield(close)
+            except asyncio.CancelledError:
+                pass
+
+
+def _parallel_settings(params: dict) -> tuple[int, float]:
+    # Handle parallel workers with staggered start to avoid simultaneous logins
+    count = int(params.get("parallelCount") or 1)
+    count = max(1, min(20, count))
+    stagger = float(params.get("parallelStaggerSec") or 0.5)
+    if not (stagger >= 0.0):
+        stagger = 0.0
+    stagger = min(5.0, max(0.0, stagger))
+    return count, stagger
+
+
+def make_logger(log, idx: int):
+    def _log(msg: str, kind: str = "info"):
+        log(f"[{idx}] {msg}", kind)
+    return _log
+
+
+async def run_job(params: dict, log, cancel_event, job_id: str, metrics=None,
+                  heartbeat_timeout: float | None = ABANDON_AFTER_SEC, store=None,
+                  source: str = "ui") -> dict | None:
+    """Run all workers of one job; the first success cancels the rest.
+
+    With ``store`` (a ``seatbuddy.store.Store``) the job, its log lines, reservation
+    attempts and final result are persisted. A ``webhookUrl`` param gets the booking
+    result and, with ``webhookProgress``, batched log lines (see ``seatbuddy.notify``).
+    With ``startAt`` the workers get ready ahead of time and send their first query
+    at that instant of the server clock (see ``seatbuddy.schedule``).
+    """
+    loop = asyncio.get_running_loop()
+    registry = get_registry()
+    registry.open_job(job_id, cancel_event, heartbeat_timeout)
+    params = dict(params, jobId=job_id)
+
+    first_result = {"seconds": None}
+    winner = {"idx": None}
+    winner_lock = threading.Lock()
+
+    def claim(idx) -> bool:
+        """The first worker to book wins; claiming cancels the others at once."""
+        with winner_lock:
+            if winner["idx"] is None and not cancel_event.is_set():
+                winner["idx"] = idx
+                cancel_event.set()
+            return winner["idx"] == idx
+
+    def on_event(name: str, data: dict):
+        # Sent by a booking worker before its diagnostics dump (from a child process
+        # in process mode, through the bridge's drain thread)
+        if name == "won" and count > 1:
+            claim(data.get("worker"))
+        if name == "timing" and data["name"] == "target_to_first_result":
+            if first_result["seconds"] is None or data["seconds"] < first_result["seconds"]:
+                first_result["seconds"] = data["seconds"]
+        if name == "attempt":
+            if metrics is not None:
+                metrics.incr("attempts")
+            if store is not None:
+                store.add_attempt(job_id, data.get("worker"), data.get("row"), data.get("label"), bool(data.get("ok")))
+        elif metrics is None:
+            return
+        elif name == "timing":
+            metrics.observe(data["name"], data["seconds"])
+        elif name == "relogin":
+            metrics.incr("relogins")
+            metrics.observe("relogin", data["seconds"])
+        elif name == "swap":
+            metrics.incr("swaps_warm" if data.get("warm") else "swaps_cold")
+            metrics.observe("swap", data["seconds"])
+        elif name == "recovery":
+            # How the result table came back after a failed attempt, and how long it took
+            metrics.incr(f"recovery_{data['method']}")
+            metrics.observe("recovery", data["seconds"])
+
+    if store is not None:
+        store.create_job(job_id, params, source)
+        log = store.tee(job_id, log)
+    webhook = (params.get("webhookUrl") or "").strip()
+    notifier = get_notifier() if webhook else None
+    if notifier is not None and params.get("webhookProgress"):
+        log = notifier.tee(webhook, job_id, log)
+    count, stagger = _parallel_settings(params)
+    executor = get_executor()
+    best_result = {"value": None}
+    # "process": run each worker in the process pool instead of on the driver threads
+    bridge = None
+    if params.get("executionMode") == "process":
+        from seatbuddy.procpool import JobBridge
+        # The first bridge starts the manager process; keep that off the loop
+        bridge = await loop.run_in_executor(None, JobBridge, log, on_event)
+    # Warm standby browsers (thread mode; process workers restart cold in their child)
+    # Several (route, date, window) targets share this job's workers
+    targets = parse_targets(params)
+    scheduler = TargetScheduler(targets) if len(targets) > 1 else None
+    standby = None
+    standby_count = standby_size(params)
+    if standby_count and bridge is None:
+        standby = StandbyPool(params, log, cancel_event.is_set, standby_count, executor)
+
+    async def stagger_sleep(delay: float):
+        deadline = loop.time() + delay
+        while not cancel_event.is_set() and loop.time() < deadline:
+            await asyncio.sleep(min(_SUPERVISE_TICK_SEC, deadline - loop.time()))
+
+    async def measure_clock(clock: ServerClock) -> bool:
+        try:
+            await loop.run_in_executor(None, clock.measure)
+        except OSError as e:
+            log(f"서버 시계를 확인하지 못했습니다({e}). 이 PC의 시계를 기준으로 합니다.", "warn")
+            return False
+        return True
+
+    async def wait_for_warmup(start_at: float) -> float:
+        """Sleep until the workers should start getting ready; returns the local fire time."""
+        clock = ServerClock(URLS["search"])
+        if await measure_clock(clock):
+            log(f"서버 시계 차이 {clock.offset:+.3f}s (±{clock.uncertainty:.3f}s)")
+        warmup = warmup_sec(params, count, stagger)
+        log(f"{format_ts(start_at)}에 첫 조회를 보냅니다. {warmup:.0f}s 전부터 로그인과 조건 입력을 준비합니다.")
+        wait = clock.local_time(start_at) - warmup - time.time()
+        await stagger_sleep(wait)
+        # Measured again right before the workers start, so drift during a long wait does not count
+        if wait > CLOCK_RECHECK_SEC and not cancel_event.is_set() and clock.uncertainty is not None \
+                and await measure_clock(clock):
+            log(f"서버 시계 차이 재확인: {clock.offset:+.3f}s (±{clock.uncertainty:.3f}s)")
+        return clock.local_time(start_at)
+
+    budget = get_budget(params.get("userId"))
+    budget_since = {"granted": 0, "at": 0.0, "reported": 0.0}
+
+    def report_budget() -> float | None:
+        """Share of the account budget used (by every job of the account) since the workers started."""
+        elapsed = time.monotonic() - budget_since["at"]
+        if budget is None or elapsed < 1.0:
+            return None
+        used = min(1.0, (budget.granted() - budget_since["granted"]) / (budget.rate * elapsed))
+        budget_since["reported"] = time.monotonic()
+        if metrics is not None:
+            metrics.gauge("budget_utilization", used)
+        return used
+
+    async def one_worker(idx: int):
+        if cancel_event.is_set():
+            # Stopped while waiting for a scheduled start
+            return
+        if count == 1:
+            # Single worker path (preserve previous behavior: no prefix, no stagger)
+            wlog, p = log, params
+        else:
+            # Stagger login time per index + small jitter
+            await stagger_sleep(idx * stagger + random.uniform(0.0, 0.2))
+            # If cancelled already (another worker succeeded or user stopped), exit early
+            if cancel_event.is_set():
+                return
+            wlog, p = make_logger(log, idx), dict(params, workerIndex=idx)
+        if bridge is not None:
+            if scheduler is not None:
+                # Children cannot share the scheduler; each rotates over its own shard
+                shard = targets[idx::count] or [targets[idx % len(targets)]]
+                p = dict(p, targets=[{k: v for k, v in t.items() if k != "key"} for t in shard])
+            res = await bridge.run_worker(loop, p, "" if count == 1 else f"[{idx}] ")
+        else:
+            worker = SrtWorker(p, wlog, cancel_event.is_set, on_event)
+            if targets:
+                # A lone target still overrides the job's own fields; with several,
+                # spread the initial searches and let the scheduler take over
+                worker.set_target(targets[idx % len(targets)])
+            res = await AsyncWorker(worker, executor, standby, scheduler).run()
+        if count == 1:
+            best_result["value"] = res
+        elif res and res.get("ok") and claim(idx):
+            best_result["value"] = res
+
+    async def start_standby():
+        # After the workers' staggered logins, so the standbys do not log in alongside them
+        await stagger_sleep(count * stagger + 1.0)
+        standby.start()
+        log(f"대기 브라우저 {standby_count}개를 준비합니다.")
+
+    tasks: list[asyncio.Task] = []
+    standby_task = None
+    try:
+        try:
+            start_at = parse_start_at(params.get("startAt"))
+        except ValueError as e:
+            log(str(e), "error")
+            best_result["value"] = {"ok": False, "error": str(e)}
+            return best_result["value"]
+        if start_at is not None:
+            params = dict(params, fireAt=await wait_for_warmup(start_at))
+        if count > 1:
+            log(f"병렬 매크로 {count}개를 시작합니다. (로그인 간격 {stagger:.2f}s)")
+        if scheduler is not None:
+            log(f"조회 대상 {len(targets)}개를 매크로 {count}개가 나눠 조회합니다.")
+        if budget is not None:
+            budget_since.update(granted=budget.granted(), at=time.monotonic(), reported=time.monotonic())
+        tasks = [asyncio.create_task(one_worker(idx)) for idx in range(count)]
+        if standby is not None:
+            standby_task = asyncio.create_task(start_standby())
+        # Once cancelled (user stop or another worker won), cancel the remaining tasks and
+        # give them CANCEL_DEADLINE_SEC to quit; then kill their browsers outright.
+        tasks_cancelled = reaped = False
+        while True:
+            _done, pending = await asyncio.wait(tasks, timeout=_SUPERVISE_TICK_SEC)
+            if not pending:
+                break
+            if budget is not None and time.monotonic() - budget_since["reported"] > BUDGET_REPORT_SEC:
+                report_budget()
+            if not cancel_event.is_set():
+                continue
+            if not tasks_cancelled:
+                tasks_cancelled = True
+                if bridge is not None:
+                    # Children observe the shared flag and return on their own (they also
+                    # enforce the kill deadline for their browsers), so their tasks stay
+                    # alive until the child processes are actually idle.
+                    await loop.run_in_executor(None, bridge.cancel.set)
+                else:
+                    # The winner is left to finish its diagnostics dump
+                    for idx, t in enumerate(tasks):
+                        if t in pending and idx != winner["idx"]:
+                            t.cancel()
+            set_at = getattr(cancel_event, "set_at", None) or time.monotonic()
+            if bridge is None and not reaped and time.monotonic() - set_at > CANCEL_DEADLINE_SEC:
+                reaped = True
+                # Killing trees sleeps between signals; keep it off the shared loop
+                killed = await loop.run_in_executor(None, registry.reap_job, job_id)
+                if killed:
+                    log(f"응답 없는 브라우저 {killed}개를 강제 종료했습니다.", "warn")
+        used = report_budget()
+        if used is not None:
+            log(f"계정 조회 예산 사용률 {used:.0%} (계정 전체 초당 {budget.rate:g}회 기준)")
+        if first_result["seconds"] is not None:
+            log(f"목표 시각 → 첫 조회 결과: {first_result['seconds']:.2f}s")
+            if best_result["value"]:
+                best_result["value"]["targetToFirstResult"] = round(first_result["seconds"], 3)
+        set_at = getattr(cancel_event, "set_at", None)
+        if set_at is not None:
+            idle_after = time.monotonic() - set_at
+            if metrics is not None:
+                metrics.observe("cancel_to_idle", idle_after)
+            log(f"중지 신호 후 모든 브라우저 정리까지 {idle_after:.2f}s")
+    finally:
+        for t in tasks:
+            t.cancel()
+        if standby_task is not None:
+            standby_task.cancel()
+        if standby is not None:
+            await standby.close()
+        if bridge is not None:
+            await loop.run_in_executor(None, bridge.cancel.set)
+            await loop.run_in_executor(None, bridge.close)
+        await loop.run_in_executor(None, registry.close_job, job_id)
+        if store is not None:
+            result = best_result["value"]
+            store.finish_job(job_id, result, cancelled=cancel_event.is_set() and not (result and result.get("ok")))
+        if notifier is not None:
+            result = best_result["value"]
+            if result and result.get("ok"):
+                notifier.send(webhook, success_payload(params, result), log)
+    return best_result["value"]
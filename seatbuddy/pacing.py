@@ -0,0 +1,79 @@
+"""Adaptive delay between polls of one worker.
+
+Replaces the fixed speed-level pacing: the interval starts at the fastest rate the
+user's ``refreshSpeed`` allows and stays there while the result table keeps changing
+or shows seats. It backs off the longer the table stays the same and the more
+alerts or empty results the server returns, and near departure (when
+cancellations are most frequent) it backs off less. It never drops below
+``MIN_INTERVAL_SEC``.
+"""
+import datetime
+import os
+import random
+import time
+
+# Hard floor between two polls of one worker, whatever the speed level
+MIN_INTERVAL_SEC = float(os.environ.get("SEATBUDDY_MIN_POLL_SEC") or 0.3)
+# Quiet time after which a static table is polled at the slowest rate
+QUIET_FULL_SEC = 120.0
+# Inside this window before departure the quiet back-off is halved
+NEAR_DEPARTURE_SEC = 3 * 3600
+# Weight of the newest poll in the error-rate average
+ERROR_ALPHA = 0.2
+# At an error rate of 1.0 the interval is multiplied by 1 + ERROR_BACKOFF
+ERROR_BACKOFF = 4.0
+MAX_INTERVAL_SEC = 30.0
+# Timetables are in Korean time, whatever the machine's timezone
+SITE_TZ = datetime.timezone(datetime.timedelta(hours=9))
+
+
+def lerp(a: float, b: float, t: float) -> float:
+    return a + (b - a) * t
+
+
+def departure_ts(yyyymmdd: str, minutes: int | None) -> float | None:
+    """Epoch seconds of a departure (Korean time), or None when date or time is unknown."""
+    if not yyyymmdd or minutes is None:
+        return None
+    try:
+        day = datetime.datetime.strptime(yyyymmdd, "%Y%m%d").replace(tzinfo=SITE_TZ)
+    except ValueError:
+        return None
+    return (day + datetime.timedelta(minutes=minutes)).timestamp()
+
+
+class PollPacer:
+    def __init__(self, speed: float):
+        # speed is the 0..1 refreshSpeed level: it sets both the fastest and slowest rate
+        self.fast = max(MIN_INTERVAL_SEC, lerp(2.0, 0.1, speed))
+        self.slow = max(self.fast, lerp(8.0, 2.0, speed))
+        self.jitter = lerp(0.5, 0.25, speed)
+        self.error_rate = 0.0
+        self.last_change = time.monotonic()
+        self._fingerprints: dict = {}
+
+    def observe(self, key, fingerprint, rows: int, seats: int):
+        """Outcome of one poll: table fingerprint for target ``key``, rows shown, seats seen."""
+        now = time.monotonic()
+        if rows == 0:
+            # An empty result is how the site answers when it is overloaded
+            self.error()
+            return
+        self.error_rate *= 1 - ERROR_ALPHA
+        prev = self._fingerprints.get(key)
+        self._fingerprints[key] = fingerprint
+        # A target polled for the first time is not a change
+        if seats or (prev is not None and fingerprint != prev):
+            self.last_change = now
+
+    def error(self):
+        """An alert, empty page or other server-side failure."""
+        self.error_rate = self.error_rate * (1 - ERROR_ALPHA) + ERROR_ALPHA
+
+    def next_delay(self, departure: float | None = None) -> float:
+        quiet = min(1.0, (time.monotonic() - self.last_change) / QUIET_FULL_SEC)
+        if departure is not None and departure - time.time() < NEAR_DEPARTURE_SEC:
+            quiet /= 2
+        delay = lerp(self.fast, self.slow, quiet) * (1 + ERROR_BACKOFF * self.error_rate)
+        delay += random.uniform(0.0, self.jitter * delay)
+        return max(MIN_INTERVAL_SEC, min(MAX_INTERVAL_SEC, delay))
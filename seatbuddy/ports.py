@@ -0,0 +1,115 @@
+"""DevTools port allocation for headless Chrome.
+
+Every headless driver needs its own ``--remote-debugging-port``; two browsers on
+one port make the second fail with a ``DevToolsActivePort`` error. Ports come
+from one range shared by every seatbuddy process on the machine: a port is taken
+by holding an ``flock`` on ``<run dir>/port-<n>.lock`` (dropped automatically if
+the process dies) and is only handed out once a test bind on 127.0.0.1 succeeds,
+so ports used by anything else are skipped too. Drivers release their port when
+they quit.
+
+``SEATBUDDY_DEVTOOLS_PORTS`` sets the range (default ``9222-9621``).
+"""
+import os
+import socket
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: ports are only coordinated within this process
+    fcntl = None
+
+PORTS_ENV = "SEATBUDDY_DEVTOOLS_PORTS"
+DEFAULT_RANGE = (9222, 9621)
+
+
+def _parse_range(spec: str | None) -> tuple[int, int]:
+    try:
+        lo, _, hi = (spec or "").partition("-")
+        lo, hi = int(lo), int(hi or lo)
+        if 0 < lo <= hi < 65536:
+            return lo, hi
+    except ValueError:
+        pass
+    return DEFAULT_RANGE
+
+
+def _bindable(port: int) -> bool:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.bind(("127.0.0.1", port))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+class PortAllocator:
+    def __init__(self, lo: int, hi: int, root: str | None = None):
+        self.lo, self.hi = lo, hi
+        self.root = root or os.path.join(tempfile.gettempdir(), "seatbuddy-run")
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._held: dict[int, int | None] = {}  # port -> fd holding its flock
+        # Start where the last port was handed out so a just-released port (possibly
+        # still in TIME_WAIT or held by an exiting Chrome) is not the next one tried
+        self._next = lo + os.getpid() % (hi - lo + 1)
+
+    def _claim(self, port: int) -> tuple[bool, int | None]:
+        """(claimed, fd holding the lock); the fd is None without fcntl."""
+        if fcntl is None:
+            return True, None
+        fd = os.open(os.path.join(self.root, f"port-{port}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            # Held by another process
+            os.close(fd)
+            return False, None
+        return True, fd
+
+    def acquire(self) -> int:
+        size = self.hi - self.lo + 1
+        with self._lock:
+            for i in range(size):
+                port = self.lo + (self._next - self.lo + i) % size
+                if port in self._held:
+                    continue
+                claimed, fd = self._claim(port)
+                if not claimed:
+                    continue
+                if not _bindable(port):
+                    if fd is not None:
+                        os.close(fd)
+                    continue
+                self._held[port] = fd
+                self._next = port + 1 if port < self.hi else self.lo
+                return port
+        raise RuntimeError(f"사용 가능한 DevTools 포트가 없습니다 ({self.lo}-{self.hi})")
+
+    def release(self, port: int | None):
+        if port is None:
+            return
+        with self._lock:
+            fd = self._held.pop(port, None)
+        if fd is not None:
+            # Closing the descriptor drops the flock; the file stays for the next claim
+            os.close(fd)
+
+    def held(self) -> list[int]:
+        with self._lock:
+            return sorted(self._held)
+
+
+_default: PortAllocator | None = None
+_default_lock = threading.Lock()
+
+
+def get_port_allocator() -> PortAllocator:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = PortAllocator(*_parse_range(os.environ.get(PORTS_ENV)))
+        return _default
@@ -0,0 +1,163 @@
+"""Process-pool execution mode.
+
+Each worker runs ``run_srt_automation`` in a pooled child process, so a wedged
+or crashing driver only takes its own process down and Selenium client work is
+spread over several interpreters. Per job, a manager-backed event carries
+cancellation into the children and a manager queue streams their log records
+back to the parent's ``log`` callable (and worker events to ``on_event``).
+"""
+import atexit
+import multiprocessing as mp
+import os
+import signal
+import threading
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from seatbuddy.reaper import get_registry
+
+# Each worker holds a child for its whole run, so size for the largest parallel job;
+# children are spawned on demand.
+PROCESS_WORKERS = int(os.environ.get("SEATBUDDY_PROCESS_WORKERS") or 20)
+# Mirrors orchestrator.CANCEL_DEADLINE_SEC; children enforce it for their own browsers
+CHILD_CANCEL_DEADLINE_SEC = 3.0
+
+_pool: ProcessPoolExecutor | None = None
+_manager = None
+_lock = threading.Lock()
+_bridges: "weakref.WeakSet[JobBridge]" = weakref.WeakSet()
+
+
+def _cancel_all_at_exit():
+    # concurrent.futures joins the pool before regular atexit hooks run, and a child
+    # that is still polling would block that join forever; stop every job first.
+    for bridge in list(_bridges):
+        try:
+            bridge.cancel.set()
+        except Exception:
+            pass
+
+
+# Same hook concurrent.futures uses so we run before its join (plain atexit is too late)
+getattr(threading, "_register_atexit", atexit.register)(_cancel_all_at_exit)
+
+
+def _init_child():
+    # Ctrl-C belongs to the parent, which cancels jobs in an orderly way
+    try:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+    except (ValueError, OSError):
+        pass
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            # spawn: forking a process that already runs threads and Chrome is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=PROCESS_WORKERS,
+                mp_context=mp.get_context("spawn"),
+                initializer=_init_child,
+            )
+        return _pool
+
+
+def reset_pool(broken: ProcessPoolExecutor):
+    global _pool
+    with _lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def get_manager():
+    global _manager
+    with _lock:
+        if _manager is None:
+            _manager = mp.get_context("spawn").Manager()
+        return _manager
+
+
+def _run_in_child(params: dict, prefix: str, cancel, log_queue) -> dict:
+    from seatbuddy.automation import run_srt_automation
+
+    def log(msg: str, kind: str = "info"):
+        log_queue.put((f"{prefix}{msg}", kind))
+
+    def on_event(name: str, data: dict):
+        # Three-tuples are events; log records are (msg, kind)
+        log_queue.put(("event", name, data))
+
+    done = threading.Event()
+
+    def _enforce_deadline():
+        # Same contract as the in-process orchestrator: once cancelled, kill this
+        # job's browsers if they have not quit within the deadline.
+        while not done.wait(0.2):
+            if cancel.is_set():
+                if not done.wait(CHILD_CANCEL_DEADLINE_SEC):
+                    get_registry().reap_job(params.get("jobId"))
+                return
+
+    threading.Thread(target=_enforce_deadline, daemon=True).start()
+    try:
+        return run_srt_automation(params, log, cancel.is_set, on_event)
+    finally:
+        done.set()
+
+
+class JobBridge:
+    """Cross-process cancel flag and log stream for one job."""
+
+    def __init__(self, log, on_event=None):
+        manager = get_manager()
+        self.cancel = manager.Event()
+        self.queue = manager.Queue()
+        self._log = log
+        self._on_event = on_event
+        self._drainer = threading.Thread(target=self._drain, name="proc-log-drain", daemon=True)
+        self._drainer.start()
+        _bridges.add(self)
+
+    def _drain(self):
+        while True:
+            try:
+                item = self.queue.get()
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            if len(item) == 3:
+                if self._on_event is not None:
+                    self._on_event(item[1], item[2])
+                continue
+            msg, kind = item
+            self._log(msg, kind)
+
+    def close(self):
+        try:
+            self.queue.put(None)
+        except (EOFError, OSError):
+            return
+        self._drainer.join(timeout=2.0)
+
+    async def run_worker(self, loop, params: dict, prefix: str) -> dict:
+        # A broken pool fails every in-flight child, not only the one that crashed, so
+        # survivors get one restart on a fresh pool.
+        for attempt in range(2):
+            pool = get_pool()
+            started = time.monotonic()
+            try:
+                return await loop.run_in_executor(pool, _run_in_child, params, prefix, self.cancel, self.queue)
+            except BrokenProcessPool as e:
+                # A child died (driver crash, OOM kill). Replace the pool and kill the
+                # browsers the dead children left behind.
+                reset_pool(pool)
+                await loop.run_in_executor(None, get_registry().sweep_leftovers)
+                self._log(f"{prefix}워커 프로세스가 비정상 종료되었습니다 ({time.monotonic() - started:.1f}s): {e}", "error")
+                if attempt or self.cancel.is_set():
+                    return {"ok": False, "error": f"worker process died: {e}"}
+                self._log(f"{prefix}새 프로세스에서 다시 시작합니다.", "warn")
@@ -0,0 +1,279 @@
+"""Chrome user-data-dir management.
+
+Every driver gets its own clone of a small pre-seeded template profile (first run
+already done, Korean locale, noisy prompts disabled). Clones are deleted when the
+driver quits, and directories left behind by dead processes are collected the
+first time the manager is created. A process marks the template version it clones
+from as in use, and an older version is only removed once no live process has it
+marked.
+"""
+import contextlib
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from seatbuddy.reaper import pid_alive
+
+PROFILE_ROOT_ENV = "SEATBUDDY_PROFILE_ROOT"
+# Bump when the seeded files change; a new template directory is built and the old
+# one is removed by collect_orphans once no live process uses it
+TEMPLATE_VERSION = "1"
+# "<prefix><template dir>-<pid>": the process clones from that template
+IN_USE_PREFIX = ".in-use-"
+# Directories from the old mkdtemp-per-driver scheme; only removed once clearly stale
+LEGACY_PREFIX = "chrome-data-"
+LEGACY_MAX_AGE_SEC = 6 * 3600
+
+_PREFERENCES = {
+    "intl": {"accept_languages": "ko-KR,ko"},
+    "browser": {"has_seen_welcome_page": True, "check_default_browser": False},
+    "credentials_enable_service": False,
+    "profile": {
+        "password_manager_enabled": False,
+        "exit_type": "Normal",
+        "exited_cleanly": True,
+        "default_content_setting_values": {"notifications": 2, "geolocation": 2},
+    },
+    "translate": {"enabled": False},
+    "download": {"prompt_for_download": False},
+}
+_LOCAL_STATE = {
+    "browser": {"enabled_labs_experiments": []},
+    "user_experience_metrics": {"reporting_enabled": False},
+}
+
+
+def _chrome_lock_pid(path: str) -> int:
+    # Chrome keeps a SingletonLock symlink pointing at "<hostname>-<pid>" while running
+    try:
+        target = os.readlink(os.path.join(path, "SingletonLock"))
+        return int(target.rsplit("-", 1)[-1])
+    except (OSError, ValueError):
+        return 0
+
+
+class ProfileManager:
+    def __init__(self, root: str | None = None, spares: int = 1):
+        self.root = root or os.environ.get(PROFILE_ROOT_ENV) or os.path.join(tempfile.gettempdir(), "seatbuddy-profiles")
+        self.spares = max(0, int(spares))
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._spare: list[str] = []
+        self._active: set[str] = set()
+        self._refilling = False
+        os.makedirs(self.root, exist_ok=True)
+        self.template = self._ensure_template()
+
+    # --- template ---
+    def _ensure_template(self) -> str:
+        # Each version gets its own directory, so a template other processes are
+        # copying from is never replaced underneath them
+        name = f"template-v{TEMPLATE_VERSION}"
+        path = os.path.join(self.root, name)
+        # Marked before it is looked at, so a collector that still sees it unmarked
+        # can only have retired it before this check
+        with open(os.path.join(self.root, f"{IN_USE_PREFIX}{name}-{os.getpid()}"), "w", encoding="utf-8"):
+            pass
+        # The marker is written last, so its presence means the template is complete
+        if os.path.isfile(os.path.join(path, ".seatbuddy-template")):
+            return path
+        staging = tempfile.mkdtemp(prefix=".template-", dir=self.root)
+        os.makedirs(os.path.join(staging, "Default"), exist_ok=True)
+        with open(os.path.join(staging, "First Run"), "w", encoding="utf-8"):
+            pass
+        with open(os.path.join(staging, "Local State"), "w", encoding="utf-8") as f:
+            json.dump(_LOCAL_STATE, f)
+        with open(os.path.join(staging, "Default", "Preferences"), "w", encoding="utf-8") as f:
+            json.dump(_PREFERENCES, f)
+        with open(os.path.join(staging, ".seatbuddy-template"), "w", encoding="utf-8") as f:
+            f.write(TEMPLATE_VERSION)
+        try:
+            os.rename(staging, path)
+        except OSError:
+            # Another process installed the same version first; use theirs
+            shutil.rmtree(staging, ignore_errors=True)
+        return path
+
+    def _clone(self) -> str:
+        dest = os.path.join(self.root, f"p-{os.getpid()}-{next(self._seq)}")
+        try:
+            shutil.copytree(self.template, dest, ignore=shutil.ignore_patterns(".seatbuddy-template"))
+        except OSError:
+            shutil.rmtree(dest, ignore_errors=True)
+            if os.path.isfile(os.path.join(self.template, ".seatbuddy-template")):
+                raise
+            # Retired by another process between our check and its collection; build it again
+            self.template = self._ensure_template()
+            shutil.copytree(self.template, dest, ignore=shutil.ignore_patterns(".seatbuddy-template"))
+        return dest
+
+    def _refill(self):
+        try:
+            while True:
+                with self._lock:
+                    if len(self._spare) >= self.spares:
+                        return
+                path = self._clone()
+                with self._lock:
+                    self._spare.append(path)
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def _schedule_refill(self):
+        with self._lock:
+            if self._refilling or len(self._spare) >= self.spares:
+                return
+            self._refilling = True
+        threading.Thread(target=self._refill, name="profile-refill", daemon=True).start()
+
+    # --- public API ---
+    def acquire(self) -> str:
+        with self._lock:
+            path = self._spare.pop() if self._spare else None
+        if path is None or not os.path.isdir(path):
+            path = self._clone()
+        with self._lock:
+            self._active.add(path)
+        self._schedule_refill()
+        return path
+
+    def release(self, path: str | None):
+        if not path:
+            return
+        with self._lock:
+            self._active.discard(path)
+        shutil.rmtree(path, ignore_errors=True)
+
+    def active_count(self) -> int:
+        with self._lock:
+            return len(self._active)
+
+    def spare_dirs(self) -> list[str]:
+        with self._lock:
+            return list(self._spare)
+
+    def _template_users(self, names: list[str]) -> dict[str, set[int]]:
+        # Live processes per template directory; markers of dead ones are dropped
+        users: dict[str, set[int]] = {}
+        for name in names:
+            if not name.startswith(IN_USE_PREFIX):
+                continue
+            template, _, pid = name[len(IN_USE_PREFIX):].rpartition("-")
+            try:
+                pid = int(pid)
+            except ValueError:
+                continue
+            if pid_alive(pid):
+                users.setdefault(template, set()).add(pid)
+            else:
+                with contextlib.suppress(OSError):
+                    os.remove(os.path.join(self.root, name))
+        return users
+
+    def _retire_template(self, path: str) -> bool:
+        # Renamed away first, so nobody starts copying from a half-deleted template;
+        # a leftover is collected with the other ".template-" directories
+        trash = os.path.join(self.root, f".template-retired-{os.getpid()}-{next(self._seq)}")
+        try:
+            os.rename(path, trash)
+        except OSError:
+            return False
+        shutil.rmtree(trash, ignore_errors=True)
+        return True
+
+    def collect_orphans(self) -> int:
+        removed = 0
+        me = os.getpid()
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            names = []
+        users = self._template_users(names)
+        for name in names:
+            path = os.path.join(self.root, name)
+            if name.startswith(".template-"):
+                # Half-built template from a crashed process
+                try:
+                    stale = time.time() - os.path.getmtime(path) > 60
+                except OSError:
+                    continue
+                if stale:
+                    shutil.rmtree(path, ignore_errors=True)
+                    removed += 1
+                continue
+            if name == "template" or (name.startswith("template-v") and path != self.template):
+                # Template of an older TEMPLATE_VERSION, kept while a live process clones from it.
+                # The unversioned one predates the markers; any live clone owner may use it.
+                if users.get(name):
+                    continue
+                if name == "template" and self._foreign_clone_owners(names):
+                    continue
+                removed += self._retire_template(path)
+                continue
+            if not name.startswith("p-"):
+                continue
+            try:
+                owner = int(name.split("-")[1])
+            except (IndexError, ValueError):
+                continue
+            if owner == me or pid_alive(owner) or pid_alive(_chrome_lock_pid(path)):
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        removed += self._collect_legacy()
+        return removed
+
+    @staticmethod
+    def _foreign_clone_owners(names: list[str]) -> set[int]:
+        owners = set()
+        for name in names:
+            if name.startswith("p-"):
+                try:
+                    owners.add(int(name.split("-")[1]))
+                except (IndexError, ValueError):
+                    continue
+        owners.discard(os.getpid())
+        return {pid for pid in owners if pid_alive(pid)}
+
+    def _collect_legacy(self) -> int:
+        removed = 0
+        tmp = tempfile.gettempdir()
+        now = time.time()
+        try:
+            names = os.listdir(tmp)
+        except OSError:
+            return 0
+        for name in names:
+            if not name.startswith(LEGACY_PREFIX):
+                continue
+            path = os.path.join(tmp, name)
+            try:
+                if not os.path.isdir(path) or now - os.path.getmtime(path) < LEGACY_MAX_AGE_SEC:
+                    continue
+            except OSError:
+                continue
+            if pid_alive(_chrome_lock_pid(path)):
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        return removed
+
+
+_default: ProfileManager | None = None
+_default_lock = threading.Lock()
+
+
+def get_profile_manager() -> ProfileManager:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ProfileManager()
+            _default.collect_orphans()
+        return _default
@@ -0,0 +1,166 @@
+"""Score every (train, seat class) in a result-table snapshot and rank the attempts.
+
+Works on plain data (see ``SNAPSHOT_JS``), so one ``execute_script`` round-trip
+replaces the per-row, per-cell WebDriver lookups of the old row loop.
+"""
+import re
+
+# One call returns the page URL, header texts and, per row, each cell's text, control
+# hints and image alt
+SNAPSHOT_JS = """
+const table = document.querySelector(arguments[0]);
+if (!table) return {url: location.href, heads: [], rows: []};
+const heads = Array.from(table.querySelectorAll('thead th')).map(th => (th.innerText || '').trim());
+const rows = Array.from(table.querySelectorAll(':scope > tbody > tr')).map(tr =>
+  Array.from(tr.querySelectorAll('td')).map(td => {
+    const ctl = td.querySelector('a, button, input[type=button]');
+    const img = td.querySelector('img');
+    return {
+      text: (td.innerText || '').trim(),
+      hint: ctl ? ((ctl.getAttribute('title') || '') + ' ' + (ctl.getAttribute('aria-label') || '')) : '',
+      alt: img ? (img.getAttribute('alt') || '') : '',
+    };
+  }));
+return {url: location.href, heads: heads, rows: rows};
+"""
+
+# A seat in the non-preferred class (seat_pref "both") counts as this many minutes
+# further from the target time, so a much closer train still wins.
+OTHER_CLASS_PENALTY_MIN = 10.0
+DEFAULT_COLS = {"gen": 7, "fst": 6, "wait": 8, "dep": 4}
+
+_HHMM = re.compile(r"(\d{1,2}):(\d{2})")
+
+
+def parse_minutes(text: str) -> int | None:
+    m = _HHMM.search(text or "")
+    if not m:
+        return None
+    return int(m.group(1)) * 60 + int(m.group(2))
+
+
+def resolve_columns(heads: list[str], cols: dict) -> tuple[dict, bool]:
+    """Map seat/departure columns (1-based) from header texts; returns (cols, ambiguous)."""
+    def find_idx(keywords: list[str], default: int) -> int:
+        for idx, t in enumerate(heads, start=1):
+            for kw in keywords:
+                if kw in t:
+                    return idx
+        return default
+    out = {
+        "gen": find_idx(["일반석", "일반실", "일반"], cols["gen"]),
+        "fst": find_idx(["특실", "특"], cols["fst"]),
+        "wait": find_idx(["예약대기", "대기"], cols["wait"]),
+        "dep": find_idx(["출발"], cols["dep"]),
+    }
+    # Guard against ambiguous mapping (e.g., merged headers) or out-of-range
+    n = len(heads)
+    if out["gen"] == out["fst"] or not (1 <= out["gen"] <= n) or not (1 <= out["fst"] <= n):
+        out["gen"], out["fst"] = DEFAULT_COLS["gen"], DEFAULT_COLS["fst"]
+        return out, True
+    return out, False
+
+
+def is_srt_row(cells: list[dict]) -> bool:
+    if not cells:
+        return False
+    t = (cells[0].get("text") or cells[0].get("alt") or "").strip().upper()
+    # Some layouts may show 'SR' logo text instead of 'SRT'
+    return "SRT" in t or t == "SR"
+
+
+def _cell_has(cell: dict, full: str, short: str) -> bool:
+    # Some variants render only icon buttons; detect via attributes as well
+    if full in (cell.get("text") or ""):
+        return True
+    if short in (cell.get("hint") or ""):
+        return True
+    return short in (cell.get("alt") or "")
+
+
+def fingerprint(snapshot: dict | None) -> int | None:
+    """Hash of the table's cell texts; changes whenever availability does."""
+    if not snapshot or not snapshot.get("rows"):
+        return None
+    return hash(tuple(tuple(c.get("text") or "" for c in row) for row in snapshot["rows"]))
+
+
+def availability(snapshot: dict | None, cols: dict, srt_only: bool = True) -> list[tuple[str, int | None, str, bool]]:
+    """(train, departure minutes, class label, bookable) for every seat cell in the table."""
+    out = []
+    for cells in (snapshot or {}).get("rows") or []:
+        if (srt_only and not is_srt_row(cells)) or len(cells) < 3:
+            continue
+        train = cells[2]["text"]
+        dep = parse_minutes(cells[cols["dep"] - 1]["text"]) if len(cells) >= cols["dep"] else None
+        for key, label, full, short in (("gen", "일반석", "예약하기", "예약"), ("fst", "특실", "예약하기", "예약"),
+                                        ("wait", "예약대기", "신청하기", "신청")):
+            if len(cells) >= cols[key]:
+                out.append((train, dep, label, _cell_has(cells[cols[key] - 1], full, short)))
+    return out
+
+
+def candidate_key(cand: dict) -> tuple:
+    # Identifies a seat across reloads, when row indices may shift
+    return cand.get("train") or cand["row"], cand["dep"], cand["label"]
+
+
+def seat_classes(seat_pref: str, seat_order: str) -> list[tuple[str, str, float]]:
+    """(column key, label, penalty) for the classes the user accepts, preferred first."""
+    if seat_pref == "economy":
+        return [("gen", "일반석", 0.0)]
+    if seat_pref == "first":
+        return [("fst", "특실", 0.0)]
+    if seat_order == "prefer_economy":
+        return [("gen", "일반석", 0.0), ("fst", "특실", OTHER_CLASS_PENALTY_MIN)]
+    return [("fst", "특실", 0.0), ("gen", "일반석", OTHER_CLASS_PENALTY_MIN)]
+
+
+def rank(snapshot: dict | None, *, mode: str, seat_pref: str, seat_order: str, num_to_check: int,
+         target_min: int | None, cols: dict, srt_only: bool = True,
+         window: tuple[int, int] | None = None) -> tuple[list[dict], int]:
+    """Ranked attempt list for the first ``num_to_check`` SRT rows, best first.
+
+    Each candidate is ``{"row", "col", "label", "dep", "train", "score"}`` with a 1-based row
+    index. Trains departing outside ``window`` (minutes, inclusive) are skipped. Also
+    returns how many SRT rows were recognised, so the caller can drop the SRT filter
+    on layouts where it never matches.
+    """
+    rows = (snapshot or {}).get("rows") or []
+    classes = seat_classes(seat_pref, seat_order)
+    out: list[dict] = []
+    checked = srt_rows = 0
+    for row_idx, cells in enumerate(rows, start=1):
+        if checked >= num_to_check:
+            break
+        if srt_only:
+            if not is_srt_row(cells):
+                continue
+            srt_rows += 1
+        if len(cells) < cols["wait"]:
+            continue
+        dep = parse_minutes(cells[cols["dep"] - 1]["text"]) if len(cells) >= cols["dep"] else None
+        # Out-of-window trains do not use up num_to_check
+        if window is not None and dep is not None and not (window[0] <= dep <= window[1]):
+            continue
+        checked += 1
+        train = cells[2]["text"] if len(cells) > 2 else ""
+        # Unparseable times keep table order behind every timed candidate
+        dist = abs(dep - target_min) if dep is not None and target_min is not None else 1440.0 + row_idx
+        if mode == "waitlist":
+            if _cell_has(cells[cols["wait"] - 1], "신청하기", "신청"):
+                out.append({"row": row_idx, "col": cols["wait"], "label": "예약대기", "dep": dep,
+                            "train": train, "score": dist})
+            continue
+        seen = set()
+        for key, label, penalty in classes:
+            col = cols[key]
+            if col in seen or len(cells) < col:
+                continue
+            seen.add(col)
+            if _cell_has(cells[col - 1], "예약하기", "예약"):
+                out.append({"row": row_idx, "col": col, "label": label, "dep": dep,
+                            "train": train, "score": dist + penalty})
+    # Stable: equal scores keep row order, then class order
+    out.sort(key=lambda c: c["score"])
+    return out, srt_rows
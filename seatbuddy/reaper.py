@@ -0,0 +1,357 @@
+"""Registry of launched browsers and a reaper for the ones nobody will quit.
+
+Each chromedriver is started in its own session/process group, so the driver and
+the Chrome processes it spawns can be killed as one tree. Live entries are mirrored
+to a small per-process state file; files left by dead processes are swept (and
+their trees killed) when the registry is first created.
+"""
+import atexit
+import json
+import os
+import signal
+import tempfile
+import threading
+import time
+
+STATE_DIR_ENV = "SEATBUDDY_RUN_DIR"
+# Jobs whose UI stopped sending heartbeats for this long are treated as abandoned
+ABANDON_AFTER_SEC = float(os.environ.get("SEATBUDDY_ABANDON_SEC") or 90)
+# Cancelled jobs get this long to quit their own browsers before we kill them
+CANCEL_GRACE_SEC = 10.0
+SWEEP_INTERVAL_SEC = 2.0
+_BROWSER_MARKERS = ("chromedriver", "chrome", "chromium")
+
+
+def pid_alive(pid: int | None) -> bool:
+    """Whether ``pid`` is a running process; zombies count as gone."""
+    if not pid or pid <= 0:
+        return False
+    if os.name == "nt":
+        # os.kill(pid, 0) terminates the process on Windows; assume alive
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    # Killed children linger as zombies until their Popen is reaped; they are gone for us
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            return f.read().rsplit(b")", 1)[1].split()[0] != b"Z"
+    except (OSError, IndexError):
+        return True
+
+
+def _group_alive(pgid: int | None) -> bool:
+    if not pgid or pgid <= 0 or os.name == "nt" or pgid == os.getpgrp():
+        return False
+    try:
+        os.killpg(pgid, 0)
+    except OSError:
+        return False
+    if not os.path.isdir("/proc"):
+        return True
+    # killpg also succeeds for zombie members nobody has reaped yet; ignore those
+    for state, _ppid, pgrp in _proc_stats().values():
+        if pgrp == pgid and state != "Z":
+            return True
+    return False
+
+
+def _cmdline(pid: int) -> str:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read().replace(b"\0", b" ").decode("utf-8", "replace").lower()
+    except OSError:
+        return ""
+
+
+def _looks_like_browser(pid: int) -> bool:
+    cmd = _cmdline(pid)
+    return any(m in cmd for m in _BROWSER_MARKERS)
+
+
+def _proc_stats() -> dict[int, tuple[str, int, int]]:
+    """Map pid -> (state, ppid, pgrp) for every visible process (Linux /proc)."""
+    stats: dict[int, tuple[str, int, int]] = {}
+    try:
+        names = os.listdir("/proc")
+    except OSError:
+        return stats
+    for name in names:
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "rb") as f:
+                stat = f.read().decode("utf-8", "replace")
+            # Fields after the parenthesised command name: state ppid pgrp ...
+            fields = stat.rsplit(")", 1)[1].split()
+            stats[int(name)] = (fields[0], int(fields[1]), int(fields[2]))
+        except (OSError, IndexError, ValueError):
+            continue
+    return stats
+
+
+def _children_map() -> dict[int, list[int]]:
+    tree: dict[int, list[int]] = {}
+    for pid, (_state, ppid, _pgrp) in _proc_stats().items():
+        tree.setdefault(ppid, []).append(pid)
+    return tree
+
+
+def descendants(pid: int) -> list[int]:
+    tree = _children_map()
+    out, stack = [], [pid]
+    while stack:
+        for child in tree.get(stack.pop(), []):
+            out.append(child)
+            stack.append(child)
+    return out
+
+
+def _reap_child(pid: int):
+    # chromedriver is our own child; collect it so it does not linger as a zombie
+    try:
+        os.waitpid(pid, os.WNOHANG)
+    except (ChildProcessError, OSError):
+        pass
+
+
+def kill_tree(pid: int, pgid: int | None = None, grace: float = 1.0) -> int:
+    """Terminate ``pid``, its descendants and its process group; returns signalled count."""
+    if os.name == "nt" or pid <= 0:
+        return 0
+    targets = [pid] + descendants(pid)
+    own_group = os.getpgrp()
+    signalled = 0
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        if pgid and pgid > 0 and pgid != own_group:
+            try:
+                os.killpg(pgid, sig)
+                signalled += 1
+            except OSError:
+                pass
+        for p in targets:
+            try:
+                os.kill(p, sig)
+                signalled += 1
+            except OSError:
+                pass
+        if sig == signal.SIGTERM:
+            deadline = time.monotonic() + grace
+            _reap_child(pid)
+            while time.monotonic() < deadline and (any(pid_alive(p) for p in targets) or _group_alive(pgid)):
+                time.sleep(0.05)
+                _reap_child(pid)
+            targets = [p for p in targets if pid_alive(p)]
+            if not targets and not _group_alive(pgid):
+                break
+    return signalled
+
+
+class BrowserRegistry:
+    def __init__(self, state_dir: str | None = None):
+        self.state_dir = state_dir or os.environ.get(STATE_DIR_ENV) or os.path.join(tempfile.gettempdir(), "seatbuddy-run")
+        os.makedirs(self.state_dir, exist_ok=True)
+        self.state_file = os.path.join(self.state_dir, f"browsers-{os.getpid()}.json")
+        self._lock = threading.Lock()
+        self._browsers: dict[int, dict] = {}
+        self._jobs: dict[str, dict] = {}
+        self._sweeper = None
+
+    # --- browsers ---
+    def register(self, driver, job_id: str | None = None) -> int | None:
+        try:
+            pid = int(driver.service.process.pid)
+        except Exception:
+            return None
+        try:
+            pgid = os.getpgid(pid)
+        except (AttributeError, OSError):
+            pgid = None
+        entry = {"pid": pid, "pgid": pgid, "job": job_id, "started": time.time()}
+        with self._lock:
+            self._browsers[pid] = entry
+            self._persist_locked()
+        return pid
+
+    def release(self, pid: int | None):
+        """Forget a browser after quit(), killing anything of its tree that survived."""
+        if pid is None:
+            return
+        with self._lock:
+            entry = self._browsers.pop(pid, None)
+            self._persist_locked()
+        if entry and (pid_alive(pid) or _group_alive(entry.get("pgid"))):
+            kill_tree(pid, entry.get("pgid"))
+
+    def browsers(self, job_id: str | None = None) -> list[dict]:
+        with self._lock:
+            return [dict(e) for e in self._browsers.values() if job_id is None or e.get("job") == job_id]
+
+    def reap_job(self, job_id: str) -> int:
+        killed = 0
+        for entry in self.browsers(job_id):
+            kill_tree(entry["pid"], entry.get("pgid"))
+            with self._lock:
+                self._browsers.pop(entry["pid"], None)
+                self._persist_locked()
+            killed += 1
+        return killed
+
+    def reap_all(self) -> int:
+        killed = 0
+        for entry in self.browsers():
+            kill_tree(entry["pid"], entry.get("pgid"), grace=0.5)
+            killed += 1
+        with self._lock:
+            self._browsers.clear()
+            self._persist_locked()
+        return killed
+
+    def _persist_locked(self):
+        try:
+            if not self._browsers:
+                if os.path.exists(self.state_file):
+                    os.remove(self.state_file)
+                return
+            tmp = self.state_file + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(list(self._browsers.values()), f)
+            os.replace(tmp, self.state_file)
+        except OSError:
+            pass
+
+    def sweep_leftovers(self) -> int:
+        """Kill browser trees recorded by processes that are no longer running."""
+        killed = 0
+        try:
+            names = os.listdir(self.state_dir)
+        except OSError:
+            return 0
+        for name in names:
+            if not (name.startswith("browsers-") and name.endswith(".json")):
+                continue
+            try:
+                owner = int(name[len("browsers-"):-len(".json")])
+            except ValueError:
+                continue
+            if owner == os.getpid() or pid_alive(owner):
+                continue
+            path = os.path.join(self.state_dir, name)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    entries = json.load(f)
+            except (OSError, ValueError):
+                entries = []
+            for entry in entries:
+                pid = int(entry.get("pid") or 0)
+                pgid = entry.get("pgid")
+                # PIDs get recycled; only touch processes that still look like a browser.
+                # A live group id cannot have been reused, so orphaned Chrome children
+                # of an exited chromedriver are still ours.
+                if (pid_alive(pid) and _looks_like_browser(pid)) or _group_alive(pgid):
+                    kill_tree(pid, pgid)
+                    killed += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return killed
+
+    # --- jobs ---
+    def open_job(self, job_id: str, cancel_event: threading.Event, heartbeat_timeout: float | None = ABANDON_AFTER_SEC):
+        with self._lock:
+            self._jobs[job_id] = {
+                "cancel": cancel_event,
+                "heartbeat": time.monotonic(),
+                "timeout": heartbeat_timeout,
+                "cancelled_at": None,
+            }
+        self._ensure_sweeper()
+
+    def touch(self, job_id: str | None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job["heartbeat"] = time.monotonic()
+
+    def close_job(self, job_id: str):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+        self.reap_job(job_id)
+
+    def _sweep_jobs(self):
+        now = time.monotonic()
+        to_reap = []
+        with self._lock:
+            for job_id, job in self._jobs.items():
+                cancel = job["cancel"]
+                timeout = job["timeout"]
+                if not cancel.is_set() and timeout and now - job["heartbeat"] > timeout:
+                    # Owner went away (session closed, script rerun lost the handle)
+                    cancel.set()
+                if cancel.is_set():
+                    if job["cancelled_at"] is None:
+                        job["cancelled_at"] = now
+                    elif now - job["cancelled_at"] > CANCEL_GRACE_SEC:
+                        to_reap.append(job_id)
+        for job_id in to_reap:
+            self.reap_job(job_id)
+
+    def _ensure_sweeper(self):
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="browser-reaper", daemon=True)
+        self._sweeper.start()
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(SWEEP_INTERVAL_SEC)
+            try:
+                self._sweep_jobs()
+            except Exception:
+                pass
+
+
+_default: BrowserRegistry | None = None
+_default_lock = threading.Lock()
+
+
+def _install_shutdown_hooks(registry: BrowserRegistry):
+    atexit.register(registry.reap_all)
+    if threading.current_thread() is not threading.main_thread():
+        # Signal handlers can only be installed from the main thread (Streamlit runs
+        # scripts elsewhere); atexit still covers a normal interpreter shutdown.
+        return
+    for signame in ("SIGTERM", "SIGHUP"):
+        sig = getattr(signal, signame, None)
+        if sig is None:
+            continue
+        previous = signal.getsignal(sig)
+
+        def _handler(signum, frame, _previous=previous):
+            registry.reap_all()
+            if callable(_previous):
+                _previous(signum, frame)
+            elif _previous != signal.SIG_IGN:
+                signal.signal(signum, signal.SIG_DFL)
+                os.kill(os.getpid(), signum)
+        try:
+            signal.signal(sig, _handler)
+        except (ValueError, OSError):
+            pass
+
+
+def get_registry() -> BrowserRegistry:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = BrowserRegistry()
+            _default.sweep_leftovers()
+            _install_shutdown_hooks(_default)
+        return _default
@@ -0,0 +1,120 @@
+"""Scheduled warm start: be logged in and waiting on the search form when seats open.
+
+A job with ``startAt`` does not query right away. ``WARMUP_SEC`` (plus the login
+stagger) before the target its workers launch Chrome, log in and fill in the
+search form; the first query is sent at the target instant by the server's clock.
+Times without an offset are Korean time, whatever the machine's timezone.
+
+The server clock is only visible through the one-second ``Date`` header of its
+responses. ``ServerClock.measure`` times several requests so that, after the
+first, each one straddles a predicted second boundary; the header then says on
+which side the true offset lies, narrowing it to about the round-trip jitter.
+"""
+import email.utils
+import http.client
+import math
+import os
+import re
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from seatbuddy.pacing import SITE_TZ
+
+WARMUP_SEC = float(os.environ.get("SEATBUDDY_WARMUP_SEC") or 90)
+CLOCK_SAMPLES = 8
+CLOCK_TIMEOUT_SEC = 5.0
+_TIME_ONLY = re.compile(r"^(\d{1,2}):(\d{2})(?::(\d{2}(?:\.\d+)?))?$")
+
+
+def parse_start_at(value, now: float | None = None) -> float | None:
+    """Epoch seconds for ``startAt``: ISO date-time, ``HH:MM[:SS]`` (next occurrence) or epoch."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    now = time.time() if now is None else now
+    m = _TIME_ONLY.match(text)
+    try:
+        if m:
+            today = datetime.fromtimestamp(now, SITE_TZ).replace(second=0, microsecond=0)
+            ts = today.replace(hour=int(m[1]), minute=int(m[2])).timestamp() + float(m[3] or 0)
+            return ts + 86400 if ts <= now else ts
+        at = datetime.fromisoformat(text.replace(" ", "T", 1))
+    except ValueError:
+        raise ValueError(f"예약 시작 시각 형식이 올바르지 않습니다: {value}")
+    return (at if at.tzinfo else at.replace(tzinfo=SITE_TZ)).timestamp()
+
+
+def format_ts(ts: float) -> str:
+    return datetime.fromtimestamp(ts, SITE_TZ).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+def warmup_sec(params: dict, workers: int = 1, stagger: float = 0.0) -> float:
+    try:
+        base = float(params.get("warmupSec") or WARMUP_SEC)
+    except (TypeError, ValueError):
+        base = WARMUP_SEC
+    # Staggered logins start later; give the last worker the same lead as the first
+    return max(10.0, base) + max(0, workers - 1) * stagger
+
+
+class ServerClock:
+    def __init__(self, url: str, timeout: float = CLOCK_TIMEOUT_SEC):
+        parts = urlsplit(url)
+        self.scheme, self.netloc = parts.scheme, parts.netloc
+        self.path = parts.path or "/"
+        self.timeout = timeout
+        self.offset = 0.0  # server minus local, seconds
+        self.uncertainty = None  # half-width of the offset interval; None until measured
+
+    def _server_date(self, conn) -> float:
+        conn.request("HEAD", self.path, headers={"Connection": "keep-alive"})
+        resp = conn.getresponse()
+        resp.read()
+        date = resp.getheader("Date")
+        if not date:
+            raise OSError("응답에 Date 헤더가 없습니다")
+        try:
+            return email.utils.parsedate_to_datetime(date).timestamp()
+        except (TypeError, ValueError) as e:
+            raise OSError(f"Date 헤더를 해석할 수 없습니다: {date!r}") from e
+
+    def measure(self, samples: int = CLOCK_SAMPLES) -> float:
+        """Estimate the offset; raises OSError when the server cannot be reached."""
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        conn = cls(self.netloc, timeout=self.timeout)
+        lo, hi, rtt = -math.inf, math.inf, 0.0
+        try:
+            # The first request only opens the connection and gives a rough offset
+            self._server_date(conn)
+            for i in range(samples):
+                if i:
+                    # Aim the middle of the request at the next server second boundary
+                    server_now = time.time() + (lo + hi) / 2
+                    wait = math.ceil(server_now) - server_now - rtt / 2
+                    # A slow round trip can push the boundary several seconds back
+                    time.sleep(max(0.0, wait % 1))
+                sent = time.time()
+                date = self._server_date(conn)
+                received = time.time()
+                rtt = received - sent
+                # The header truncates to the second: server time at reply is in [date, date + 1)
+                a, b = date - received, date + 1 - sent
+                if a > hi or b < lo:
+                    # Inconsistent with earlier samples (clock stepped, proxy cache); start over
+                    lo, hi = a, b
+                else:
+                    lo, hi = max(lo, a), min(hi, b)
+        except http.client.HTTPException as e:
+            raise OSError(str(e) or type(e).__name__)
+        finally:
+            conn.close()
+        self.offset = (lo + hi) / 2
+        self.uncertainty = (hi - lo) / 2
+        return self.offset
+
+    def local_time(self, server_ts: float) -> float:
+        """Local epoch time at which the server clock reads ``server_ts``."""
+        return server_ts - self.offset
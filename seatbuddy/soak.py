@@ -0,0 +1,295 @@
+"""Scale and soak runs against the local mock site, compared with a stored baseline.
+
+    python -m seatbuddy soak --scenarios 1x1,1x5,1x10,1x20,3x5 --duration 300 \\
+        --baseline soak-baseline.json
+
+A scenario ``JxW`` runs J concurrent jobs of W workers each, exactly as the UI
+starts them (``orchestrator.run_job`` on the shared loop), for ``--duration``
+seconds. While it runs, this process and everything it spawned are sampled from
+/proc: browser RSS per worker, total CPU, Chrome/chromedriver processes, threads
+and file descriptors. After the jobs are stopped and given time to clean up, the
+browsers, threads, descriptors, profile directories and DevTools ports still
+around count as leaked. Throughput is refreshes per second across all workers. The
+time from a failed booking attempt to the next attempt (``attempt_gap``) and to the
+restored result table (``recovery``) is reported as p50/p95 in milliseconds. The
+report also carries micro-benchmarks of per-step costs (``bench_recorder``).
+
+Linux only (reads /proc). Needs Chrome and chromedriver like a real run.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+
+from seatbuddy.reaper import _looks_like_browser, descendants
+
+DEFAULT_SCENARIOS = "1x1,1x5,1x10,1x20,3x5"
+# Time given to stopped jobs to quit their browsers before leaks are counted
+SETTLE_SEC = 15.0
+# metric -> (relative, absolute) slack before a change counts as a regression
+_LOWER_IS_BETTER = {
+    "rss_per_worker_mb": (0.25, 20.0),
+    "harness_rss_mb": (0.25, 20.0),
+    "cpu_percent": (0.30, 10.0),
+    "chrome_peak": (0.10, 1.0),
+    "threads_peak": (0.25, 4.0),
+    "fds_peak": (0.25, 8.0),
+    "leaked_chrome": (0.0, 0.0),
+    "leaked_threads": (0.0, 2.0),
+    "leaked_fds": (0.0, 4.0),
+    "leaked_profiles": (0.0, 0.0),
+    "leaked_ports": (0.0, 0.0),
+    "attempt_gap_p50_ms": (0.30, 100.0),
+    "attempt_gap_p95_ms": (0.30, 200.0),
+    "recovery_p50_ms": (0.30, 100.0),
+    "recovery_p95_ms": (0.30, 200.0),
+}
+# Failed-attempt timings summarized per scenario, across all of its jobs
+_ATTEMPT_TIMINGS = ("attempt_gap", "recovery")
+_HIGHER_IS_BETTER = {
+    "refreshes_per_sec": (0.25, 0.1),
+}
+# Micro-benchmarks are noisy; only flag a clear slowdown
+_BENCH_SLACK = (0.5, 200.0)
+_SHARED_THREADS = ("driver", "asyncio_", "seatbuddy-loop", "browser-reaper", "profile-refill", "store-writer",
+                   "notify-dispatcher")
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_MB = (os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096) / (1024 * 1024)
+
+
+def parse_scenarios(spec: str) -> list[tuple[int, int]]:
+    out = []
+    for part in (spec or DEFAULT_SCENARIOS).split(","):
+        jobs, _, workers = part.strip().lower().partition("x")
+        if not workers:
+            jobs, workers = "1", jobs
+        out.append((max(1, int(jobs)), max(1, min(20, int(workers)))))
+    return out
+
+
+def _stat(pid: int) -> list[str] | None:
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            # Fields after the parenthesised command name, starting with the state (field 3)
+            return f.read().rsplit(b")", 1)[1].decode().split()
+    except (OSError, IndexError):
+        return None
+
+
+def sample(pid: int | None = None) -> dict:
+    """Resource use of ``pid`` (default: this process) and all of its descendants."""
+    pid = pid or os.getpid()
+    own = _stat(pid) or []
+    cpu = 0.0
+    if own:
+        # utime, stime, and the CPU of children already waited for
+        cpu += sum(int(own[i]) for i in (11, 12, 13, 14)) / _CLK_TCK
+    browser_rss = 0.0
+    chrome = 0
+    for child in descendants(pid):
+        st = _stat(child)
+        if st is None:
+            continue
+        cpu += (int(st[11]) + int(st[12])) / _CLK_TCK
+        if _looks_like_browser(child):
+            chrome += 1
+            browser_rss += int(st[21]) * _PAGE_MB
+    try:
+        fds = len(os.listdir(f"/proc/{pid}/fd"))
+    except OSError:
+        fds = 0
+    return {
+        "cpu_sec": cpu,
+        "harness_rss_mb": int(own[21]) * _PAGE_MB if own else 0.0,
+        "browser_rss_mb": browser_rss,
+        "chrome": chrome,
+        "threads": int(own[17]) if own else 0,
+        "fds": fds,
+    }
+
+
+def percentiles(samples: list[float]) -> tuple[float | None, float | None]:
+    """p50 and p95 of ``samples`` in milliseconds; None when there are none."""
+    if not samples:
+        return None, None
+    ordered = sorted(samples)
+    p50 = ordered[len(ordered) // 2]
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return round(p50 * 1000, 1), round(p95 * 1000, 1)
+
+
+def _profile_dirs() -> set[str]:
+    from seatbuddy.profiles import get_profile_manager
+
+    manager = get_profile_manager()
+    try:
+        names = {n for n in os.listdir(manager.root) if n.startswith("p-")}
+    except OSError:
+        return set()
+    # The pre-cloned spare is kept on purpose
+    return names - {os.path.basename(p) for p in manager.spare_dirs()}
+
+
+def _job_threads() -> int:
+    # Pooled and process-wide threads are started once and kept for the next job
+    return sum(1 for t in threading.enumerate() if not t.name.startswith(_SHARED_THREADS))
+
+
+def job_params(workers: int, speed: int) -> dict:
+    return {
+        "userId": "soak", "password": "soak",
+        "departureStation": "수서", "arrivalStation": "부산",
+        "date": (date.today() + timedelta(days=1)).strftime("%Y-%m-%d"), "time": "08:00",
+        "numToCheck": 3, "mode": "reserve", "headless": True, "seatPref": "both",
+        "parallelCount": workers, "parallelStaggerSec": 0.5, "refreshSpeed": speed,
+    }
+
+
+def run_scenario(jobs: int, workers: int, duration: float, interval: float = 2.0, speed: int = 5, log=None) -> dict:
+    from seatbuddy import orchestrator
+    from seatbuddy.metrics import JobMetrics
+    from seatbuddy.ports import get_port_allocator
+    from seatbuddy.reaper import get_registry
+    from seatbuddy.waits import CancelEvent
+
+    errors = {"n": 0}
+
+    def job_log(msg: str, kind: str = "info"):
+        if kind == "error":
+            errors["n"] += 1
+
+    # Process-wide singletons (loop, pools, registry) are not this scenario's cost
+    orchestrator.get_loop()
+    orchestrator.get_executor()
+    get_registry()
+    before = sample()
+    threads_before = _job_threads()
+    profiles_before = _profile_dirs()
+    ports_before = set(get_port_allocator().held())
+    running = []
+    for _ in range(jobs):
+        cancel, metrics = CancelEvent(), JobMetrics()
+        job_id = f"soak-{uuid.uuid4().hex[:8]}"
+        fut = orchestrator.submit(orchestrator.run_job(
+            job_params(workers, speed), job_log, cancel, job_id, metrics, heartbeat_timeout=None))
+        running.append((cancel, metrics, fut))
+    started = time.monotonic()
+    peak = dict(before, browser_rss_mb=0.0)
+    while time.monotonic() - started < duration and not all(f.done() for _c, _m, f in running):
+        time.sleep(interval)
+        now = sample()
+        for key in ("harness_rss_mb", "browser_rss_mb", "chrome", "threads", "fds"):
+            peak[key] = max(peak[key], now[key])
+        if log is not None:
+            log(f"{jobs}x{workers} {time.monotonic() - started:.0f}s: 크롬 {now['chrome']}개, "
+                f"브라우저 메모리 {now['browser_rss_mb']:.0f}MB, 스레드 {now['threads']}")
+    elapsed = time.monotonic() - started
+    busy = sample()
+    for cancel, _m, _f in running:
+        cancel.set()
+    for _c, _m, fut in running:
+        try:
+            fut.result(timeout=60)
+        except Exception:
+            pass
+    # Leftover browsers get the reaper's grace period before they count as leaked
+    deadline = time.monotonic() + SETTLE_SEC
+    while time.monotonic() < deadline and sample()["chrome"]:
+        time.sleep(0.5)
+    after = sample()
+    refreshes = sum(m.snapshot()["timings"].get("poll_interval", {}).get("count", 0) for _c, m, _f in running)
+    total = jobs * workers
+    attempts = {}
+    for name in _ATTEMPT_TIMINGS:
+        p50, p95 = percentiles([s for _c, m, _f in running for s in m.samples(name)])
+        attempts[f"{name}_p50_ms"], attempts[f"{name}_p95_ms"] = p50, p95
+    return {
+        "scenario": f"{jobs}x{workers}",
+        "workers": total,
+        "seconds": round(elapsed, 1),
+        "rss_per_worker_mb": round(peak["browser_rss_mb"] / total, 1),
+        "harness_rss_mb": round(peak["harness_rss_mb"], 1),
+        "cpu_percent": round((busy["cpu_sec"] - before["cpu_sec"]) / max(elapsed, 1e-6) * 100, 1),
+        "chrome_peak": peak["chrome"],
+        "threads_peak": peak["threads"],
+        "fds_peak": peak["fds"],
+        "refreshes_per_sec": round(refreshes / max(elapsed, 1e-6), 2),
+        "errors": errors["n"],
+        "leaked_chrome": after["chrome"],
+        "leaked_threads": max(0, _job_threads() - threads_before),
+        "leaked_fds": max(0, after["fds"] - before["fds"]),
+        "leaked_profiles": len(_profile_dirs() - profiles_before),
+        "leaked_ports": len(set(get_port_allocator().held()) - ports_before),
+        **attempts,
+    }
+
+
+def bench_recorder(n: int = 200_000) -> dict:
+    """Steady-state cost of the flight recorder: ns per recorded step and per logged line."""
+    from seatbuddy.flightrec import FlightRecorder
+
+    rec = FlightRecorder()
+
+    def per_call(fn) -> float:
+        # Best of several rounds filters out scheduler noise
+        best = float("inf")
+        for _ in range(5):
+            started = time.perf_counter()
+            for i in range(n // 5):
+                fn(i)
+            best = min(best, (time.perf_counter() - started) / (n // 5) * 1e9)
+        return best
+
+    def sink(msg, kind="info"):
+        pass
+
+    logged = rec.wrap_log(sink)
+    base = per_call(lambda i: sink("재조회", "info"))
+    return {
+        "record_ns": round(per_call(lambda i: rec.record("poll", rows=10, candidates=0, fingerprint=i)) - per_call(lambda i: None), 1),
+        "log_overhead_ns": round(per_call(lambda i: logged("재조회", "info")) - base, 1),
+    }
+
+
+def compare(results: list[dict], baseline: dict, bench: dict | None = None) -> list[str]:
+    """Regressions of ``results`` against a baseline report, one line each."""
+    base = {r["scenario"]: r for r in baseline.get("scenarios", [])}
+    out = []
+    for r in results:
+        b = base.get(r["scenario"])
+        if b is None:
+            continue
+        for key, (rel, slack) in _LOWER_IS_BETTER.items():
+            # Attempt timings are None in runs where no attempt failed
+            if b.get(key) is not None and r.get(key) is not None and r[key] > b[key] * (1 + rel) + slack:
+                out.append(f"{r['scenario']} {key}: {b[key]} -> {r[key]}")
+        for key, (rel, slack) in _HIGHER_IS_BETTER.items():
+            if key in b and r[key] < b[key] * (1 - rel) - slack:
+                out.append(f"{r['scenario']} {key}: {b[key]} -> {r[key]}")
+    for key, value in (bench or {}).items():
+        b = (baseline.get("bench") or {}).get(key)
+        if b is not None and value > b * (1 + _BENCH_SLACK[0]) + _BENCH_SLACK[1]:
+            out.append(f"bench {key}: {b} -> {value}")
+    return out
+
+
+def format_table(results: list[dict]) -> str:
+    cols = ("scenario", "workers", "rss_per_worker_mb", "cpu_percent", "chrome_peak", "threads_peak",
+            "fds_peak", "refreshes_per_sec", "errors", "leaked_chrome", "leaked_threads", "leaked_fds",
+            "leaked_profiles", "leaked_ports", "attempt_gap_p50_ms", "attempt_gap_p95_ms", "recovery_p50_ms",
+            "recovery_p95_ms")
+    rows = [cols] + [tuple("-" if r.get(c) is None else str(r[c]) for c in cols) for r in results]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(cols))]
+    return "\n".join("  ".join(v.rjust(w) for v, w in zip(row, widths)) for row in rows)
+
+
+def load_report(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_report(path: str, results: list[dict], bench: dict | None = None):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"created": time.time(), "scenarios": results, "bench": bench or {}}, f, ensure_ascii=False, indent=2)
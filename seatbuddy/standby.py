@@ -0,0 +1,108 @@
+"""Warm standby browsers for a job.
+
+Each standby is a ``SrtWorker`` that has already launched Chrome and logged in.
+When a worker's browser crashes or hangs, ``AsyncWorker`` takes one, opens the
+search with its own conditions and carries on; the pool then launches a new
+standby in the background.
+"""
+import asyncio
+import os
+
+from seatbuddy.automation import SrtWorker
+from seatbuddy.waits import Cancelled
+
+# Standbys per job unless the job sets standbyCount
+DEFAULT_STANDBY = int(os.environ.get("SEATBUDDY_STANDBY") or 0)
+MAX_STANDBY = 5
+# Standby worker indices start here so their log and flight records stand apart from the workers'
+STANDBY_INDEX_BASE = 200
+# Consecutive failed launches after which the pool stops trying
+MAX_LAUNCH_FAILURES = 3
+
+
+def standby_size(params: dict) -> int:
+    try:
+        n = int(params.get("standbyCount") if params.get("standbyCount") is not None else DEFAULT_STANDBY)
+    except (TypeError, ValueError):
+        n = DEFAULT_STANDBY
+    return max(0, min(MAX_STANDBY, n))
+
+
+class StandbyPool:
+    def __init__(self, params: dict, log, cancelled, size: int, executor):
+        self.params = params
+        self.log = log
+        self.cancelled = cancelled
+        self.size = size
+        self.executor = executor
+        self._ready: list[SrtWorker] = []
+        self._tasks: set[asyncio.Task] = set()
+        self._seq = 0
+        self._failures = 0
+        self._closed = False
+
+    def start(self):
+        for _ in range(self.size):
+            self._spawn()
+
+    def _spawn(self):
+        if self._closed or self.cancelled() or self._failures >= MAX_LAUNCH_FAILURES:
+            return
+        self._seq += 1
+        task = asyncio.get_running_loop().create_task(self._launch(self._seq))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _prepare(self, w: SrtWorker) -> SrtWorker:
+        # Runs on a driver thread. Finishes even if the launching task was cancelled,
+        # so it is also where a browser nobody will take gets closed.
+        try:
+            w.open_browser()
+            w.login()
+        except BaseException:
+            w.close()
+            raise
+        if self._closed:
+            w.close()
+            raise Cancelled()
+        return w
+
+    async def _launch(self, n: int):
+        w = SrtWorker(dict(self.params, workerIndex=STANDBY_INDEX_BASE + n), self.log, self.cancelled)
+        try:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self._prepare, w)
+        except Cancelled:
+            return
+        except Exception as e:
+            self._failures += 1
+            self.log(f"[대기] 대기 브라우저 준비 실패: {e}", "warn")
+            self._spawn()
+            return
+        self._failures = 0
+        self._ready.append(w)
+        self.log(f"[대기] 대기 브라우저 준비 완료 ({len(self._ready)}/{self.size})")
+
+    async def take(self, timeout: float) -> SrtWorker | None:
+        """A logged-in standby, waiting up to ``timeout`` for one still launching."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            while self._ready:
+                w = self._ready.pop(0)
+                self._spawn()
+                if w.is_alive():
+                    return w
+                loop.run_in_executor(self.executor, w.close)
+            if not self._tasks or loop.time() >= deadline or self.cancelled():
+                return None
+            await asyncio.sleep(0.1)
+
+    async def close(self):
+        self._closed = True
+        for task in list(self._tasks):
+            task.cancel()
+        loop = asyncio.get_running_loop()
+        ready, self._ready = self._ready, []
+        if ready:
+            await asyncio.gather(*(loop.run_in_executor(self.executor, w.close) for w in ready),
+                                 return_exceptions=True)
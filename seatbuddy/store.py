@@ -0,0 +1,273 @@
+"""SQLite persistence for jobs, reservation attempts, results and log events.
+
+Writes are queued and committed in batches by one writer thread, so workers
+never wait on disk. Reads use their own connection (WAL mode). Retention is
+bounded by job count, log age and log rows per job.
+"""
+import atexit
+import contextlib
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+from seatbuddy.reaper import pid_alive
+
+DB_PATH_ENV = "SEATBUDDY_DB"
+_BATCH_MAX = 500
+_FLUSH_SEC = 0.25
+_PRUNE_EVERY_SEC = 60.0
+# Fields never written to disk
+_SECRET_KEYS = ("password", "webhookUrl")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    state TEXT NOT NULL,
+    owner_pid INTEGER,
+    source TEXT,
+    params TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_created ON jobs(created);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs(state);
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    worker INTEGER,
+    row_idx INTEGER,
+    label TEXT,
+    ok INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attempts_job ON attempts(job_id, ts);
+CREATE TABLE IF NOT EXISTS results (
+    job_id TEXT PRIMARY KEY,
+    ts REAL NOT NULL,
+    ok INTEGER NOT NULL,
+    type TEXT,
+    error TEXT,
+    payload TEXT
+);
+CREATE TABLE IF NOT EXISTS log_events (
+    id INTEGER PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    msg TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS log_events_job ON log_events(job_id, id);
+CREATE INDEX IF NOT EXISTS log_events_ts ON log_events(ts);
+CREATE TABLE IF NOT EXISTS templates (
+    name TEXT PRIMARY KEY,
+    dep TEXT NOT NULL,
+    arr TEXT NOT NULL,
+    created REAL NOT NULL
+);
+"""
+
+
+class Store:
+    def __init__(self, path: str | None = None, max_jobs: int = 200, log_max_age_days: float = 14.0,
+                 max_logs_per_job: int = 5000, queue_size: int = 20000):
+        self.path = path or os.environ.get(DB_PATH_ENV) or os.path.join(os.path.expanduser("~"), ".seatbuddy", "seatbuddy.db")
+        # An in-memory database exists per connection, so reads and writes share one
+        self._memory = self.path == ":memory:"
+        if not self._memory:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.max_jobs = max_jobs
+        self.log_max_age = log_max_age_days * 86400
+        self.max_logs_per_job = max_logs_per_job
+        self.dropped = 0
+        self.failed = 0
+        self._q: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._read_lock = threading.Lock()
+        self._reader = self._connect()
+        self._reader.executescript(_SCHEMA)
+        self._mark_abandoned()
+        self._writer = threading.Thread(target=self._write_loop, name="store-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _mark_abandoned(self):
+        # Jobs recorded as running by a process that no longer exists
+        with self._read_lock:
+            rows = self._reader.execute("SELECT id, owner_pid FROM jobs WHERE state='running'").fetchall()
+            dead = [(time.time(), r["id"]) for r in rows if r["owner_pid"] != os.getpid() and not pid_alive(r["owner_pid"])]
+            if dead:
+                self._reader.executemany("UPDATE jobs SET state='abandoned', updated=? WHERE id=?", dead)
+                self._reader.commit()
+
+    # --- write path (queued) ---
+    def _put(self, sql: str, args: tuple, droppable: bool = False):
+        if droppable:
+            try:
+                self._q.put_nowait((sql, args))
+            except queue.Full:
+                # Log events are the only thing we shed under pressure
+                self.dropped += 1
+            return
+        self._q.put((sql, args))
+
+    def _write_loop(self):
+        conn = self._reader if self._memory else self._connect()
+        lock = self._read_lock if self._memory else contextlib.nullcontext()
+        last_prune = 0.0
+        while True:
+            batch = [self._q.get()]
+            deadline = time.monotonic() + _FLUSH_SEC
+            while len(batch) < _BATCH_MAX:
+                try:
+                    batch.append(self._q.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            waiters = [item for item in batch if isinstance(item, threading.Event)]
+            try:
+                with lock:
+                    self._commit(conn, [item for item in batch if not isinstance(item, threading.Event)])
+            finally:
+                for ev in waiters:
+                    ev.set()
+            if time.monotonic() - last_prune > _PRUNE_EVERY_SEC:
+                last_prune = time.monotonic()
+                try:
+                    with lock:
+                        self._prune(conn)
+                except sqlite3.Error:
+                    pass
+
+    def _commit(self, conn: sqlite3.Connection, stmts: list[tuple]):
+        try:
+            with conn:
+                for sql, args in stmts:
+                    conn.execute(sql, args)
+            return
+        except sqlite3.Error:
+            pass
+        # The batch was rolled back; commit its statements one by one so a bad
+        # statement only loses itself
+        for sql, args in stmts:
+            try:
+                with conn:
+                    conn.execute(sql, args)
+            except sqlite3.Error as e:
+                self.failed += 1
+                print(f"저장 실패: {' '.join(sql.split()[:3])} ({e})", file=sys.stderr)
+
+    def _prune(self, conn: sqlite3.Connection):
+        with conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE id IN (SELECT id FROM jobs WHERE state!='running' "
+                "ORDER BY created DESC LIMIT -1 OFFSET ?)", (self.max_jobs,))
+            for table in ("attempts", "results", "log_events"):
+                conn.execute(f"DELETE FROM {table} WHERE job_id NOT IN (SELECT id FROM jobs)")
+            conn.execute("DELETE FROM log_events WHERE ts < ?", (time.time() - self.log_max_age,))
+            # Keep only the newest max_logs_per_job rows of each job
+            conn.execute(
+                "DELETE FROM log_events WHERE id IN (SELECT id FROM (SELECT id, ROW_NUMBER() OVER "
+                "(PARTITION BY job_id ORDER BY id DESC) AS rn FROM log_events) WHERE rn > ?)",
+                (self.max_logs_per_job,))
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything queued so far is committed."""
+        ev = threading.Event()
+        self._q.put(ev)
+        return ev.wait(timeout)
+
+    def create_job(self, job_id: str, params: dict, source: str = "ui"):
+        safe = {k: v for k, v in params.items() if k not in _SECRET_KEYS}
+        now = time.time()
+        self._put(
+            "INSERT OR REPLACE INTO jobs(id, created, updated, state, owner_pid, source, params) VALUES (?,?,?,?,?,?,?)",
+            (job_id, now, now, "running", os.getpid(), source, json.dumps(safe, ensure_ascii=False, default=str)),
+        )
+
+    def finish_job(self, job_id: str, result: dict | None, cancelled: bool = False):
+        ok = bool(result and result.get("ok"))
+        state = "succeeded" if ok else ("cancelled" if cancelled else "failed")
+        now = time.time()
+        self._put("UPDATE jobs SET state=?, updated=? WHERE id=?", (state, now, job_id))
+        self._put(
+            "INSERT OR REPLACE INTO results(job_id, ts, ok, type, error, payload) VALUES (?,?,?,?,?,?)",
+            (job_id, now, int(ok), (result or {}).get("type"), (result or {}).get("error"),
+             json.dumps(result, ensure_ascii=False, default=str)),
+        )
+
+    def add_attempt(self, job_id: str, worker: int | None, row_idx: int | None, label: str | None, ok: bool):
+        self._put(
+            "INSERT INTO attempts(job_id, ts, worker, row_idx, label, ok) VALUES (?,?,?,?,?,?)",
+            (job_id, time.time(), worker, row_idx, label, int(ok)),
+        )
+
+    def add_log(self, job_id: str, msg: str, kind: str = "info"):
+        self._put("INSERT INTO log_events(job_id, ts, kind, msg) VALUES (?,?,?,?)",
+                  (job_id, time.time(), kind, msg), droppable=True)
+
+    def tee(self, job_id: str, log):
+        """Wrap a ``log(msg, kind)`` callable so every record is also persisted."""
+        def _log(msg: str, kind: str = "info"):
+            log(msg, kind)
+            self.add_log(job_id, msg, kind)
+        return _log
+
+    def save_template(self, name: str, dep: str, arr: str):
+        self._put("INSERT OR REPLACE INTO templates(name, dep, arr, created) VALUES (?,?,?,?)",
+                  (name, dep, arr, time.time()))
+
+    def delete_template(self, name: str):
+        self._put("DELETE FROM templates WHERE name=?", (name,))
+
+    # --- read path ---
+    def _query(self, sql: str, args: tuple = ()) -> list[dict]:
+        with self._read_lock:
+            return [dict(r) for r in self._reader.execute(sql, args).fetchall()]
+
+    def recent_jobs(self, limit: int = 20) -> list[dict]:
+        rows = self._query(
+            "SELECT j.id, j.created, j.updated, j.state, j.source, j.params, r.ok, r.type, r.error, "
+            "(SELECT COUNT(*) FROM attempts a WHERE a.job_id = j.id) AS attempts "
+            "FROM jobs j LEFT JOIN results r ON r.job_id = j.id ORDER BY j.created DESC LIMIT ?", (limit,))
+        for r in rows:
+            r["params"] = json.loads(r["params"] or "{}")
+        return rows
+
+    def get_job(self, job_id: str) -> dict | None:
+        rows = self._query("SELECT id, created, updated, state, owner_pid, source FROM jobs WHERE id=?", (job_id,))
+        return rows[0] if rows else None
+
+    def job_logs(self, job_id: str, after_id: int = 0, limit: int = 500) -> list[dict]:
+        return self._query(
+            "SELECT id, ts, kind, msg FROM log_events WHERE job_id=? AND id>? ORDER BY id LIMIT ?",
+            (job_id, after_id, limit))
+
+    def tail_logs(self, job_id: str, limit: int = 300) -> list[dict]:
+        rows = self._query(
+            "SELECT id, ts, kind, msg FROM log_events WHERE job_id=? ORDER BY id DESC LIMIT ?", (job_id, limit))
+        return rows[::-1]
+
+    def templates(self) -> list[dict]:
+        return self._query("SELECT name, dep, arr FROM templates ORDER BY created")
+
+
+_default: Store | None = None
+_default_lock = threading.Lock()
+
+
+def get_store() -> Store:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Store()
+            # The writer is a daemon thread; commit what is queued before exiting
+            atexit.register(_default.flush, 2.0)
+        return _default
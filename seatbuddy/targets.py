@@ -0,0 +1,91 @@
+"""Several (route, date, time window) targets polled by one job's workers.
+
+A job may carry ``targets``: a list of mappings with ``departureStation``,
+``arrivalStation``, ``date``, ``time`` and optionally ``timeTo`` (end of the
+departure window) and ``weight``. Missing keys fall back to the job's top-level
+values. The job's workers share one ``TargetScheduler``, which hands each
+worker the most overdue target. Targets where seats show up or the table keeps
+changing get hot and are revisited sooner. The first booking cancels the job,
+and with it every target.
+"""
+import threading
+import time
+
+# Revisit interval of a cold target with weight 1
+BASE_REVISIT_SEC = 8.0
+MAX_HEAT = 8.0
+HEAT_DECAY = 0.8
+# Reopening the search form for another target costs about this much; a worker stays
+# on its target unless another one is overdue by more.
+SWITCH_COST_SEC = 2.0
+MAX_TARGETS = 20
+
+
+def target_key(t: dict) -> str:
+    return f"{t['departureStation']}>{t['arrivalStation']}@{t['date']} {t['time']}-{t.get('timeTo') or ''}"
+
+
+def target_label(t: dict) -> str:
+    window = f"{t['time']}~{t['timeTo']}" if t.get("timeTo") else t["time"]
+    return f"{t['departureStation']}→{t['arrivalStation']} {t['date']} {window}"
+
+
+def parse_targets(params: dict) -> list[dict]:
+    """Targets of a job; a job without ``targets`` has exactly one, its own fields."""
+    fields = ("departureStation", "arrivalStation", "date", "time", "timeTo")
+    base = {k: params.get(k) for k in fields}
+    out, seen = [], set()
+    for raw in params.get("targets") or [base]:
+        t = dict(base, **{k: v for k, v in dict(raw).items() if v not in (None, "")})
+        try:
+            t["weight"] = max(0.1, float(t.get("weight") or 1.0))
+        except (TypeError, ValueError):
+            t["weight"] = 1.0
+        t["key"] = target_key(t)
+        if t["key"] in seen:
+            continue
+        seen.add(t["key"])
+        out.append(t)
+    return out[:MAX_TARGETS]
+
+
+class TargetScheduler:
+    def __init__(self, targets: list[dict]):
+        self.targets = {t["key"]: t for t in targets}
+        now = time.monotonic()
+        self._due = {k: now for k in self.targets}
+        self._heat = {k: 1.0 for k in self.targets}
+        self._fingerprint: dict[str, object] = {}
+        self._holders: dict[str, int] = {k: 0 for k in self.targets}
+        self._lock = threading.Lock()
+
+    def pick(self, current: str | None) -> dict:
+        """Target for a worker's next poll; ``current`` is what its form shows now."""
+        with self._lock:
+            if self._holders.get(current):
+                self._holders[current] -= 1
+            # Among equally due targets prefer one no other worker is on
+            best = min(self.targets, key=lambda k: (self._due[k], self._holders[k]))
+            if current in self.targets and self._due[current] - self._due[best] <= SWITCH_COST_SEC:
+                best = current
+            self._holders[best] += 1
+            # Claimed: others see it as less due while this worker polls it
+            self._due[best] = max(self._due[best], time.monotonic()) + self._interval(best) / 2
+            return self.targets[best]
+
+    def report(self, key: str, seats: int, fingerprint=None):
+        """Outcome of one poll of ``key``: seats seen and a fingerprint of the table."""
+        with self._lock:
+            if key not in self.targets:
+                return
+            changed = fingerprint is not None and self._fingerprint.get(key) not in (None, fingerprint)
+            self._fingerprint[key] = fingerprint
+            if seats or changed:
+                self._heat[key] = min(MAX_HEAT, self._heat[key] * 2)
+            else:
+                self._heat[key] = max(1.0, self._heat[key] * HEAT_DECAY)
+            self._due[key] = time.monotonic() + self._interval(key)
+
+    def _interval(self, key: str) -> float:
+        return BASE_REVISIT_SEC / (self.targets[key]["weight"] * self._heat[key])
+
@@ -0,0 +1,90 @@
+"""Cancellation-aware sleeps and Selenium waits.
+
+Workers receive ``cancelled`` as a zero-argument callable. When it is the bound
+``is_set`` of a ``threading.Event`` we block on the event itself and wake up the
+moment it is set; any other callable is polled every ``POLL_SEC``.
+"""
+import threading
+import time
+
+POLL_SEC = 0.05
+
+
+class Cancelled(RuntimeError):
+    def __init__(self, msg: str = "사용자 중지"):
+        super().__init__(msg)
+
+
+class CancelEvent(threading.Event):
+    """``threading.Event`` that remembers when it was first set."""
+
+    set_at: float | None = None
+
+    def set(self):
+        if self.set_at is None:
+            self.set_at = time.monotonic()
+        super().set()
+
+    def clear(self):
+        self.set_at = None
+        super().clear()
+
+
+def _event_of(cancelled) -> threading.Event | None:
+    ev = getattr(cancelled, "__self__", None)
+    return ev if isinstance(ev, threading.Event) else None
+
+
+def check(cancelled):
+    if cancelled():
+        raise Cancelled()
+
+
+def sleep(seconds: float, cancelled):
+    """Sleep up to ``seconds``; raise ``Cancelled`` as soon as cancellation is seen."""
+    seconds = max(0.0, float(seconds))
+    ev = _event_of(cancelled)
+    if ev is not None:
+        if ev.wait(seconds):
+            raise Cancelled()
+        return
+    deadline = time.monotonic() + seconds
+    while True:
+        check(cancelled)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(min(POLL_SEC, remaining))
+
+
+def sleep_until(deadline: float, cancelled, spin: float = 0.005):
+    """Sleep until wall-clock ``deadline`` (epoch seconds), busy-waiting the last ``spin``
+    seconds so the wake-up is not late by a scheduler tick."""
+    while True:
+        left = deadline - time.time()
+        if left <= 0:
+            return
+        if left > spin:
+            sleep(left - spin, cancelled)
+        else:
+            check(cancelled)
+
+
+def wait_until(driver, condition, timeout: float, cancelled, poll: float = 0.1):
+    """``WebDriverWait(...).until`` that also gives up when the job is cancelled."""
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    def _cond(d):
+        check(cancelled)
+        return condition(d)
+    return WebDriverWait(driver, timeout, poll_frequency=poll).until(_cond)
+
+
+def find_element(driver, by: str, value: str, cancelled, timeout: float = 8.0):
+    """Explicit, cancellable replacement for a long implicit wait on one element."""
+    from selenium.common.exceptions import NoSuchElementException, TimeoutException
+
+    try:
+        return wait_until(driver, lambda d: (d.find_elements(by, value) or [None])[0], timeout, cancelled)
+    except TimeoutException:
+        raise NoSuchElementException(f"{by}={value} not found within {timeout:.1f}s")
@@ -1,31 +1,39 @@
 import express from 'express';
 import cors from 'cors';
-import { runSrtAutomation } from './srt.js';
+import { runSrtAutomation, driverPool } from './srt.js';
+import { JobRegistry } from './jobs.js';
 
 const app = express();
 app.use(cors());
 app.use(express.json({ limit: '200kb' }));
 
-let job = {
-  running: false,
-  logs: [],
-  state: 'idle',
-  cancel: null,
-  result: null,
-};
+// 작업마다 로그/상태를 따로 두어 여러 사용자가 동시에 실행할 수 있습니다.
+const registry = new JobRegistry();
 
-function addLog(...args) {
-  const ts = new Date().toISOString();
-  const line = `[${ts}] ${args.join(' ')}`;
-  job.logs.push(line);
-  if (job.logs.length > 5000) job.logs.splice(0, job.logs.length - 5000);
-  console.log(line);
+function cursorOf(req) {
+  return Math.max(0, parseInt(req.query.after, 10) || 0);
 }
 
-app.post('/start', async (req, res) => {
-  if (job.running) {
-    return res.status(409).json({ ok: false, message: '이미 실행 중입니다.' });
+// jobId가 없으면 실행 중인 유일한 작업(없으면 가장 최근 작업)을 씁니다.
+// 여러 작업이 실행 중이면 다른 사용자의 작업을 건드리지 않도록 jobId를 요구합니다.
+function jobOf(req, res) {
+  const id = req.params.id || req.query.jobId || req.body?.jobId;
+  if (id) return registry.get(id);
+  const running = registry.running();
+  if (running.length > 1) {
+    res.status(400).json({ ok: false, message: '실행 중인 작업이 여러 개입니다. jobId를 지정하세요.' });
+    return undefined;
   }
+  return running[0] || registry.latest();
+}
+
+// 커서 이후 로그만 돌려줍니다. 다음 요청에는 cursor를 after로 넘기면 됩니다.
+function logsResponse(job, after) {
+  const logs = job.logsAfter(after);
+  return { ...job.status(), logs, cursor: logs.length ? logs[logs.length - 1].id : Math.max(after, job.seq) };
+}
+
+function startJob(req, res) {
   const {
     userId,
     password,
@@ -35,6 +43,9 @@ app.post('/start', async (req, res) => {
     time, // HH:mm
     numToCheck,
     mode, // 'reserve' | 'waitlist'
+    seatPref, // 'economy' | 'first' | 'both'
+    seatOrder, // 'prefer_first' | 'prefer_economy'
+    timeTo, // HH:mm (선택)
     headless = false,
   } = req.body || {};
 
@@ -48,14 +59,12 @@ app.post('/start', async (req, res) => {
     return res.status(400).json({ ok: false, message: '출발일자/시간을 입력하세요.' });
   }
 
-  job.running = true;
-  job.logs = [];
-  job.state = 'starting';
-  job.result = null;
-  let cancelled = false;
-  job.cancel = () => { cancelled = true; };
-
-  addLog('자동화를 시작합니다.');
+  const job = registry.create({ userId, departureStation, arrivalStation, date, time, mode });
+  if (!job) {
+    return res.status(429).json({ ok: false, message: `동시에 실행할 수 있는 작업은 최대 ${registry.maxJobs}개입니다.` });
+  }
+  job.state = 'running';
+  job.log('자동화를 시작합니다.');
 
   runSrtAutomation(
     {
@@ -67,47 +76,65 @@ app.post('/start', async (req, res) => {
       time,
       numToCheck: Number(numToCheck) || 3,
       mode,
+      seatPref,
+      seatOrder,
+      timeTo,
       headless: !!headless,
     },
-    (msg) => addLog(msg),
-    () => cancelled,
+    (msg, kind) => job.log(msg, kind),
+    () => job.cancelled,
   )
     .then((result) => {
-      job.result = result;
-      job.state = 'finished';
       // 사용자용 로그에는 결과 JSON을 노출하지 않습니다.
-      addLog('자동화가 완료되었습니다.');
+      job.log('자동화가 완료되었습니다.', 'success');
+      job.finish('finished', result);
     })
     .catch((err) => {
-      job.result = { ok: false, error: String(err && err.message ? err.message : err) };
-      job.state = 'error';
-      addLog('오류 발생:', String(err && err.stack ? err.stack : err));
+      if (job.cancelled) {
+        job.log('사용자 요청으로 중지했습니다.', 'warn');
+        job.finish('cancelled', { ok: false, error: '사용자 중지' });
+        return;
+      }
+      job.log(`오류 발생: ${String(err && err.stack ? err.stack : err)}`, 'error');
+      job.finish('error', { ok: false, error: String(err && err.message ? err.message : err) });
     })
-    .finally(() => {
-      job.running = false;
-      job.cancel = null;
-    });
+    .finally(() => registry.evict());
 
-  res.json({ ok: true, message: '백그라운드에서 시작했습니다.' });
-});
+  res.json({ ok: true, jobId: job.id, message: '백그라운드에서 시작했습니다.' });
+}
 
-app.post('/stop', async (_req, res) => {
-  if (job.running && typeof job.cancel === 'function') {
-    job.cancel();
-    addLog('중지 요청을 보냈습니다. 정리 중...');
+function stopJob(req, res) {
+  const job = jobOf(req, res);
+  if (job === undefined) return;
+  if (job && registry.stop(job.id)) {
     return res.json({ ok: true });
   }
   return res.status(409).json({ ok: false, message: '실행 중이 아닙니다.' });
+}
+
+app.post('/jobs', startJob);
+app.get('/jobs', (_req, res) => res.json({ jobs: registry.list(), pool: driverPool.stats }));
+app.get('/jobs/:id', (req, res) => {
+  const job = registry.get(req.params.id);
+  if (!job) return res.status(404).json({ ok: false, message: 'unknown job' });
+  res.json(job.status());
+});
+app.get('/jobs/:id/logs', (req, res) => {
+  const job = registry.get(req.params.id);
+  if (!job) return res.status(404).json({ ok: false, message: 'unknown job' });
+  res.json(logsResponse(job, cursorOf(req)));
 });
+app.post('/jobs/:id/stop', stopJob);
 
-app.get('/status', async (_req, res) => {
-  const last = job.logs.slice(-200);
-  res.json({
-    running: job.running,
-    state: job.state,
-    logs: last,
-    result: job.result,
-  });
+// 이전 단일 작업 API: jobId로 지정한 작업, 또는 실행 중인 작업이 하나뿐일 때 그 작업에 적용됩니다.
+app.post('/start', startJob);
+app.post('/stop', stopJob);
+app.get('/status', (req, res) => {
+  const job = jobOf(req, res);
+  if (job === undefined) return;
+  if (!job) return res.json({ running: false, state: 'idle', logs: [], result: null });
+  if (req.query.after !== undefined) return res.json(logsResponse(job, cursorOf(req)));
+  res.json({ ...job.status(), logs: job.logs.slice(-200).map((l) => `[${l.t}] ${l.msg}`) });
 });
 
 const port = process.env.PORT || 3000;
@@ -0,0 +1,108 @@
+import { randomUUID } from 'node:crypto';
+
+// 동시에 실행할 수 있는 작업 수 (PC 자원/계정 보호)
+export const MAX_JOBS = Number(process.env.MAX_JOBS) || 4;
+// 작업마다 보관하는 로그 수; 그보다 오래된 줄은 커서 조회에서 빠집니다.
+const MAX_LOGS = 5000;
+// 끝난 작업은 최근 것만 남깁니다.
+const KEEP_FINISHED = 50;
+const FINISHED = ['finished', 'error', 'cancelled'];
+
+export class Job {
+  constructor(id, params) {
+    this.id = id;
+    this.params = params;
+    this.created = Date.now();
+    this.state = 'starting';
+    this.result = null;
+    this.logs = [];
+    this.seq = 0;
+    this.cancelled = false;
+  }
+
+  get running() {
+    return !FINISHED.includes(this.state);
+  }
+
+  log(msg, kind = 'info') {
+    this.seq += 1;
+    this.logs.push({ id: this.seq, t: new Date().toISOString(), kind, msg });
+    if (this.logs.length > MAX_LOGS) this.logs.splice(0, this.logs.length - MAX_LOGS);
+    console.log(`[${this.id}] ${msg}`);
+  }
+
+  // 커서(마지막으로 받은 로그 id) 이후의 로그만 돌려줍니다.
+  logsAfter(after = 0, limit = 500) {
+    const first = this.logs.length ? this.logs[0].id : this.seq + 1;
+    const start = Math.max(0, after + 1 - first);
+    return this.logs.slice(start, start + limit);
+  }
+
+  finish(state, result) {
+    this.state = state;
+    this.result = result;
+  }
+
+  status() {
+    return {
+      jobId: this.id,
+      state: this.state,
+      running: this.running,
+      result: this.result,
+      lastEventId: this.seq,
+    };
+  }
+}
+
+export class JobRegistry {
+  constructor(maxJobs = MAX_JOBS) {
+    this.maxJobs = maxJobs;
+    this.jobs = new Map();
+  }
+
+  get(id) {
+    return this.jobs.get(id) || null;
+  }
+
+  latest() {
+    let last = null;
+    for (const job of this.jobs.values()) {
+      if (!last || job.created >= last.created) last = job;
+    }
+    return last;
+  }
+
+  running() {
+    return [...this.jobs.values()].filter((j) => j.running);
+  }
+
+  list() {
+    return [...this.jobs.values()]
+      .sort((a, b) => b.created - a.created)
+      .map((j) => ({ jobId: j.id, state: j.state, running: j.running, lastEventId: j.seq }));
+  }
+
+  // 새 작업을 등록합니다. 실행 중 작업이 너무 많으면 null을 돌려줍니다.
+  create(params) {
+    if (this.running().length >= this.maxJobs) return null;
+    const job = new Job(randomUUID().replace(/-/g, '').slice(0, 12), params);
+    this.jobs.set(job.id, job);
+    this.evict();
+    return job;
+  }
+
+  stop(id) {
+    const job = this.get(id);
+    if (!job || !job.running) return false;
+    job.cancelled = true;
+    job.log('중지 요청을 보냈습니다. 정리 중...', 'warn');
+    return true;
+  }
+
+  evict() {
+    const finished = [...this.jobs.values()].filter((j) => !j.running).sort((a, b) => a.created - b.created);
+    for (const job of finished.slice(0, Math.max(0, finished.length - KEEP_FINISHED))) {
+      this.jobs.delete(job.id);
+    }
+  }
+}
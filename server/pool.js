@@ -0,0 +1,74 @@
+// 크롬 드라이버 재사용 풀.
+// 작업이 끝난 브라우저는 쿠키를 지우고 빈 페이지로 돌려 놓은 뒤 보관했다가 다음 작업에
+// 다시 씁니다. 크롬을 새로 띄우는 몇 초를 아끼고, 동시에 떠 있는 브라우저 수도 줄어듭니다.
+// 종류(헤드리스 여부)별로 따로 보관하고, 오래 쓰이지 않은 브라우저는 종료합니다.
+
+export const POOL_SIZE = Number(process.env.DRIVER_POOL_SIZE ?? 2);
+const IDLE_MS = Number(process.env.DRIVER_IDLE_MS) || 5 * 60 * 1000;
+
+export class DriverPool {
+  // create(key) → 새 드라이버, reset(driver) → 재사용 전 초기화(실패하면 버림)
+  constructor(create, reset, { size = POOL_SIZE, idleMs = IDLE_MS } = {}) {
+    this.create = create;
+    this.reset = reset;
+    this.size = size;
+    this.idleMs = idleMs;
+    this.idle = []; // { key, driver, since }
+    this.stats = { created: 0, reused: 0, discarded: 0 };
+    this.timer = setInterval(() => this.closeIdle(), Math.min(idleMs, 60 * 1000));
+    this.timer.unref?.();
+  }
+
+  async acquire(key) {
+    while (true) {
+      const i = this.idle.findIndex((e) => e.key === key);
+      if (i < 0) break;
+      const [entry] = this.idle.splice(i, 1);
+      // 보관 중에 죽은 브라우저는 버리고 다음 것을 확인합니다.
+      try {
+        await entry.driver.getCurrentUrl();
+        this.stats.reused += 1;
+        return { driver: entry.driver, reused: true };
+      } catch (_) {
+        await this.discard(entry.driver);
+      }
+    }
+    const driver = await this.create(key);
+    this.stats.created += 1;
+    return { driver, reused: false };
+  }
+
+  // healthy=false(브라우저 이상) 이거나 풀이 가득 차면 종료합니다.
+  async release(key, driver, healthy = true) {
+    if (!driver) return;
+    if (!healthy || this.idle.filter((e) => e.key === key).length >= this.size) {
+      await this.discard(driver);
+      return;
+    }
+    try {
+      await this.reset(driver);
+    } catch (_) {
+      await this.discard(driver);
+      return;
+    }
+    this.idle.push({ key, driver, since: Date.now() });
+  }
+
+  async discard(driver) {
+    this.stats.discarded += 1;
+    try { await driver.quit(); } catch (_) {}
+  }
+
+  async closeIdle(now = Date.now()) {
+    const expired = this.idle.filter((e) => now - e.since > this.idleMs);
+    this.idle = this.idle.filter((e) => now - e.since <= this.idleMs);
+    await Promise.all(expired.map((e) => this.discard(e.driver)));
+  }
+
+  async close() {
+    clearInterval(this.timer);
+    const all = this.idle;
+    this.idle = [];
+    await Promise.all(all.map((e) => this.discard(e.driver)));
+  }
+}
@@ -0,0 +1,126 @@
+// 조회 결과 표를 한 번의 executeScript로 읽어 시도할 좌석을 순위대로 고릅니다.
+// 행/칸마다 findElement를 부르던 방식보다 왕복이 훨씬 적습니다.
+// 파이썬 seatbuddy/ranking.py와 같은 스냅샷·점수 규칙이라 같은 작업이면 같은 열차를 고릅니다.
+
+export const RESULT_TABLE = '#result-form > fieldset > div.tbl_wrap.th_thead > table';
+
+// 페이지 URL, 헤더 텍스트, 행별 각 칸의 텍스트/버튼 힌트/이미지 alt
+export const SNAPSHOT_JS = `
+const table = document.querySelector(arguments[0]);
+if (!table) return {url: location.href, heads: [], rows: []};
+const heads = Array.from(table.querySelectorAll('thead th')).map(th => (th.innerText || '').trim());
+const rows = Array.from(table.querySelectorAll(':scope > tbody > tr')).map(tr =>
+  Array.from(tr.querySelectorAll('td')).map(td => {
+    const ctl = td.querySelector('a, button, input[type=button]');
+    const img = td.querySelector('img');
+    return {
+      text: (td.innerText || '').trim(),
+      hint: ctl ? ((ctl.getAttribute('title') || '') + ' ' + (ctl.getAttribute('aria-label') || '')) : '',
+      alt: img ? (img.getAttribute('alt') || '') : '',
+    };
+  }));
+return {url: location.href, heads: heads, rows: rows};
+`;
+
+// 선호하지 않는 등급(seatPref 'both')은 목표 시각에서 이만큼(분) 더 먼 것으로 칩니다.
+export const OTHER_CLASS_PENALTY_MIN = 10;
+export const DEFAULT_COLS = { gen: 7, fst: 6, wait: 8, dep: 4 };
+
+export function parseMinutes(text) {
+  const m = /(\d{1,2}):(\d{2})/.exec(text || '');
+  return m ? Number(m[1]) * 60 + Number(m[2]) : null;
+}
+
+// 헤더 텍스트로 좌석/출발 칸 위치(1부터)를 찾습니다. 반환: { cols, ambiguous }
+export function resolveColumns(heads, cols = DEFAULT_COLS) {
+  const findIdx = (keywords, def) => {
+    const i = heads.findIndex((t) => keywords.some((kw) => t.includes(kw)));
+    return i >= 0 ? i + 1 : def;
+  };
+  const out = {
+    gen: findIdx(['일반석', '일반실', '일반'], cols.gen),
+    fst: findIdx(['특실', '특'], cols.fst),
+    wait: findIdx(['예약대기', '대기'], cols.wait),
+    dep: findIdx(['출발'], cols.dep),
+  };
+  // 병합 헤더 등으로 매핑이 이상하면 기본값
+  const n = heads.length;
+  if (out.gen === out.fst || out.gen < 1 || out.gen > n || out.fst < 1 || out.fst > n) {
+    return { cols: { ...out, gen: DEFAULT_COLS.gen, fst: DEFAULT_COLS.fst }, ambiguous: true };
+  }
+  return { cols: out, ambiguous: false };
+}
+
+export function isSrtRow(cells) {
+  if (!cells || !cells.length) return false;
+  const t = (cells[0].text || cells[0].alt || '').trim().toUpperCase();
+  // 'SRT' 대신 'SR' 로고만 있는 화면도 있습니다.
+  return t.includes('SRT') || t === 'SR';
+}
+
+function cellHas(cell, full, short) {
+  // 아이콘 버튼만 있는 화면도 있어 속성까지 확인합니다.
+  if (!cell) return false;
+  return (cell.text || '').includes(full) || (cell.hint || '').includes(short) || (cell.alt || '').includes(short);
+}
+
+// 사용자가 받는 좌석 등급 [칸 키, 라벨, 벌점], 선호 순
+export function seatClasses(seatPref, seatOrder) {
+  if (seatPref === 'economy') return [['gen', '일반석', 0]];
+  if (seatPref === 'first') return [['fst', '특실', 0]];
+  if (seatOrder === 'prefer_economy') return [['gen', '일반석', 0], ['fst', '특실', OTHER_CLASS_PENALTY_MIN]];
+  return [['fst', '특실', 0], ['gen', '일반석', OTHER_CLASS_PENALTY_MIN]];
+}
+
+// 새로고침 후 행 번호가 바뀌어도 같은 좌석을 가리키는 키
+export function candidateKey(c) {
+  return `${c.train || c.row}|${c.dep}|${c.label}`;
+}
+
+// 상위 numToCheck개 SRT 행에서 시도할 좌석을 좋은 순으로 돌려줍니다.
+// 각 후보는 { row(1부터), col, label, dep, train, score }. window([분, 분]) 밖의 열차는 건너뜁니다.
+// SRT로 인식한 행 수도 함께 돌려줘, 필터가 맞지 않는 화면에서는 호출 측이 필터를 끌 수 있습니다.
+export function rank(snapshot, {
+  mode = 'reserve', seatPref = 'both', seatOrder = 'prefer_first', numToCheck = 3,
+  targetMin = null, cols = DEFAULT_COLS, srtOnly = true, window = null,
+} = {}) {
+  const rows = (snapshot && snapshot.rows) || [];
+  const classes = seatClasses(seatPref, seatOrder);
+  const out = [];
+  let checked = 0;
+  let srtRows = 0;
+  for (let i = 0; i < rows.length && checked < numToCheck; i++) {
+    const cells = rows[i];
+    const row = i + 1;
+    if (srtOnly) {
+      if (!isSrtRow(cells)) continue;
+      srtRows += 1;
+    }
+    if (cells.length < cols.wait) continue;
+    const dep = cells.length >= cols.dep ? parseMinutes(cells[cols.dep - 1].text) : null;
+    // 시간 범위 밖 열차는 numToCheck에 세지 않습니다.
+    if (window && dep !== null && !(window[0] <= dep && dep <= window[1])) continue;
+    checked += 1;
+    const train = cells.length > 2 ? cells[2].text : '';
+    // 시각을 못 읽은 행은 표 순서대로, 시각이 있는 후보들 뒤에 둡니다.
+    const dist = dep !== null && targetMin !== null ? Math.abs(dep - targetMin) : 1440 + row;
+    if (mode === 'waitlist') {
+      if (cellHas(cells[cols.wait - 1], '신청하기', '신청')) {
+        out.push({ row, col: cols.wait, label: '예약대기', dep, train, score: dist });
+      }
+      continue;
+    }
+    const seen = new Set();
+    for (const [key, label, penalty] of classes) {
+      const col = cols[key];
+      if (seen.has(col) || cells.length < col) continue;
+      seen.add(col);
+      if (cellHas(cells[col - 1], '예약하기', '예약')) {
+        out.push({ row, col, label, dep, train, score: dist + penalty });
+      }
+    }
+  }
+  // 안정 정렬: 점수가 같으면 행 순서, 그다음 등급 순서
+  out.sort((a, b) => a.score - b.score);
+  return { candidates: out, srtRows };
+}
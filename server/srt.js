@@ -1,13 +1,103 @@
 import { Builder, By, Key, until } from 'selenium-webdriver';
 import chrome from 'selenium-webdriver/chrome.js';
+import { DriverPool } from './pool.js';
+import { RESULT_TABLE, SNAPSHOT_JS, DEFAULT_COLS, resolveColumns, rank, candidateKey, parseMinutes } from './ranking.js';
 
 const URLS = {
   login: 'https://etk.srail.co.kr/cmc/01/selectLoginForm.do',
   search: 'https://etk.srail.kr/hpg/hra/01/selectScheduleList.do',
 };
 
+// 고정 sleep 대신 조건이 맞을 때까지 짧게 확인합니다. (중지 요청도 이 간격으로 반영)
+const POLL_MS = 100;
+const PAGE_TIMEOUT_MS = 10000;
+const RESULT_TIMEOUT_MS = 10000;
+
 function sleep(ms) { return new Promise(r => setTimeout(r, ms)); }
 
+function checkCancelled(isCancelled) {
+  if (isCancelled()) throw new Error('사용자 중지');
+}
+
+// 중지 요청에 바로 반응하는 sleep
+async function pause(ms, isCancelled) {
+  const end = Date.now() + ms;
+  while (Date.now() < end) {
+    checkCancelled(isCancelled);
+    await sleep(Math.min(POLL_MS, end - Date.now()));
+  }
+}
+
+// cond()가 참 같은 값을 돌려줄 때까지 기다립니다. 시간 초과면 null.
+async function waitFor(cond, timeoutMs, isCancelled) {
+  const end = Date.now() + timeoutMs;
+  while (true) {
+    checkCancelled(isCancelled);
+    let value = null;
+    try { value = await cond(); } catch (_) {}
+    if (value) return value;
+    if (Date.now() >= end) return null;
+    await sleep(POLL_MS);
+  }
+}
+
+function present(driver, locator) {
+  return async () => (await driver.findElements(locator)).length > 0;
+}
+
+// 예약대기 신청 완료 화면: 결제 화면과 같은 표시가 있거나 완료 문구가 보이면 신청된 것으로 봅니다.
+const WAITLIST_DONE_JS = `
+if (document.getElementById('isFalseGotoMain')) return true;
+return /예약대기[^\\n]{0,30}(완료|되었습니다)/.test(document.body ? document.body.innerText : '');
+`;
+
+function waitlistConfirmed(driver) {
+  return async () => !!(await driver.executeScript(WAITLIST_DONE_JS));
+}
+
+function createDriver(headless) {
+  const options = new chrome.Options();
+  if (headless) options.addArguments('--headless=new');
+  options.addArguments('--disable-gpu');
+  // Codespaces/컨테이너 환경 안정화 옵션
+  options.addArguments('--no-sandbox');
+  options.addArguments('--disable-dev-shm-usage');
+  options.addArguments('--window-size=1280,1000');
+  return new Builder().forBrowser('chrome').setChromeOptions(options).build();
+}
+
+// 다음 작업(다른 계정일 수 있음)에 넘기기 전 로그인 상태를 지웁니다.
+async function resetDriver(driver) {
+  try {
+    // 모든 도메인의 쿠키 (deleteAllCookies는 현재 도메인만 지움)
+    await driver.sendDevToolsCommand('Network.clearBrowserCookies', {});
+  } catch (_) {
+    await driver.manage().deleteAllCookies();
+  }
+  await driver.get('about:blank');
+}
+
+export const driverPool = new DriverPool(createDriver, resetDriver);
+
+// 조회하기를 누르고 새 결과 표가 뜰 때까지 기다립니다.
+async function submitQuery(driver, isCancelled) {
+  const [oldTable] = await driver.findElements(By.css(RESULT_TABLE));
+  const btn = await driver.findElement(By.xpath("//input[@value='조회하기']"));
+  await driver.executeScript('arguments[0].click();', btn);
+  return waitFor(async () => {
+    if (oldTable) {
+      // 이전 표가 남아 있으면 아직 새 결과가 아닙니다.
+      try {
+        await oldTable.getTagName();
+        return null;
+      } catch (e) {
+        if (e.name !== 'StaleElementReferenceError') return null;
+      }
+    }
+    return present(driver, By.css(`${RESULT_TABLE} > tbody > tr`))();
+  }, RESULT_TIMEOUT_MS, isCancelled);
+}
+
 export async function runSrtAutomation(params, log, isCancelled) {
   const {
     userId,
@@ -18,6 +108,9 @@ export async function runSrtAutomation(params, log, isCancelled) {
     time, // HH:mm
     numToCheck = 3,
     mode = 'reserve', // or 'waitlist'
+    seatPref = 'both', // economy | first | both
+    seatOrder = 'prefer_first', // both일 때: prefer_first | prefer_economy
+    timeTo, // HH:mm, 선택: 이 시각보다 늦게 출발하는 열차는 건너뜀
     headless = false,
   } = params;
 
@@ -30,32 +123,44 @@ export async function runSrtAutomation(params, log, isCancelled) {
   const evenNum = rawNum === 24 ? 24 : rawNum - (rawNum % 2);
   const targetHH = String(evenNum).padStart(2, '0');
 
-  const options = new chrome.Options();
-  if (headless) options.addArguments('--headless=new');
-  options.addArguments('--disable-gpu');
-  // Codespaces/컨테이너 환경 안정화 옵션
-  options.addArguments('--no-sandbox');
-  options.addArguments('--disable-dev-shm-usage');
-  options.addArguments('--window-size=1280,1000');
-
   let driver;
+  let healthy = false;
   try {
-    driver = await new Builder().forBrowser('chrome').setChromeOptions(options).build();
+    const got = await driverPool.acquire(!!headless);
+    driver = got.driver;
+    if (got.reused) log('대기 중인 브라우저를 재사용합니다.');
+    // 암묵적 대기는 끄고 필요한 곳에서만 명시적으로 기다립니다.
+    await driver.manage().setTimeouts({ implicit: 0 });
 
     log('로그인 페이지로 이동...');
     await driver.get(URLS.login);
-    await driver.manage().setTimeouts({ implicit: 10000 });
+    if (!await waitFor(present(driver, By.id('srchDvNm01')), PAGE_TIMEOUT_MS, isCancelled)) {
+      throw new Error('로그인 화면을 불러오지 못했습니다.');
+    }
 
     await driver.findElement(By.id('srchDvNm01')).sendKeys(userId);
     await driver.findElement(By.id('hmpgPwdCphd01')).sendKeys(password);
     await driver.findElement(By.css('input.loginSubmit')).click();
-    await sleep(1500);
+    // 알림창이 뜨거나 로그인 폼이 사라지면 응답이 온 것입니다.
+    const login = await waitFor(async () => {
+      try {
+        const alert = await driver.switchTo().alert();
+        const text = await alert.getText();
+        await alert.accept();
+        return `알림창: ${text}`;
+      } catch (_) {}
+      return (await driver.findElements(By.id('hmpgPwdCphd01'))).length === 0 ? 'ok' : null;
+    }, PAGE_TIMEOUT_MS, isCancelled);
+    if (login && login !== 'ok') log(login, 'warn');
+    else if (!login) log('로그인 응답이 늦습니다. 계속 진행합니다.', 'warn');
 
-    if (isCancelled()) throw new Error('사용자 중지');
+    checkCancelled(isCancelled);
 
     log('열차 조회 페이지로 이동...');
     await driver.get(URLS.search);
-    await driver.manage().setTimeouts({ implicit: 8000 });
+    if (!await waitFor(present(driver, By.id('dptRsStnCdNm')), PAGE_TIMEOUT_MS, isCancelled)) {
+      throw new Error('열차 조회 화면을 불러오지 못했습니다.');
+    }
 
     const depField = await driver.findElement(By.id('dptRsStnCdNm'));
     await depField.clear();
@@ -90,85 +195,108 @@ export async function runSrtAutomation(params, log, isCancelled) {
     if (selected) {
       log(`요청 시간 ${selHH}:${selMM} → 적용 시간 ${targetHH}시 (짝수 기준)`);
     } else {
-      log(`시간 옵션 선택 실패: ${targetHH}시. 기본값으로 진행합니다.`);
+      log(`시간 옵션 선택 실패: ${targetHH}시. 기본값으로 진행합니다.`, 'warn');
     }
 
     log('조건 입력 완료. 조회합니다...');
-    // 조회하기 클릭
-    const queryBtn = await driver.findElement(By.xpath("//input[@value='조회하기']"));
-    await driver.executeScript('arguments[0].click();', queryBtn);
-    await driver.manage().setTimeouts({ implicit: 10000 });
-    await sleep(800);
+    await submitQuery(driver, isCancelled);
 
+    // 요청 시각에 가까운 열차부터 시도합니다.
+    const targetMin = parseMinutes(time);
+    const endMin = parseMinutes(timeTo);
+    const window = targetMin !== null && endMin !== null ? [targetMin, endMin] : null;
+    let cols = DEFAULT_COLS;
+    let colsResolved = false;
+    let srtOnly = true;
     let refreshCount = 0;
+    const rankOpts = () => ({ mode, seatPref, seatOrder, numToCheck, targetMin, cols, srtOnly, window });
     while (true) {
-      if (isCancelled()) throw new Error('사용자 중지');
+      checkCancelled(isCancelled);
 
-      // 상위 N개 행 확인
-      const rows = await driver.findElements(By.css('#result-form > fieldset > div.tbl_wrap.th_thead > table > tbody > tr'));
-      if (rows.length === 0) {
-        log('조회 결과가 없습니다. 계속 재조회합니다.');
+      // 표 전체를 한 번에 읽습니다.
+      let snap = await driver.executeScript(SNAPSHOT_JS, RESULT_TABLE);
+      if (!colsResolved && snap.heads.length) {
+        const resolved = resolveColumns(snap.heads);
+        cols = resolved.cols;
+        colsResolved = true;
+        if (resolved.ambiguous) log('열 헤더 모호/이상: 기본 매핑 사용(일반=7, 특실=6)');
+        else log(`탐지된 열: 일반=${cols.gen}, 특실=${cols.fst}, 대기=${cols.wait}`);
+      }
+      if (snap.rows.length === 0) {
+        log('조회 결과가 없습니다. 계속 재조회합니다.', 'warn');
       }
-      let acted = false;
-      for (let i = 1; i <= numToCheck; i++) {
-        if (isCancelled()) throw new Error('사용자 중지');
-        let seatTxt = '';
-        let waitTxt = '';
+      let { candidates, srtRows } = rank(snap, rankOpts());
+      // SRT 표기를 한 행도 찾지 못하는 화면이면 모든 열차 행을 검사합니다.
+      if (srtOnly && srtRows === 0 && snap.rows.length > 0) {
+        srtOnly = false;
+        log('SRT 구분 불가: 모든 열차 행을 검사로 전환합니다.', 'warn');
+        ({ candidates } = rank(snap, rankOpts()));
+      }
+      if (candidates.length > 1) {
+        log('후보 순위: ' + candidates.slice(0, 5).map((c) => `행 ${c.row} ${c.label}`).join(', '));
+      }
+      const tried = new Set();
+      while (candidates.length) {
+        checkCancelled(isCancelled);
+        const cand = candidates.shift();
+        tried.add(candidateKey(cand));
+        const { row, col } = cand;
+        const link = By.css(`${RESULT_TABLE} > tbody > tr:nth-child(${row}) > td:nth-child(${col}) a`);
+
+        if (mode === 'waitlist') log(`행 ${row}: 예약대기 신청 시도`);
+        else log(`행 ${row} ${cand.label}: 예약하기 시도`);
+        const a = await driver.findElement(link);
         try {
-          seatTxt = (await driver.findElement(By.css(`#result-form > fieldset > div.tbl_wrap.th_thead > table > tbody > tr:nth-child(${i}) > td:nth-child(7)`))).getText();
-          waitTxt = (await driver.findElement(By.css(`#result-form > fieldset > div.tbl_wrap.th_thead > table > tbody > tr:nth-child(${i}) > td:nth-child(8)`))).getText();
+          await a.click();
         } catch (_) {
-          // 행이 부족하거나 DOM 갱신
-          continue;
+          await a.sendKeys(Key.ENTER);
         }
-        seatTxt = await seatTxt; waitTxt = await waitTxt;
-
-        if (mode !== 'waitlist' && seatTxt.includes('예약하기')) {
-          log(`행 ${i}: 예약하기 시도`);
-          const a = await driver.findElement(By.css(`#result-form > fieldset > div.tbl_wrap.th_thead > table > tbody > tr:nth-child(${i}) > td:nth-child(7) > a`));
-          try {
-            await a.click();
-          } catch (_) {
-            await a.sendKeys(Key.ENTER);
-          }
 
-          // alert 수락 시도
-          try {
-            await driver.wait(until.alertIsPresent(), 1500);
-            const alert = await driver.switchTo().alert();
-            log(`알림창: ${await alert.getText()}`);
-            await alert.accept();
-          } catch (_) {}
-
-          await driver.manage().setTimeouts({ implicit: 3000 });
-          const ok = (await driver.findElements(By.id('isFalseGotoMain'))).length > 0;
-          if (ok) {
-            log('예약 성공! 결제 화면으로 이동했습니다.');
-            return { ok: true, type: 'reserve' };
+        // alert 수락 시도
+        try {
+          await driver.wait(until.alertIsPresent(), 1500);
+          const alert = await driver.switchTo().alert();
+          log(`알림창: ${await alert.getText()}`, 'warn');
+          await alert.accept();
+        } catch (_) {}
+
+        if (mode === 'waitlist') {
+          // 클릭만으로는 신청 여부를 알 수 없어 완료 화면을 확인합니다.
+          if (await waitFor(waitlistConfirmed(driver), 3000, isCancelled)) {
+            log('예약대기 신청 성공!', 'success');
+            healthy = true;
+            return { ok: true, type: 'waitlist' };
           }
-          log('자리 없음. 결과 페이지로 되돌아갑니다.');
-          await driver.navigate().back();
-          await driver.manage().setTimeouts({ implicit: 5000 });
-          acted = true;
-        } else if (mode === 'waitlist' && waitTxt.includes('신청하기')) {
-          log(`행 ${i}: 예약대기 신청 시도`);
-          const a = await driver.findElement(By.css(`#result-form > fieldset > div.tbl_wrap.th_thead > table > tbody > tr:nth-child(${i}) > td:nth-child(8) > a`));
-          await a.click();
-          return { ok: true, type: 'waitlist' };
+          log('예약대기 신청이 확인되지 않았습니다. 결과 페이지로 되돌아갑니다.', 'warn');
+        } else if (await waitFor(present(driver, By.id('isFalseGotoMain')), 3000, isCancelled)) {
+          log('예약 성공! 결제 화면으로 이동했습니다.', 'success');
+          healthy = true;
+          return { ok: true, type: 'reserve' };
+        } else {
+          log('자리 없음. 결과 페이지로 되돌아갑니다.', 'warn');
         }
+        await driver.navigate().back();
+        if (!await waitFor(present(driver, By.css(`${RESULT_TABLE} > tbody > tr`)), 5000, isCancelled)) break;
+        // 되돌아온 표는 새로 그려졌을 수 있으니 남은 후보를 다시 고릅니다.
+        snap = await driver.executeScript(SNAPSHOT_JS, RESULT_TABLE);
+        candidates = rank(snap, rankOpts()).candidates.filter((c) => !tried.has(candidateKey(c)));
       }
 
       // 다음 조회
+      await pause(2000 + Math.floor(Math.random() * 1500), isCancelled);
       refreshCount += 1;
       log(`재조회 ${refreshCount}회`);
       try {
-        const refreshBtn = await driver.findElement(By.xpath("//input[@value='조회하기']"));
-        await driver.executeScript('arguments[0].click();', refreshBtn);
-      } catch (_) {}
-      await driver.manage().setTimeouts({ implicit: 10000 });
-      await sleep(2000 + Math.floor(Math.random() * 1500));
+        await submitQuery(driver, isCancelled);
+      } catch (e) {
+        if (isCancelled()) throw e;
+      }
     }
+  } catch (e) {
+    // 사용자 중지는 브라우저 문제가 아니므로 재사용합니다.
+    healthy = isCancelled();
+    throw e;
   } finally {
-    try { if (driver) await driver.quit(); } catch (_) {}
+    await driverPool.release(!!headless, driver, healthy);
   }
 }
@@ -0,0 +1,31 @@
+import test from 'node:test';
+import assert from 'node:assert/strict';
+import { JobRegistry } from '../jobs.js';
+
+test('logsAfter returns only entries past the cursor', () => {
+  const job = new JobRegistry().create({});
+  for (let i = 0; i < 5; i++) job.log(`line ${i}`);
+  assert.deepEqual(job.logsAfter(3).map((l) => l.msg), ['line 3', 'line 4']);
+  assert.deepEqual(job.logsAfter(5), []);
+  assert.equal(job.logsAfter(0, 2).length, 2);
+});
+
+test('create refuses jobs past the limit', () => {
+  const registry = new JobRegistry(2);
+  const a = registry.create({});
+  assert.ok(registry.create({}));
+  assert.equal(registry.create({}), null);
+  a.finish('finished', { ok: true });
+  assert.ok(registry.create({}));
+  assert.equal(registry.running().length, 2);
+});
+
+test('stop only cancels running jobs', () => {
+  const registry = new JobRegistry();
+  const job = registry.create({});
+  assert.equal(registry.stop(job.id), true);
+  assert.equal(job.cancelled, true);
+  job.finish('cancelled', null);
+  assert.equal(registry.stop(job.id), false);
+  assert.equal(registry.stop('missing'), false);
+});
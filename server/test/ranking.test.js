@@ -0,0 +1,46 @@
+import test from 'node:test';
+import assert from 'node:assert/strict';
+import { rank, resolveColumns, parseMinutes, candidateKey } from '../ranking.js';
+
+const HEADS = ['구분', '열차종류', '열차번호', '출발역', '도착역', '소요시간', '특실', '일반실', '예약대기'];
+const COLS = resolveColumns(HEADS).cols;
+
+function row(train, dep, { fst = false, gen = false, wait = false, kind = 'SRT' } = {}) {
+  const cell = (text) => ({ text, hint: '', alt: '' });
+  return [
+    cell(kind), cell(kind), cell(train), cell(`수서\n${dep}`), cell('부산\n10:30'), cell('02:30'),
+    cell(fst ? '예약하기' : '매진'), cell(gen ? '예약하기' : '매진'), cell(wait ? '신청하기' : '-'),
+  ];
+}
+
+test('resolveColumns reads positions from the headers', () => {
+  assert.deepEqual(COLS, { gen: 8, fst: 7, wait: 9, dep: 4 });
+  assert.equal(resolveColumns(['a', 'b']).ambiguous, true);
+  assert.equal(parseMinutes('수서\n08:05'), 485);
+  assert.equal(parseMinutes(''), null);
+});
+
+test('rank orders by distance to the target, then preferred class', () => {
+  const snap = { rows: [row('301', '07:00', { gen: true }), row('303', '08:10', { fst: true, gen: true })] };
+  const { candidates } = rank(snap, { cols: COLS, targetMin: 480 });
+  assert.deepEqual(candidates.map((c) => [c.train, c.label]), [['303', '특실'], ['303', '일반석'], ['301', '일반석']]);
+  const econ = rank(snap, { cols: COLS, targetMin: 480, seatOrder: 'prefer_economy' }).candidates;
+  assert.deepEqual(econ.slice(0, 2).map((c) => c.label), ['일반석', '특실']);
+  assert.equal(rank(snap, { cols: COLS, targetMin: 480, seatPref: 'economy' }).candidates.length, 2);
+});
+
+test('rank skips other trains and times outside the window', () => {
+  const snap = { rows: [row('101', '08:00', { gen: true, kind: 'KTX' }), row('305', '09:00', { gen: true }),
+    row('307', '08:30', { gen: true })] };
+  const res = rank(snap, { cols: COLS, targetMin: 480, window: [480, 520] });
+  assert.equal(res.srtRows, 2);
+  assert.deepEqual(res.candidates.map((c) => c.train), ['307']);
+  assert.equal(rank(snap, { cols: COLS, targetMin: 480, srtOnly: false }).candidates[0].train, '101');
+});
+
+test('rank in waitlist mode only offers waitlist cells', () => {
+  const snap = { rows: [row('301', '08:00', { gen: true }), row('303', '08:20', { wait: true })] };
+  const { candidates } = rank(snap, { mode: 'waitlist', cols: COLS, targetMin: 480 });
+  assert.deepEqual(candidates.map((c) => [c.train, c.col, c.label]), [['303', 9, '예약대기']]);
+  assert.equal(candidateKey(candidates[0]), '303|500|예약대기');
+});
@@ -0,0 +1,93 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from seatbuddy.api import JobChannel, JobHub, make_server
+
+
+@pytest.fixture
+def served():
+    hub = JobHub()
+    server = make_server("127.0.0.1", 0, hub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield hub, server.server_port
+    server.shutdown()
+    server.server_close()
+
+
+def _add(hub, job_id="job1", **params):
+    chan = hub._jobs[job_id] = JobChannel(job_id, params)
+    return chan
+
+
+def _get(port, path, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", path, headers=headers or {})
+    resp = conn.getresponse()
+    body = resp.read().decode("utf-8")
+    conn.close()
+    return resp.status, body
+
+
+def _events(body):
+    out = []
+    for frame in body.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in frame.splitlines() if ": " in line and not line.startswith(":"))
+        if "event" in fields:
+            out.append((fields.get("id"), fields["event"], json.loads(fields["data"])))
+    return out
+
+
+def test_status_hides_secrets(served):
+    hub, port = served
+    _add(hub, userId="u", password="pw", webhookUrl="https://hooks.example/secret-token")
+    status, body = _get(port, "/jobs/job1")
+    assert status == 200
+    params = json.loads(body)["params"]
+    assert params == {"userId": "u"}
+    assert "secret-token" not in _get(port, "/status")[1]
+
+
+def test_sse_replays_after_last_event_id(served):
+    hub, port = served
+    chan = _add(hub)
+    for i in range(5):
+        chan.log(f"line {i}")
+    chan.set_state("finished", {"ok": True})
+
+    _status, body = _get(port, "/jobs/job1/events", {"Last-Event-ID": "3"})
+    events = _events(body)
+    assert [e[0] for e in events[:-1]] == ["4", "5", "6"]
+    assert [e[2]["msg"] for e in events[:2]] == ["line 3", "line 4"]
+    assert events[-1][1] == "end"
+
+    # Resuming at the last event of a finished job ends right away
+    _status, body = _get(port, f"/jobs/job1/events?lastEventId={chan.last_id}")
+    assert [e[1] for e in _events(body)] == ["end"]
+
+
+def test_sse_streams_live_events(served):
+    hub, port = served
+    chan = _add(hub)
+    chan.set_state("running")
+
+    def later():
+        chan.log("hello")
+        chan.set_state("finished", {"ok": True})
+
+    threading.Timer(0.2, later).start()
+    _status, body = _get(port, "/jobs/job1/events")
+    assert [e[1] for e in _events(body)] == ["state", "log", "state", "end"]
+
+
+def test_logs_cursor(served):
+    hub, port = served
+    chan = _add(hub)
+    chan.log("a")
+    chan.set_state("running")
+    chan.log("b")
+    body = json.loads(_get(port, "/jobs/job1/logs?after=1")[1])
+    assert [l["msg"] for l in body["logs"]] == ["b"]
+    assert body["cursor"] == 3
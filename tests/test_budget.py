@@ -0,0 +1,56 @@
+import os
+import time
+
+import pytest
+
+from seatbuddy import budget
+from seatbuddy.budget import _STATE, AccountBudget, get_budget
+
+
+def test_burst_then_paced(tmp_path):
+    b = AccountBudget("user", rate=10.0, burst=3, root=str(tmp_path))
+    waits = [b.reserve() for _ in range(5)]
+    assert waits[:3] == pytest.approx([0, 0, 0], abs=0.01)
+    # Past the burst each query waits one more interval
+    assert waits[3] == pytest.approx(0.1, abs=0.02)
+    assert waits[4] == pytest.approx(0.2, abs=0.02)
+    assert b.granted() == 5
+
+
+def test_login_cost_counts(tmp_path):
+    b = AccountBudget("user", rate=10.0, burst=1, root=str(tmp_path))
+    assert b.reserve(3) == pytest.approx(0, abs=0.01)
+    assert b.reserve() == pytest.approx(0.3, abs=0.02)
+    assert b.granted() == 4
+
+
+def test_shared_between_instances(tmp_path):
+    a = AccountBudget("user", rate=10.0, burst=1, root=str(tmp_path))
+    b = AccountBudget("user", rate=10.0, burst=1, root=str(tmp_path))
+    other = AccountBudget("someone-else", rate=10.0, burst=1, root=str(tmp_path))
+    assert a.reserve() == pytest.approx(0, abs=0.01)
+    assert b.reserve() == pytest.approx(0.1, abs=0.02)
+    assert other.reserve() == pytest.approx(0, abs=0.01)
+    assert not any("user" in name for name in os.listdir(tmp_path))
+
+
+@pytest.mark.parametrize("stored", [
+    1234.5,  # a monotonic reading from before a reboot
+    time.time() + 10 * 3600,  # a clock stepped back
+])
+def test_stale_state_is_reset(tmp_path, stored):
+    b = AccountBudget("user", rate=1.0, burst=1, root=str(tmp_path))
+    os.pwrite(b._fd, _STATE.pack(stored, 7), 0)
+    assert b.reserve() == pytest.approx(0, abs=0.01)
+    assert b.granted() == 8
+
+
+def test_get_budget_env(monkeypatch, tmp_path):
+    monkeypatch.setattr(budget, "_budgets", {})
+    monkeypatch.setattr(budget.tempfile, "gettempdir", lambda: str(tmp_path))
+    monkeypatch.setenv(budget.QPS_ENV, "off")
+    assert get_budget("user") is None
+    monkeypatch.setenv(budget.QPS_ENV, "5")
+    assert get_budget("") is None
+    b = get_budget("User ")
+    assert b is get_budget("user") and b.rate == 5.0
@@ -0,0 +1,48 @@
+import argparse
+import json
+import threading
+
+import pytest
+
+from seatbuddy import cli, store
+from seatbuddy.cli import JobFileError, normalize_job
+
+JOB = {"userId": "u", "password": "pw", "departureStation": "수서", "arrivalStation": "부산",
+       "date": "2026-01-01", "time": "09:00"}
+
+
+@pytest.fixture(autouse=True)
+def tmp_store(monkeypatch, tmp_path):
+    monkeypatch.setattr(store, "_default", store.Store(str(tmp_path / "seatbuddy.db")))
+
+
+def test_normalize_job_fills_targets():
+    job = normalize_job({"userId": "u", "password": "pw", "date": "2026-01-01", "time": 870,
+                         "targets": [{"departureStation": "수서", "arrivalStation": "부산"}]})
+    assert job["departureStation"] == "수서" and job["time"] == "14:30"
+    assert job["headless"] is True
+    with pytest.raises(JobFileError):
+        normalize_job(dict(JOB, arrivalStation="수서"))
+
+
+def test_daemon_records_a_crashed_job(monkeypatch, tmp_path, capsys):
+    spool = tmp_path / "spool"
+    spool.mkdir()
+    (spool / "job1.json").write_text(json.dumps(JOB), encoding="utf-8")
+
+    async def boom(*args):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(cli, "_run_one", boom)
+    # Stop the daemon once the job had time to run instead of sending a signal
+    monkeypatch.setattr(cli, "_install_stop_handlers", lambda on_stop: threading.Timer(0.5, on_stop).start())
+
+    args = argparse.Namespace(spool=str(spool), max_jobs=1, poll=0.05)
+    assert cli.cmd_daemon(args) == cli.EXIT_OK
+
+    assert (spool / "failed" / "job1.json").exists()
+    assert not list((spool / "running").iterdir())
+    result = json.loads((spool / "failed" / "job1.result.json").read_text(encoding="utf-8"))
+    assert result["result"] == {"ok": False, "error": "boom"}
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert {"event": "error", "job": "job1", "msg": "boom"}.items() <= next(
+        e for e in events if e["event"] == "error").items()
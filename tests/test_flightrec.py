@@ -0,0 +1,50 @@
+import json
+import os
+
+from seatbuddy import flightrec
+from seatbuddy.flightrec import FlightRecorder
+
+
+class FakeDriver:
+    page_source = "<html>결과</html>"
+
+    def get_screenshot_as_file(self, path):
+        with open(path, "wb") as f:
+            f.write(b"png")
+
+
+def test_ring_keeps_the_last_steps():
+    rec = FlightRecorder(size=3)
+    lines = []
+    log = rec.wrap_log(lambda msg, kind="info": lines.append(msg))
+    for i in range(5):
+        rec.record("poll", n=i)
+    log("재조회", "info")
+    steps = rec.steps()
+    assert [s["action"] for s in steps] == ["poll", "poll", "log"]
+    assert [s.get("n") for s in steps[:2]] == [3, 4] and steps[-1]["msg"] == "재조회"
+    assert steps[0]["dt"] == 0.0 and lines == ["재조회"]
+
+
+def test_dump_writes_steps_screenshot_and_dom(tmp_path, monkeypatch):
+    monkeypatch.setenv(flightrec.FLIGHT_DIR_ENV, str(tmp_path))
+    rec = FlightRecorder()
+    rec.record("attempt", row=2, ok=False)
+    path = rec.dump("failure", FakeDriver(), {"job": "j1", "worker": 2})
+    assert os.path.basename(path).endswith("-j1-w2-failure")
+    data = json.loads(open(os.path.join(path, "steps.json"), encoding="utf-8").read())
+    assert data["reason"] == "failure" and data["steps"][0]["row"] == 2
+    assert open(os.path.join(path, "dom.html"), encoding="utf-8").read() == FakeDriver.page_source
+    assert os.path.exists(os.path.join(path, "screenshot.png"))
+
+
+def test_dumps_are_pruned_and_can_be_disabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(flightrec, "MAX_DUMPS", 2)
+    for i in range(4):
+        (tmp_path / f"2026010{i}-000000.000-j-w0-failure").mkdir()
+    monkeypatch.setenv(flightrec.FLIGHT_DIR_ENV, str(tmp_path))
+    FlightRecorder().dump("success")
+    names = sorted(os.listdir(tmp_path))
+    assert len(names) == 2 and names[-1].endswith("success")
+    monkeypatch.setenv(flightrec.FLIGHT_DIR_ENV, "off")
+    assert FlightRecorder().dump("failure") is None
@@ -0,0 +1,90 @@
+import pytest
+
+from seatbuddy import history
+from seatbuddy.history import AvailabilityHistory
+from seatbuddy.ranking import DEFAULT_COLS
+
+DATE = "20260101"
+
+
+def _snap(**bookable):
+    # train -> general seat bookable; one SRT row per train, departing 08:00
+    rows = []
+    for train, ok in bookable.items():
+        cells = [{"text": "SRT"}, {"text": "SRT"}, {"text": train}, {"text": "수서\n08:00"}, {"text": ""},
+                 {"text": "매진"}, {"text": "예약하기" if ok else "매진"}, {"text": "-"}]
+        rows.append([dict(c, hint="", alt="") for c in cells])
+    return {"rows": rows}
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock(1767214800.0)  # 2026-01-01 06:00 KST
+    monkeypatch.setattr(history.time, "time", c.time)
+    return c
+
+
+def test_only_changes_are_recorded(tmp_path, clock):
+    h = AvailabilityHistory(str(tmp_path))
+    # General, first class and waitlist cells of one train
+    assert h.observe("수서", "부산", DATE, _snap(t301=False), DEFAULT_COLS) == 3
+    assert h.observe("수서", "부산", DATE, _snap(t301=False), DEFAULT_COLS) == 0
+    clock.now += 60
+    assert h.observe("수서", "부산", DATE, _snap(t301=True), DEFAULT_COLS) == 1
+    events = list(h.events("수서", "부산", "2026-01-01"))
+    assert len(events) == 4
+    assert events[-1][0] == pytest.approx(clock.now) and events[-1][2] is True
+    assert list(h.events("수서", "대전")) == []
+
+
+def test_shared_between_instances(tmp_path, clock):
+    a = AvailabilityHistory(str(tmp_path))
+    b = AvailabilityHistory(str(tmp_path))
+    a.observe("수서", "부산", DATE, _snap(t301=False), DEFAULT_COLS)
+    # b catches up on a's series and state before recording
+    assert b.observe("수서", "부산", DATE, _snap(t301=False), DEFAULT_COLS) == 0
+    clock.now += 1
+    assert b.observe("수서", "부산", DATE, _snap(t301=True), DEFAULT_COLS) == 1
+    a.close()
+    assert len(list(AvailabilityHistory(str(tmp_path)).events())) == 4
+
+
+def test_file_grows(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(history, "_GROW_BYTES", 64)
+    h = AvailabilityHistory(str(tmp_path))
+    for i in range(40):
+        clock.now += 1
+        h.observe("수서", "부산", DATE, _snap(t301=bool(i % 2)), DEFAULT_COLS)
+    assert sum(1 for _ in h.events()) == 3 + 39
+
+
+def test_route_stats(tmp_path, clock):
+    h = AvailabilityHistory(str(tmp_path))
+    h.observe("수서", "부산", DATE, _snap(t301=False, t303=True), DEFAULT_COLS)
+    clock.now += 600
+    h.observe("수서", "부산", DATE, _snap(t301=True, t303=True), DEFAULT_COLS)
+    clock.now += 90
+    h.observe("수서", "부산", DATE, _snap(t301=False, t303=False), DEFAULT_COLS)
+    stats = h.route_stats("수서", "부산")
+    assert stats["series"] == 6
+    # t303 was open when first seen, so only t301 reappeared
+    assert stats["reappeared"] == 1
+    # Hours are Korean time: 06:10 KST
+    assert stats["reappeared_by_hour"][6] == 1
+    assert stats["reappeared_before_departure"]["1-3h"] == 1
+    assert stats["open_seconds"]["count"] == 1
+    assert stats["open_seconds"]["p50"] == pytest.approx(90, abs=0.1)
+
+
+def test_rejects_foreign_file(tmp_path):
+    (tmp_path / "avail.bin").write_bytes(b"x" * 64)
+    with pytest.raises(OSError):
+        AvailabilityHistory(str(tmp_path))
@@ -0,0 +1,47 @@
+import threading
+
+from seatbuddy import metrics
+from seatbuddy.metrics import JobMetrics
+
+
+def test_snapshot():
+    m = JobMetrics()
+    m.incr("polls")
+    m.incr("polls", 2)
+    m.gauge("budget_utilization", 0.5)
+    for ms in range(1, 101):
+        m.observe("poll", ms / 1000)
+    snap = m.snapshot()
+    assert snap["counters"] == {"polls": 3}
+    assert snap["gauges"] == {"budget_utilization": 0.5}
+    poll = snap["timings"]["poll"]
+    assert poll["count"] == 100
+    assert abs(poll["mean"] - 0.0505) < 1e-9
+    assert (poll["p50"], poll["p95"], poll["max"]) == (0.051, 0.096, 0.1)
+
+
+def test_window_keeps_recent_samples_but_counts_all():
+    m = JobMetrics()
+    n = metrics._MAX_SAMPLES + 10
+    for i in range(n):
+        m.observe("poll", float(i))
+    samples = m.samples("poll")
+    assert len(samples) == metrics._MAX_SAMPLES and samples[0] == 10.0
+    poll = m.snapshot()["timings"]["poll"]
+    assert poll["count"] == n and poll["mean"] == (n - 1) / 2
+    assert m.samples("missing") == []
+
+
+def test_concurrent_increments():
+    m = JobMetrics()
+
+    def work():
+        for _ in range(1000):
+            m.incr("polls")
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert m.snapshot()["counters"]["polls"] == 8000
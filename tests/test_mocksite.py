@@ -0,0 +1,90 @@
+import http.cookiejar
+import threading
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlencode
+
+import pytest
+
+from seatbuddy import mocksite
+
+
+@pytest.fixture
+def site():
+    servers = []
+
+    def start(**kw):
+        state = mocksite.MockState(**kw)
+        server = mocksite.make_server("127.0.0.1", 0, state)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+
+        def get(path, data=None):
+            with opener.open(base + path, data=data, timeout=5) as r:
+                return r.geturl()[len(base):], r.read().decode("utf-8")
+
+        return state, get
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+_QUERY = "?" + urlencode({"dptRsStnCdNm": "수서", "arvRsStnCdNm": "부산", "dptTm": "060000"})
+
+
+def _login(get):
+    return get(mocksite.LOGIN_PATH, urlencode({"srchDvNm01": "u", "hmpgPwdCphd01": "p"}).encode())
+
+
+def test_search_needs_a_session(site):
+    state, get = site()
+    path, body = get(mocksite.SEARCH_PATH + _QUERY)
+    assert path == mocksite.LOGIN_PATH and 'id="srchDvNm01"' in body
+    _login(get)
+    path, body = get(mocksite.SEARCH_PATH + _QUERY)
+    assert path.startswith(mocksite.SEARCH_PATH)
+    assert body.count("<tr>") == mocksite.ROWS + 1
+    assert "06:00" in body and 'value="수서"' in body
+    assert state.counts["logins"] == 1 and state.counts["queries"] == 1
+
+
+def test_search_form_alone_is_not_a_query(site):
+    state, get = site()
+    _login(get)
+    _path, body = get(mocksite.SEARCH_PATH)
+    assert 'id="dptDt"' in body and "result-form" not in body
+    assert state.counts["queries"] == 0
+
+
+@pytest.mark.parametrize("book_rate, marker", [(1.0, "isFalseGotoMain"), (0.0, "잔여석이 없습니다")])
+def test_reserve_outcome_follows_book_rate(site, book_rate, marker):
+    state, get = site(seat_rate=1.0, book_rate=book_rate)
+    _login(get)
+    _path, body = get(mocksite.SEARCH_PATH + _QUERY)
+    assert "매진" not in body
+    link = body.split('<a href="', 1)[1].split('"', 1)[0].replace("&amp;", "&")
+    _path, body = get(link)
+    assert marker in body
+    assert state.counts["reserve_clicks"] == 1
+    assert state.counts["bookings"] == int(book_rate)
+
+
+def test_session_expires(site):
+    _state, get = site(session_ttl=0.2)
+    _login(get)
+    assert get(mocksite.SEARCH_PATH + _QUERY)[0].startswith(mocksite.SEARCH_PATH)
+    time.sleep(0.3)
+    assert get(mocksite.SEARCH_PATH + _QUERY)[0] == mocksite.LOGIN_PATH
+    assert "로그인 후 사용하십시오" in get(mocksite.RESERVE_PATH)[1]
+
+
+def test_unknown_path(site):
+    _state, get = site()
+    with pytest.raises(urllib.error.HTTPError) as e:
+        get("/nope")
+    assert e.value.code == 404
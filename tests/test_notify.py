@@ -0,0 +1,126 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from seatbuddy.notify import Notifier, success_payload
+
+
+class Sink:
+    """Local webhook endpoint; answers with the queued status codes, then 200."""
+
+    def __init__(self):
+        self.bodies = []
+        self.statuses = []
+        self.connections = set()
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                sink.bodies.append(json.loads(self.rfile.read(length)))
+                sink.connections.add(self.client_address)
+                status = sink.statuses.pop(0) if sink.statuses else 200
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}/hook?token=x"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def sink():
+    s = Sink()
+    yield s
+    s.close()
+
+
+def test_delivers_and_reuses_connection(sink):
+    n = Notifier(backoff_base_sec=0.01)
+    logs = []
+    for i in range(3):
+        assert n.send(sink.url, {"type": "success", "i": i}, log=lambda m, k: logs.append(k))
+    assert n.flush(5)
+    assert [b["i"] for b in sink.bodies] == [0, 1, 2]
+    assert logs == ["success"] * 3
+    assert len(sink.connections) == 1
+    snap = n.metrics.snapshot()
+    assert snap["counters"]["sent"] == 3
+
+
+def test_retries_server_errors(sink):
+    sink.statuses = [503, 429]
+    n = Notifier(backoff_base_sec=0.01)
+    n.send(sink.url, {"type": "success"})
+    assert n.flush(5)
+    assert len(sink.bodies) == 3
+    assert n.metrics.snapshot()["counters"]["retries"] == 2
+
+
+def test_client_error_is_not_retried(sink):
+    sink.statuses = [400]
+    n = Notifier(backoff_base_sec=0.01)
+    logs = []
+    n.send(sink.url, {"type": "success"}, log=lambda m, k: logs.append((k, m)))
+    assert n.flush(5)
+    assert len(sink.bodies) == 1
+    assert logs[0][0] == "warn" and "HTTP 400" in logs[0][1]
+
+
+def test_progress_is_batched(sink):
+    n = Notifier(progress_flush_sec=60)
+    for i in range(5):
+        n.progress(sink.url, "job1", f"line {i}")
+    assert not sink.bodies
+    assert n.flush(5)
+    assert len(sink.bodies) == 1
+    batch = sink.bodies[0]
+    assert batch["type"] == "progress"
+    assert [e["msg"] for e in batch["events"]] == [f"line {i}" for i in range(5)]
+
+
+def test_failures_do_not_stop_the_dispatcher(sink, monkeypatch):
+    n = Notifier(backoff_base_sec=0.01)
+
+    def bad_log(msg, kind):
+        raise RuntimeError("log gone")
+    n.send(sink.url, {"type": "success", "i": 0}, log=bad_log)
+    assert n.flush(5)
+
+    post = n._post
+    monkeypatch.setattr(n, "_post", lambda url, body: (_ for _ in ()).throw(KeyError("bug")))
+    n.send(sink.url, {"type": "success", "i": 1}, log=bad_log)
+    assert n.flush(5)
+    monkeypatch.setattr(n, "_post", post)
+
+    n.send(sink.url, {"type": "success", "i": 2})
+    assert n.flush(5)
+    assert n._thread.is_alive()
+    assert [b["i"] for b in sink.bodies] == [0, 2]
+
+
+def test_bad_url_fails_without_retry():
+    n = Notifier(backoff_base_sec=0.01)
+    n.send("ftp://example.invalid/", {"type": "success"})
+    assert n.flush(5)
+    assert n.metrics.snapshot()["counters"]["failed"] == 1
+
+
+def test_success_payload_hides_secrets():
+    payload = success_payload({"password": "pw", "webhookUrl": "u", "departureStation": "수서",
+                               "arrivalStation": "부산"}, {"ok": True})
+    assert "password" not in payload["params"] and "webhookUrl" not in payload["params"]
+    assert payload["body"].startswith("수서→부산")
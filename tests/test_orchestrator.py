@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from seatbuddy import orchestrator, waits
+from seatbuddy.automation import PhaseTimeout
+from seatbuddy.flightrec import FlightRecorder
+from seatbuddy.metrics import JobMetrics
+
+
+class FakeWorker:
+    """Stands in for SrtWorker: no browser, each phase just takes a little time."""
+
+    win_at = {}  # worker index -> poll number that books
+    dumps = []
+
+    def __init__(self, params, log, cancelled, on_event=None):
+        self.params, self.log, self.cancelled, self.on_event = params, log, cancelled, on_event
+        self.idx = params.get("workerIndex")
+        self.flight = FlightRecorder()
+        self.fired, self.fire_at = True, None
+        self.target_key, self.last_candidates, self.last_fingerprint = None, 0, None
+        self.loop_budget, self.prepaid, self.recovery_due = False, 0, None
+        self.swaps = self.polls = 0
+
+    def set_target(self, target):
+        self.target_key = target["key"]
+
+    def emit(self, event, **data):
+        if self.on_event is not None:
+            self.on_event(event, dict(data, worker=self.idx))
+
+    def dump_flight(self, reason, err=None):
+        time.sleep(0.3)
+        FakeWorker.dumps.append((self.idx, reason, self.cancelled()))
+
+    def open_browser(self):
+        time.sleep(0.02)
+
+    def login(self):
+        self.pay(3)
+        waits.sleep(0.05, self.cancelled)
+
+    def open_search(self):
+        pass
+
+    def poll_once(self):
+        # Like SrtWorker._poll: a set cancel flag ends the worker even if the task's
+        # own cancellation was lost (asyncio.wait_for can drop one on Python 3.11)
+        waits.check(self.cancelled)
+        self.polls += 1
+        if FakeWorker.win_at.get(self.idx) == self.polls:
+            return {"ok": True, "type": "reserve", "worker": self.idx}
+        time.sleep(0.02)
+        return None
+
+    def take_budget(self, cost=1):
+        return 0.0
+
+    def pay(self, cost=1):
+        # Every query is paid for on the loop before its phase runs
+        assert self.prepaid >= cost
+        self.prepaid -= cost
+
+    def refresh(self):
+        self.pay()
+        return 0.02
+
+    def fail(self, e):
+        self.log(f"오류 발생: {e!r}", "error")
+        return {"ok": False, "error": str(e)}
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake(monkeypatch, tmp_path):
+    monkeypatch.setenv("SEATBUDDY_RUN_DIR", str(tmp_path))
+    monkeypatch.setattr(orchestrator, "SrtWorker", FakeWorker)
+    FakeWorker.win_at, FakeWorker.dumps = {}, []
+    return FakeWorker
+
+
+def _run(params, cancel=None, timeout=10):
+    cancel = cancel or waits.CancelEvent()
+    logs, metrics = [], JobMetrics()
+    fut = orchestrator.submit(orchestrator.run_job(
+        dict({"userId": "", "parallelStaggerSec": 0.01}, **params), lambda m, k="info": logs.append(m),
+        cancel, "job", metrics, heartbeat_timeout=None))
+    return fut, cancel, logs, metrics
+
+
+def test_first_booking_stops_the_other_workers(fake):
+    fake.win_at = {2: 3}
+    fut, cancel, _logs, _metrics = _run({"parallelCount": 4})
+    res = fut.result(10)
+    assert res["ok"] and res["worker"] == 2
+    assert cancel.is_set()
+    # The winner's diagnostics dump ran after the others had been told to stop
+    assert fake.dumps == [(2, "success", True)]
+
+
+def test_cancel_stops_every_worker(fake):
+    fut, cancel, _logs, _metrics = _run({"parallelCount": 6})
+    time.sleep(0.3)
+    stopped = time.monotonic()
+    cancel.set()
+    res = fut.result(10)
+    assert not (res and res.get("ok"))
+    assert time.monotonic() - stopped < 2
+
+
+def test_phase_timeout_starts_on_the_driver_thread(monkeypatch):
+    monkeypatch.setitem(orchestrator.PHASE_TIMEOUTS, "poll", 0.5)
+    executor = ThreadPoolExecutor(1)
+
+    class W:
+        flight = FlightRecorder()
+
+    async def main():
+        ws = [orchestrator.AsyncWorker(W(), executor) for _ in range(4)]
+        # Each call is well inside the timeout but the four queue behind one thread
+        res = await asyncio.gather(*(w._phase("poll", lambda: time.sleep(0.3) or "ok") for w in ws))
+        assert res == ["ok"] * 4
+        with pytest.raises(PhaseTimeout):
+            await ws[0]._phase("poll", lambda: time.sleep(0.8))
+        ran = threading.Event()
+        busy = asyncio.ensure_future(ws[1]._phase("poll", lambda: time.sleep(0.3)))
+        queued = asyncio.ensure_future(ws[2]._phase("poll", ran.set))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        await busy
+        await asyncio.sleep(0.1)
+        # Cancelled while queued: it never runs
+        assert queued.cancelled() and not ran.is_set()
+
+    asyncio.run(main())
+    executor.shutdown()
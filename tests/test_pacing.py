@@ -0,0 +1,59 @@
+import pytest
+
+from seatbuddy import pacing
+from seatbuddy.pacing import MIN_INTERVAL_SEC, PollPacer, departure_ts, lerp
+
+
+class Clock:
+    def __init__(self):
+        self.mono = 1000.0
+        self.wall = 1767214800.0  # 2026-01-01 06:00 KST
+
+    def monotonic(self):
+        return self.mono
+
+    def time(self):
+        return self.wall
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(pacing.time, "monotonic", c.monotonic)
+    monkeypatch.setattr(pacing.time, "time", c.time)
+    # No jitter, so delays can be compared exactly
+    monkeypatch.setattr(pacing.random, "uniform", lambda a, b: 0.0)
+    return c
+
+
+def test_departure_is_korean_time():
+    assert departure_ts("20260101", 8 * 60) == 1767222000.0
+    assert departure_ts("", 480) is None and departure_ts("20260101", None) is None
+    assert departure_ts("2026-13-01", 480) is None
+    assert lerp(2.0, 1.0, 0.5) == 1.5
+
+
+def test_backs_off_while_the_table_is_quiet(clock):
+    p = PollPacer(1.0)
+    p.observe("t", 1, rows=10, seats=0)
+    fast = p.next_delay()
+    clock.mono += pacing.QUIET_FULL_SEC
+    p.observe("t", 1, rows=10, seats=0)
+    assert p.next_delay() > fast
+    # A changed table (or any seat) brings the fast rate back
+    p.observe("t", 2, rows=10, seats=0)
+    assert p.next_delay() == fast
+    assert fast >= MIN_INTERVAL_SEC
+
+
+def test_errors_and_departure(clock):
+    p = PollPacer(0.5)
+    clock.mono += pacing.QUIET_FULL_SEC
+    quiet = p.next_delay()
+    # Departing within NEAR_DEPARTURE_SEC halves the quiet back-off
+    assert p.next_delay(clock.wall + 3600) < quiet
+    assert p.next_delay(clock.wall + 6 * 3600) == quiet
+    for _ in range(5):
+        p.observe("t", None, rows=0, seats=0)
+    assert p.next_delay() > quiet
+    assert p.next_delay() <= pacing.MAX_INTERVAL_SEC
@@ -0,0 +1,68 @@
+import socket
+
+import pytest
+
+from seatbuddy.ports import DEFAULT_RANGE, PortAllocator, _parse_range
+
+
+def _free_range(n=3):
+    # Ports the OS just handed out are free; the one after them usually is too
+    for _ in range(50):
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        lo = sock.getsockname()[1]
+        sock.close()
+        if lo + n - 1 < 65536 and all(_free(p) for p in range(lo, lo + n)):
+            return lo, lo + n - 1
+    pytest.skip("no free port range")
+
+
+def _free(port):
+    sock = socket.socket()
+    try:
+        sock.bind(("127.0.0.1", port))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def test_parse_range():
+    assert _parse_range("9300-9310") == (9300, 9310)
+    assert _parse_range("9300") == (9300, 9300)
+    assert _parse_range("x") == DEFAULT_RANGE
+    assert _parse_range("9310-9300") == DEFAULT_RANGE
+    assert _parse_range(None) == DEFAULT_RANGE
+
+
+def test_ports_are_unique_and_released(tmp_path):
+    lo, hi = _free_range(3)
+    alloc = PortAllocator(lo, hi, root=str(tmp_path))
+    ports = [alloc.acquire() for _ in range(3)]
+    assert sorted(ports) == list(range(lo, hi + 1))
+    assert alloc.held() == sorted(ports)
+    with pytest.raises(RuntimeError):
+        alloc.acquire()
+    alloc.release(ports[1])
+    assert alloc.acquire() == ports[1]
+
+
+def test_other_allocators_and_busy_ports_are_skipped(tmp_path):
+    lo, hi = _free_range(3)
+    first = PortAllocator(lo, hi, root=str(tmp_path))
+    # A second allocator stands in for another process sharing the run directory
+    second = PortAllocator(lo, hi, root=str(tmp_path))
+    taken = first.acquire()
+    busy = socket.socket()
+    busy.bind(("127.0.0.1", next(p for p in range(lo, hi + 1) if p != taken)))
+    busy.listen()
+    try:
+        port = second.acquire()
+        assert port not in (taken, busy.getsockname()[1])
+        with pytest.raises(RuntimeError):
+            second.acquire()
+        first.release(taken)
+        assert second.acquire() == taken
+    finally:
+        busy.close()
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from seatbuddy import procpool
+
+
+@pytest.fixture(scope="module")
+def bridge_log():
+    logs, events = [], []
+    bridge = procpool.JobBridge(lambda m, k="info": logs.append((m, k)), lambda n, d: events.append((n, d)))
+    yield bridge, logs, events
+    bridge.close()
+
+
+def _wait_for(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return cond()
+
+
+def test_bridge_forwards_logs_and_events(bridge_log):
+    bridge, logs, events = bridge_log
+    bridge.queue.put(("[0] 로그인", "info"))
+    bridge.queue.put(("event", "poll", {"worker": 0}))
+    bridge.queue.put(("[0] 오류", "error"))
+    assert _wait_for(lambda: len(logs) == 2)
+    assert logs == [("[0] 로그인", "info"), ("[0] 오류", "error")]
+    assert events == [("poll", {"worker": 0})]
+    assert not bridge.cancel.is_set()
+
+
+class FlakyPool(Executor):
+    """Fails its first call like a pool whose child died, then runs calls inline."""
+
+    def __init__(self, fail: int):
+        self.fail, self.calls = fail, 0
+
+    def submit(self, fn, *args):
+        self.calls += 1
+        fut = Future()
+        if self.calls <= self.fail:
+            fut.set_exception(BrokenProcessPool("child died"))
+        else:
+            fut.set_result({"ok": True, "prefix": args[1]})
+        return fut
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        pass
+
+
+class Registry:
+    swept = 0
+
+    def sweep_leftovers(self):
+        Registry.swept += 1
+
+
+@pytest.mark.parametrize("fail, ok", [(1, True), (2, False)])
+def test_broken_pool_is_retried_once(monkeypatch, bridge_log, fail, ok):
+    bridge, logs, _events = bridge_log
+    pool = FlakyPool(fail)
+    monkeypatch.setattr(procpool, "get_pool", lambda: pool)
+    monkeypatch.setattr(procpool, "get_registry", Registry)
+    Registry.swept = 0
+    logs.clear()
+
+    async def main():
+        return await bridge.run_worker(asyncio.get_running_loop(), {}, "[1] ")
+
+    res = asyncio.run(main())
+    assert res["ok"] is ok
+    assert pool.calls == 2 and Registry.swept == fail
+    assert all(m.startswith("[1] ") for m, _k in logs)
+    assert [k for _m, k in logs][:2] == ["error", "warn"]
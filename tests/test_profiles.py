@@ -0,0 +1,98 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from seatbuddy import profiles
+from seatbuddy.profiles import IN_USE_PREFIX, ProfileManager
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    # Keep the legacy sweep out of the real temp directory
+    (tmp_path / "tmp").mkdir()
+    monkeypatch.setattr(profiles.tempfile, "gettempdir", lambda: str(tmp_path / "tmp"))
+    return tmp_path / "profiles"
+
+
+@pytest.fixture
+def other_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    yield proc.pid
+    proc.kill()
+    proc.wait()
+
+
+def _dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def _old_template(root, name="template-v0"):
+    path = root / name
+    (path / "Default").mkdir(parents=True)
+    (path / ".seatbuddy-template").write_text("0")
+    return path
+
+
+def test_clone_and_release(root):
+    pm = ProfileManager(str(root), spares=0)
+    assert os.path.basename(pm.template) == f"template-v{profiles.TEMPLATE_VERSION}"
+    assert (root / f"{IN_USE_PREFIX}template-v{profiles.TEMPLATE_VERSION}-{os.getpid()}").exists()
+    path = pm.acquire()
+    assert os.path.isfile(os.path.join(path, "Default", "Preferences"))
+    assert not os.path.exists(os.path.join(path, ".seatbuddy-template"))
+    assert pm.active_count() == 1
+    pm.release(path)
+    assert not os.path.exists(path) and pm.active_count() == 0
+
+
+def test_old_template_kept_while_in_use(root, other_pid):
+    pm = ProfileManager(str(root), spares=0)
+    old = _old_template(root)
+    (root / f"{IN_USE_PREFIX}template-v0-{other_pid}").touch()
+    pm.collect_orphans()
+    assert old.exists()
+
+
+def test_old_template_removed_when_unused(root):
+    pm = ProfileManager(str(root), spares=0)
+    old = _old_template(root)
+    marker = root / f"{IN_USE_PREFIX}template-v0-{_dead_pid()}"
+    marker.touch()
+    assert pm.collect_orphans() == 1
+    assert not old.exists() and not marker.exists()
+    assert os.path.isdir(pm.template)
+    assert not [n for n in os.listdir(root) if n.startswith(".template-")]
+
+
+def test_unversioned_template_waits_for_clone_owners(root, other_pid):
+    pm = ProfileManager(str(root), spares=0)
+    legacy = _old_template(root, "template")
+    (root / f"p-{other_pid}-0").mkdir()
+    pm.collect_orphans()
+    assert legacy.exists()
+
+
+def test_orphans_collected(root):
+    pm = ProfileManager(str(root), spares=0)
+    dead = root / f"p-{_dead_pid()}-0"
+    dead.mkdir()
+    staging = root / ".template-abc"
+    staging.mkdir()
+    os.utime(staging, (0, 0))
+    mine = pm.acquire()
+    assert pm.collect_orphans() == 2
+    assert not dead.exists() and not staging.exists()
+    assert os.path.isdir(mine)
+
+
+def test_clone_rebuilds_a_retired_template(root):
+    pm = ProfileManager(str(root), spares=0)
+    other = ProfileManager(str(root), spares=0)
+    assert other._retire_template(pm.template)
+    path = pm.acquire()
+    assert os.path.isfile(os.path.join(path, "Default", "Preferences"))
+    assert os.path.isfile(os.path.join(pm.template, ".seatbuddy-template"))
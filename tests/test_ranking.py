@@ -0,0 +1,77 @@
+from seatbuddy import ranking
+from seatbuddy.ranking import candidate_key, parse_minutes, rank, resolve_columns
+
+HEADS = ["구분", "열차종류", "열차번호", "출발역", "도착역", "소요시간", "특실", "일반실", "예약대기"]
+COLS, _ = resolve_columns(HEADS, ranking.DEFAULT_COLS)
+
+
+def _cell(text, hint="", alt=""):
+    return {"text": text, "hint": hint, "alt": alt}
+
+
+def _row(train, dep, fst=False, gen=False, wait=False, kind="SRT"):
+    return [_cell(kind), _cell(kind), _cell(train), _cell(f"수서\n{dep}"), _cell("부산\n10:30"), _cell("02:30"),
+            _cell("예약하기" if fst else "매진"), _cell("예약하기" if gen else "매진"),
+            _cell("신청하기" if wait else "-")]
+
+
+def _rank(rows, **opts):
+    args = dict(mode="reserve", seat_pref="both", seat_order="prefer_first", num_to_check=10, target_min=480,
+                cols=COLS)
+    args.update(opts)
+    return rank({"rows": rows}, **args)
+
+
+def test_resolve_columns():
+    assert COLS == {"gen": 8, "fst": 7, "wait": 9, "dep": 4}
+    cols, ambiguous = resolve_columns(["a", "b"], ranking.DEFAULT_COLS)
+    assert ambiguous and (cols["gen"], cols["fst"]) == (7, 6)
+    assert parse_minutes("수서\n08:05") == 485 and parse_minutes("") is None
+
+
+def test_closest_train_first_then_preferred_class():
+    rows = [_row("301", "07:00", gen=True), _row("303", "08:10", fst=True, gen=True)]
+    cands, srt_rows = _rank(rows)
+    assert srt_rows == 2
+    assert [(c["train"], c["label"]) for c in cands] == [("303", "특실"), ("303", "일반석"), ("301", "일반석")]
+    cands, _ = _rank(rows, seat_order="prefer_economy")
+    assert [c["label"] for c in cands[:2]] == ["일반석", "특실"]
+    cands, _ = _rank(rows, seat_pref="first")
+    assert [(c["train"], c["label"]) for c in cands] == [("303", "특실")]
+
+
+def test_other_class_penalty_loses_to_a_much_closer_train():
+    # Economy 5 minutes away beats first class 20 minutes away despite the preference
+    rows = [_row("301", "08:05", gen=True), _row("303", "08:20", fst=True)]
+    cands, _ = _rank(rows)
+    assert [c["train"] for c in cands] == ["301", "303"]
+
+
+def test_filters_and_num_to_check():
+    rows = [_row("101", "08:00", gen=True, kind="KTX"), _row("305", "09:00", gen=True),
+            _row("307", "08:30", gen=True), _row("309", "08:40", gen=True)]
+    cands, srt_rows = _rank(rows, window=(480, 520))
+    assert [c["train"] for c in cands] == ["307", "309"]
+    # Out-of-window rows do not use up num_to_check
+    cands, _ = _rank(rows, window=(480, 520), num_to_check=1)
+    assert [c["train"] for c in cands] == ["307"]
+    cands, _ = _rank(rows, srt_only=False)
+    assert cands[0]["train"] == "101"
+
+
+def test_icon_only_cells_and_waitlist():
+    rows = [_row("301", "08:00"), _row("303", "08:20", wait=True)]
+    rows[0][7] = _cell("", hint="예약 ")
+    cands, _ = _rank(rows)
+    assert [(c["train"], c["col"]) for c in cands] == [("301", 8)]
+    cands, _ = _rank(rows, mode="waitlist")
+    assert [(c["train"], c["col"], c["label"]) for c in cands] == [("303", 9, "예약대기")]
+    assert candidate_key(cands[0]) == ("303", 500, "예약대기")
+
+
+def test_fingerprint_and_availability():
+    rows = [_row("301", "08:00", gen=True)]
+    assert ranking.fingerprint({"rows": rows}) == ranking.fingerprint({"rows": [list(rows[0])]})
+    assert ranking.fingerprint({"rows": []}) is None
+    avail = ranking.availability({"rows": rows}, COLS)
+    assert ("301", 480, "일반석", True) in avail and ("301", 480, "특실", False) in avail
@@ -0,0 +1,99 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from seatbuddy import reaper
+from seatbuddy.reaper import BrowserRegistry, descendants, kill_tree, pid_alive
+
+pytestmark = pytest.mark.skipif(not os.path.isdir("/proc"), reason="needs /proc")
+
+# A parent that starts a child and waits; argv carries a browser marker
+TREE = "import subprocess, sys, time; subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)']); time.sleep(60)"
+
+
+def _spawn_tree():
+    proc = subprocess.Popen([sys.executable, "-c", TREE, "chromedriver"], start_new_session=True)
+    deadline = time.monotonic() + 5
+    while not descendants(proc.pid) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return proc
+
+
+def _driver(proc):
+    return SimpleNamespace(service=SimpleNamespace(process=proc))
+
+
+def test_pid_alive():
+    assert pid_alive(os.getpid())
+    assert not pid_alive(0) and not pid_alive(None)
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    deadline = time.monotonic() + 5
+    # Exited but not yet waited for: a zombie counts as gone
+    while pid_alive(proc.pid) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert not pid_alive(proc.pid)
+    proc.wait()
+
+
+def test_kill_tree():
+    proc = _spawn_tree()
+    child = descendants(proc.pid)[0]
+    assert kill_tree(proc.pid, os.getpgid(proc.pid), grace=2.0) > 0
+    proc.wait(5)
+    assert not pid_alive(child)
+
+
+def test_registry_release_kills_survivors(tmp_path):
+    reg = BrowserRegistry(str(tmp_path))
+    proc = _spawn_tree()
+    pid = reg.register(_driver(proc), "job1")
+    assert pid == proc.pid
+    assert json.loads(open(reg.state_file).read())[0]["job"] == "job1"
+    reg.release(pid)
+    proc.wait(5)
+    assert not os.path.exists(reg.state_file)
+    assert reg.browsers() == []
+
+
+def test_sweep_leftovers_of_dead_owners(tmp_path):
+    browser = _spawn_tree()
+    bystander = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    try:
+        dead = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead.wait()
+        entries = [{"pid": browser.pid, "pgid": os.getpgid(browser.pid)},
+                   # A recycled pid that is not a browser is left alone
+                   {"pid": bystander.pid, "pgid": None}]
+        (tmp_path / f"browsers-{dead.pid}.json").write_text(json.dumps(entries))
+        assert BrowserRegistry(str(tmp_path)).sweep_leftovers() == 1
+        browser.wait(5)
+        assert pid_alive(bystander.pid)
+        assert not (tmp_path / f"browsers-{dead.pid}.json").exists()
+    finally:
+        bystander.kill()
+        bystander.wait()
+
+
+def test_abandoned_job_is_cancelled_then_reaped(tmp_path, monkeypatch):
+    monkeypatch.setattr(reaper, "CANCEL_GRACE_SEC", 0.0)
+    reg = BrowserRegistry(str(tmp_path))
+    monkeypatch.setattr(reg, "_ensure_sweeper", lambda: None)
+    proc = _spawn_tree()
+    reg.register(_driver(proc), "job1")
+    cancel = threading.Event()
+    reg.open_job("job1", cancel, heartbeat_timeout=0.05)
+    reg._sweep_jobs()
+    assert not cancel.is_set()
+    time.sleep(0.1)
+    reg._sweep_jobs()
+    assert cancel.is_set() and reg.browsers("job1")
+    time.sleep(0.01)
+    reg._sweep_jobs()
+    proc.wait(5)
+    assert reg.browsers("job1") == []
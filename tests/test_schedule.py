@@ -0,0 +1,58 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from seatbuddy.schedule import ServerClock, parse_start_at
+
+
+def _serve(date_header):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def date_time_string(self, timestamp=None):
+            return date_header or super().date_time_string(timestamp)
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_measure_local_server():
+    server = _serve(None)
+    try:
+        clock = ServerClock(f"http://127.0.0.1:{server.server_port}/")
+        offset = clock.measure(samples=2)
+    finally:
+        server.shutdown()
+    assert abs(offset) < 1.0
+    assert clock.uncertainty is not None and clock.uncertainty <= 1.0
+
+
+def test_measure_bad_date_raises_oserror():
+    server = _serve("not a date")
+    try:
+        with pytest.raises(OSError):
+            ServerClock(f"http://127.0.0.1:{server.server_port}/").measure(samples=1)
+    finally:
+        server.shutdown()
+
+
+def test_parse_start_at():
+    # 2026-01-01 00:00:00 KST
+    now = 1767193200.0
+    assert parse_start_at("2026-01-01T09:30:00", now) == now + 9.5 * 3600
+    assert parse_start_at("09:30", now) == now + 9.5 * 3600
+    # A time of day already past rolls over to tomorrow
+    assert parse_start_at("00:00", now + 60) == now + 86400
+    assert parse_start_at(None) is None
+    with pytest.raises(ValueError):
+        parse_start_at("99:00", now)
@@ -0,0 +1,50 @@
+from seatbuddy.metrics import JobMetrics
+from seatbuddy.soak import compare, format_table, parse_scenarios, percentiles
+
+
+def _result(**over):
+    r = {"scenario": "1x5", "workers": 5, "rss_per_worker_mb": 200.0, "cpu_percent": 50.0, "chrome_peak": 10,
+         "threads_peak": 40, "fds_peak": 100, "refreshes_per_sec": 2.0, "errors": 0, "leaked_chrome": 0,
+         "leaked_threads": 0, "leaked_fds": 0, "leaked_profiles": 0, "leaked_ports": 0,
+         "harness_rss_mb": 80.0, "attempt_gap_p50_ms": 400.0, "attempt_gap_p95_ms": 900.0,
+         "recovery_p50_ms": 300.0, "recovery_p95_ms": 700.0}
+    r.update(over)
+    return r
+
+
+def test_parse_scenarios():
+    assert parse_scenarios("1x1, 3x5,20") == [(1, 1), (3, 5), (1, 20)]
+    assert parse_scenarios("1x50") == [(1, 20)]
+
+
+def test_percentiles():
+    assert percentiles([]) == (None, None)
+    assert percentiles([i / 100 for i in range(1, 101)]) == (510.0, 960.0)
+
+
+def test_metrics_samples():
+    m = JobMetrics()
+    m.observe("attempt_gap", 0.5)
+    m.observe("attempt_gap", 0.25)
+    assert m.samples("attempt_gap") == [0.5, 0.25]
+    assert m.samples("recovery") == []
+
+
+def test_compare_flags_slower_recovery():
+    baseline = {"scenarios": [_result()]}
+    assert compare([_result()], baseline) == []
+    assert compare([_result(attempt_gap_p95_ms=2000.0)], baseline) == ["1x5 attempt_gap_p95_ms: 900.0 -> 2000.0"]
+    assert compare([_result(refreshes_per_sec=1.0)], baseline) == ["1x5 refreshes_per_sec: 2.0 -> 1.0"]
+
+
+def test_compare_skips_runs_without_failed_attempts():
+    old = {"scenarios": [{k: v for k, v in _result().items() if not k.endswith("_ms")}]}
+    assert compare([_result()], old) == []
+    assert compare([_result(recovery_p50_ms=None, recovery_p95_ms=None)], {"scenarios": [_result()]}) == []
+
+
+def test_format_table_shows_missing_timings():
+    table = format_table([_result(recovery_p50_ms=None)])
+    header, row = table.splitlines()
+    assert "recovery_p50_ms" in header
+    assert row.split()[-2] == "-"
@@ -0,0 +1,129 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from seatbuddy import standby
+
+
+class FakeWorker:
+    """A standby that launches at once; launches numbered in ``fail`` raise."""
+
+    made = []
+    fail = set()
+
+    def __init__(self, params, log, cancelled, on_event=None):
+        self.idx = params["workerIndex"]
+        self.alive, self.closed = True, False
+        FakeWorker.made.append(self)
+
+    def open_browser(self):
+        time.sleep(0.02)
+        if self.idx - standby.STANDBY_INDEX_BASE in FakeWorker.fail:
+            raise RuntimeError("chrome failed to start")
+
+    def login(self):
+        pass
+
+    def is_alive(self):
+        return self.alive
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(standby, "SrtWorker", FakeWorker)
+    FakeWorker.made, FakeWorker.fail = [], set()
+    executor = ThreadPoolExecutor(4)
+    logs = []
+
+    def make(size, cancelled=lambda: False):
+        return standby.StandbyPool({}, lambda m, k="info": logs.append((m, k)), cancelled, size, executor)
+
+    yield make, logs
+    executor.shutdown()
+
+
+async def _settle(p):
+    while p._tasks:
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.parametrize("params, size", [
+    ({}, standby.DEFAULT_STANDBY), ({"standbyCount": 2}, 2), ({"standbyCount": "3"}, 3),
+    ({"standbyCount": 99}, standby.MAX_STANDBY), ({"standbyCount": -1}, 0), ({"standbyCount": "x"}, standby.DEFAULT_STANDBY),
+])
+def test_standby_size(params, size):
+    assert standby.standby_size(params) == size
+
+
+def test_take_hands_out_a_standby_and_launches_another(pool):
+    make, _logs = pool
+
+    async def main():
+        p = make(2)
+        p.start()
+        await _settle(p)
+        first = p._ready[0]
+        w = await p.take(1.0)
+        assert w is first
+        await _settle(p)
+        # The one taken is replaced by a third launch
+        assert len(p._ready) == 2 and w not in p._ready and len(FakeWorker.made) == 3
+        await p.close()
+        return w
+
+    w = asyncio.run(main())
+    assert not w.closed
+    assert all(x.closed for x in FakeWorker.made if x is not w)
+
+
+def test_dead_standby_is_skipped(pool):
+    make, _logs = pool
+
+    async def main():
+        p = make(2)
+        p.start()
+        await _settle(p)
+        dead, live = p._ready
+        dead.alive = False
+        w = await p.take(1.0)
+        assert w is live
+        # The dead one is closed off the loop
+        while not dead.closed:
+            await asyncio.sleep(0.01)
+        await p.close()
+
+    asyncio.run(main())
+
+
+def test_launch_failures_give_up(pool):
+    make, logs = pool
+    FakeWorker.fail = set(range(1, 10))
+
+    async def main():
+        p = make(1)
+        p.start()
+        await _settle(p)
+        assert await p.take(0.2) is None
+        await p.close()
+
+    asyncio.run(main())
+    assert len(FakeWorker.made) == standby.MAX_LAUNCH_FAILURES
+    assert all(w.closed for w in FakeWorker.made)
+    assert [k for _m, k in logs] == ["warn"] * standby.MAX_LAUNCH_FAILURES
+
+
+def test_nothing_launches_once_cancelled(pool):
+    make, _logs = pool
+
+    async def main():
+        p = make(3, cancelled=lambda: True)
+        p.start()
+        assert await p.take(1.0) is None
+
+    asyncio.run(main())
+    assert FakeWorker.made == []
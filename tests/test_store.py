@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from seatbuddy.store import Store
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return Store(str(tmp_path / "seatbuddy.db"))
+
+
+def _prune(s):
+    with s._read_lock:
+        s._prune(s._reader)
+
+
+def test_job_lifecycle_hides_secrets(store):
+    store.create_job("j1", {"userId": "u", "password": "pw", "webhookUrl": "https://hook/token"}, source="cli")
+    store.add_attempt("j1", 0, 2, "일반석", False)
+    store.add_attempt("j1", 0, 3, "특실", True)
+    store.finish_job("j1", {"ok": True, "type": "reserve"})
+    assert store.flush()
+    [job] = store.recent_jobs()
+    assert job["state"] == "succeeded" and job["source"] == "cli"
+    assert job["params"] == {"userId": "u"}
+    assert job["attempts"] == 2 and job["ok"] == 1 and job["type"] == "reserve"
+
+
+def test_log_cursor(store):
+    store.create_job("j1", {})
+    for i in range(5):
+        store.add_log("j1", f"line {i}")
+    assert store.flush()
+    logs = store.job_logs("j1")
+    assert [l["msg"] for l in store.job_logs("j1", after_id=logs[2]["id"])] == ["line 3", "line 4"]
+    assert [l["msg"] for l in store.tail_logs("j1", limit=2)] == ["line 3", "line 4"]
+
+
+def test_retention(tmp_path):
+    s = Store(str(tmp_path / "seatbuddy.db"), max_jobs=2, max_logs_per_job=3, log_max_age_days=1)
+    for i in range(4):
+        s.create_job(f"j{i}", {})
+        s.finish_job(f"j{i}", {"ok": False})
+        for n in range(5):
+            s.add_log(f"j{i}", f"{i}-{n}")
+        time.sleep(0.01)
+    s.create_job("running", {})
+    s._put("INSERT INTO log_events(job_id, ts, kind, msg) VALUES (?,?,?,?)", ("running", time.time() - 2 * 86400, "info", "old"))
+    assert s.flush()
+    _prune(s)
+    # The newest finished jobs, plus every running one, are kept with their newest logs
+    assert {j["id"] for j in s.recent_jobs()} == {"j2", "j3", "running"}
+    assert [l["msg"] for l in s.job_logs("j3")] == ["3-2", "3-3", "3-4"]
+    assert s.job_logs("j0") == [] and s.job_logs("running") == []
+    assert s._query("SELECT COUNT(*) AS n FROM results")[0]["n"] == 2
+
+
+def test_bad_statement_only_loses_itself(store):
+    store.create_job("j1", {})
+    store._put("INSERT INTO missing_table VALUES (?)", (1,))
+    store.add_log("j1", "after")
+    assert store.flush()
+    assert store.failed == 1
+    assert store.get_job("j1") is not None
+    assert [l["msg"] for l in store.job_logs("j1")] == ["after"]
+
+
+def test_in_memory():
+    s = Store(":memory:")
+    s.create_job("j1", {})
+    assert s.flush()
+    assert s.get_job("j1")["state"] == "running"
+
+
+def test_jobs_of_dead_processes_are_abandoned(tmp_path):
+    path = str(tmp_path / "seatbuddy.db")
+    code = f"from seatbuddy.store import Store; s = Store({path!r}); s.create_job('j1', {{}}); s.flush()"
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=ROOT)
+    assert Store(path).get_job("j1")["state"] == "abandoned"
+
+
+def test_templates(store):
+    store.save_template("출근", "수서", "부산")
+    store.save_template("퇴근", "부산", "수서")
+    store.delete_template("출근")
+    assert store.flush()
+    assert store.templates() == [{"name": "퇴근", "dep": "부산", "arr": "수서"}]
@@ -0,0 +1,71 @@
+import pytest
+
+from seatbuddy import targets
+from seatbuddy.targets import TargetScheduler, parse_targets, target_label
+
+JOB = {"departureStation": "수서", "arrivalStation": "부산", "date": "2026-01-01", "time": "08:00"}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(targets.time, "monotonic", c.monotonic)
+    return c
+
+
+def test_parse_targets():
+    [only] = parse_targets(JOB)
+    assert only["weight"] == 1.0 and target_label(only) == "수서→부산 2026-01-01 08:00"
+    ts = parse_targets(dict(JOB, targets=[{"time": "09:00", "timeTo": "10:00", "weight": "x"},
+                                          {"arrivalStation": "대전", "time": ""}, {"time": "09:00", "timeTo": "10:00"},
+                                          {"weight": 0.01}]))
+    # Missing or empty fields fall back to the job's; duplicates are dropped
+    assert [t["key"] for t in ts] == ["수서>부산@2026-01-01 09:00-10:00", "수서>대전@2026-01-01 08:00-",
+                                      "수서>부산@2026-01-01 08:00-"]
+    assert ts[0]["weight"] == 1.0 and ts[2]["weight"] == 0.1
+    assert target_label(ts[0]) == "수서→부산 2026-01-01 09:00~10:00"
+    assert len(parse_targets(dict(JOB, targets=[{"time": f"{h:02d}:00"} for h in range(24)]))) == targets.MAX_TARGETS
+
+
+def test_workers_spread_over_targets(clock):
+    ts = parse_targets(dict(JOB, targets=[{"time": "08:00"}, {"time": "09:00"}, {"time": "10:00"}]))
+    sched = TargetScheduler(ts)
+    picked = {sched.pick(None)["key"] for _ in range(3)}
+    assert len(picked) == 3
+
+
+def test_worker_stays_unless_another_is_overdue(clock):
+    a, b = parse_targets(dict(JOB, targets=[{"time": "08:00"}, {"time": "09:00"}]))
+    sched = TargetScheduler([a, b])
+    sched.report(a["key"], seats=0)
+    clock.now += 1
+    sched.report(b["key"], seats=0)
+    clock.now += targets.BASE_REVISIT_SEC + 1
+    # b is only a second less due than a: switching would cost more than it gains
+    assert sched.pick(b["key"])["key"] == b["key"]
+    sched.report(b["key"], seats=0)
+    clock.now += targets.SWITCH_COST_SEC + 1
+    sched.report(a["key"], seats=0)
+    clock.now += targets.BASE_REVISIT_SEC
+    # Now b has waited longer than the switch costs
+    assert sched.pick(a["key"])["key"] == b["key"]
+
+
+def test_hot_targets_are_revisited_sooner(clock):
+    a, b = parse_targets(dict(JOB, targets=[{"time": "08:00"}, {"time": "09:00"}]))
+    sched = TargetScheduler([a, b])
+    sched.report(a["key"], seats=3)
+    sched.report(b["key"], seats=0, fingerprint=1)
+    assert sched._due[a["key"]] < sched._due[b["key"]]
+    # A changed table heats a target too
+    sched.report(b["key"], seats=0, fingerprint=2)
+    assert sched._interval(b["key"]) < targets.BASE_REVISIT_SEC
+    sched.report("unknown", seats=1)
@@ -0,0 +1,44 @@
+import threading
+import time
+
+import pytest
+
+from seatbuddy import waits
+from seatbuddy.waits import CancelEvent, Cancelled
+
+
+def test_sleep_wakes_on_event():
+    ev = CancelEvent()
+    threading.Timer(0.05, ev.set).start()
+    started = time.monotonic()
+    with pytest.raises(Cancelled):
+        waits.sleep(5, ev.is_set)
+    assert time.monotonic() - started < 1
+    assert ev.set_at is not None
+
+
+def test_sleep_polls_other_callables():
+    flag = {"stop": False}
+    threading.Timer(0.05, lambda: flag.update(stop=True)).start()
+    with pytest.raises(Cancelled):
+        waits.sleep(5, lambda: flag["stop"])
+    waits.sleep(0.01, lambda: False)
+    waits.sleep(-1, lambda: False)
+
+
+def test_set_at_is_first_set():
+    ev = CancelEvent()
+    ev.set()
+    first = ev.set_at
+    ev.set()
+    assert ev.set_at == first
+    ev.clear()
+    assert ev.set_at is None and not ev.is_set()
+
+
+def test_sleep_until():
+    deadline = time.time() + 0.05
+    waits.sleep_until(deadline, lambda: False)
+    assert time.time() >= deadline
+    with pytest.raises(Cancelled):
+        waits.sleep_until(time.time() + 5, lambda: True)